@@ -0,0 +1,126 @@
+"""
+Local stand-in for the Holded invoicing API, for offline benchmarks.
+
+The same `FakeHolded` instance can be used in-process through `transport()` (an
+`httpx.MockTransport`) or served over HTTP through `asgi_app()` for scenarios that run
+the MCP server or the CLI in another process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import parse_qs
+
+import httpx
+
+BASE_PATH = "/api/invoicing/v1"
+
+
+@dataclass
+class FakeHolded:
+    invoices: int = 2000
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    max_page_size: int = 500
+    payload_kb: float = 1.0
+    pdf_kb: int = 200
+    rate_429: float = 0.0
+    retry_after: float = 0.05
+    seed: int = 1
+    requests: int = 0
+    throttled: int = 0
+    _docs: list[dict[str, Any]] = field(default_factory=list, repr=False)
+    _by_id: dict[str, dict[str, Any]] = field(default_factory=dict, repr=False)
+    _pdf: bytes = field(default=b"", repr=False)
+
+    def __post_init__(self) -> None:
+        rng = random.Random(self.seed)
+        padding = "x" * int(self.payload_kb * 1024)
+        for i in range(self.invoices):
+            doc_id = f"{i:024x}"
+            doc = {
+                "id": doc_id,
+                "docNumber": f"F{i:06d}",
+                "contact": f"{i % 97:024x}",
+                "contactName": f"Client {i % 97}",
+                "date": 1700000000 + i * 3600,
+                "status": rng.choice([0, 1, 2]),
+                "subtotal": round(rng.uniform(10, 5000), 2),
+                "tax": 21.0,
+                "total": 0.0,
+                "desc": f"Invoice {i}",
+                "notes": padding,
+                "products": [
+                    {"name": "hosting", "units": 1, "price": 50.0, "tax": 21},
+                    {"name": "support", "units": 2, "price": 30.0, "tax": 21},
+                ],
+            }
+            doc["total"] = round(doc["subtotal"] * 1.21, 2)
+            self._docs.append(doc)
+            self._by_id[doc_id] = doc
+        self._pdf = json.dumps(
+            {"status": 1, "data": base64.b64encode(b"%PDF-1.4\n" + b"0" * (self.pdf_kb * 1024)).decode()}
+        ).encode()
+        self._rng = rng
+
+    def ids(self) -> list[str]:
+        return [d["id"] for d in self._docs]
+
+    async def handle(self, method: str, path: str, query: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        self.requests += 1
+        delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if self.rate_429 and self._rng.random() < self.rate_429:
+            self.throttled += 1
+            return 429, {"retry-after": str(self.retry_after)}, b'{"status":0,"info":"Too many requests"}'
+
+        path = path.removeprefix(BASE_PATH)
+        parts = [p for p in path.split("/") if p]
+        if method == "HEAD":
+            return 200, {}, b""
+        if method == "GET" and parts == ["documents", "invoice"]:
+            offset = int(query.get("offset", 0))
+            limit = min(int(query.get("limit", self.max_page_size)), self.max_page_size)
+            return 200, {}, json.dumps(self._docs[offset : offset + limit]).encode()
+        if len(parts) >= 3 and parts[:2] in (["documents", "invoice"], ["doc", "invoice"]):
+            doc = self._by_id.get(parts[2])
+            if doc is None:
+                return 404, {}, b'{"status":0,"info":"Not found"}'
+            if method == "GET" and len(parts) == 3:
+                return 200, {}, json.dumps(doc).encode()
+            if method == "GET" and parts[3:] == ["pdf"]:
+                return 200, {}, self._pdf
+            return 200, {}, json.dumps({"status": 1, "info": "ok", "id": doc["id"]}).encode()
+        return 404, {}, b'{"status":0,"info":"Unknown route"}'
+
+    def transport(self) -> httpx.MockTransport:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            query = {k: v for k, v in request.url.params.items()}
+            status, headers, body = await self.handle(request.method, request.url.path, query)
+            return httpx.Response(status, headers={"content-type": "application/json", **headers}, content=body)
+
+        return httpx.MockTransport(handler)
+
+    def asgi_app(self):
+        async def app(scope, receive, send):
+            if scope["type"] == "lifespan":
+                while True:
+                    message = await receive()
+                    if message["type"] == "lifespan.startup":
+                        await send({"type": "lifespan.startup.complete"})
+                    elif message["type"] == "lifespan.shutdown":
+                        await send({"type": "lifespan.shutdown.complete"})
+                        return
+            query = {k: v[-1] for k, v in parse_qs(scope["query_string"].decode()).items()}
+            status, headers, body = await self.handle(scope["method"], scope["path"], query)
+            raw_headers = [(b"content-type", b"application/json")]
+            raw_headers += [(k.encode(), v.encode()) for k, v in headers.items()]
+            await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        return app
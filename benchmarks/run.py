@@ -0,0 +1,371 @@
+"""
+Offline benchmarks for holded-mcp against a local fake Holded API.
+
+Every scenario runs in a fresh subprocess so its peak RSS is measured in isolation.
+Results (throughput, p50/p95/p99 latency, peak RSS) are printed as JSON and can be
+compared with a previous run to catch regressions:
+
+    uv run python benchmarks/run.py --output bench.json
+    uv run python benchmarks/run.py --compare bench.json --threshold 0.15
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable
+
+from fake_holded import BASE_PATH, FakeHolded
+
+SCENARIOS = ("client_get", "invoices_iter", "bulk_pay", "mcp_stdio", "mcp_http", "cli")
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def _summary(latencies: list[float], elapsed: float, ops: int) -> dict[str, Any]:
+    values = sorted(latencies)
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return {
+        "ops": ops,
+        "seconds": round(elapsed, 4),
+        "throughput": round(ops / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(values, 50) * 1000, 3),
+        "p95_ms": round(_percentile(values, 95) * 1000, 3),
+        "p99_ms": round(_percentile(values, 99) * 1000, 3),
+        "peak_rss_bytes": self_rss * scale,
+        "peak_child_rss_bytes": child_rss * scale,
+    }
+
+
+async def _drive(ops: list[Any], fn: Callable[[Any], Awaitable[Any]], concurrency: int) -> tuple[list[float], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(op: Any) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await fn(op)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(op) for op in ops))
+    return latencies, time.perf_counter() - started
+
+
+def _serve(app: Any) -> tuple[str, Callable[[], None]]:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    def stop() -> None:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+def _server_env(base_url: str) -> dict[str, str]:
+    return {
+        **os.environ,
+        "HOLDED_API_KEY": "bench",
+        "HOLDED_BASE_URL": base_url + BASE_PATH,
+        "HOLDED_PREWARM_CONNECTIONS": "0",
+    }
+
+
+def _settings():
+    from holded_mcp.config import Settings
+
+    return Settings(HOLDED_API_KEY="bench", HOLDED_BASE_URL="http://fake" + BASE_PATH)
+
+
+async def client_get(fake: FakeHolded, args: argparse.Namespace) -> dict[str, Any]:
+    from holded_mcp.holded_client import HoldedClient
+    from holded_mcp.invoices import get_invoice
+
+    client = HoldedClient(_settings(), transport=fake.transport())
+    ids = fake.ids()[: args.ops]
+    try:
+        latencies, elapsed = await _drive(ids, lambda doc_id: get_invoice(client, doc_id), args.concurrency)
+    finally:
+        await client.aclose()
+    return _summary(latencies, elapsed, len(ids))
+
+
+async def invoices_iter(fake: FakeHolded, args: argparse.Namespace) -> dict[str, Any]:
+    from holded_mcp.holded_client import HoldedClient
+    from holded_mcp.invoices import iter_invoices
+
+    client = HoldedClient(_settings(), transport=fake.transport())
+    latencies: list[float] = []
+    count = 0
+    started = last = time.perf_counter()
+    try:
+        async for _ in iter_invoices(client, page_size=args.page_size, prefetch=args.prefetch):
+            now = time.perf_counter()
+            latencies.append(now - last)
+            last = now
+            count += 1
+    finally:
+        await client.aclose()
+    return _summary(latencies, time.perf_counter() - started, count)
+
+
+async def bulk_pay(fake: FakeHolded, args: argparse.Namespace) -> dict[str, Any]:
+    from holded_mcp.bulk import run_bounded
+    from holded_mcp.holded_client import HoldedClient
+    from holded_mcp.invoices import pay_invoice
+
+    client = HoldedClient(_settings(), transport=fake.transport())
+    ids = fake.ids()[: args.ops]
+    latencies: list[float] = []
+
+    async def pay(doc_id: str) -> Any:
+        started = time.perf_counter()
+        try:
+            return await pay_invoice(client, doc_id, date=1700000000, amount=1.0)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await run_bounded(ids, pay, concurrency=args.concurrency)
+    finally:
+        await client.aclose()
+    return _summary(latencies, time.perf_counter() - started, len(ids))
+
+
+async def _mcp_get(session: Any, ids: list[str], concurrency: int) -> tuple[list[float], float]:
+    async def call(doc_id: str) -> None:
+        result = await session.call_tool("holded_invoices_get", {"documentId": doc_id})
+        if result.isError:
+            raise RuntimeError(result.content[0].text if result.content else "tool error")
+
+    return await _drive(ids, call, concurrency)
+
+
+async def mcp_stdio(fake: FakeHolded, args: argparse.Namespace) -> dict[str, Any]:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    url, stop = _serve(fake.asgi_app())
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=["-c", "from holded_mcp.stdio import main; main()"],
+        env=_server_env(url),
+    )
+    try:
+        async with stdio_client(params) as (read, write), ClientSession(read, write) as session:
+            await session.initialize()
+            latencies, elapsed = await _mcp_get(session, fake.ids()[: args.ops], args.concurrency)
+    finally:
+        stop()
+    return _summary(latencies, elapsed, len(latencies))
+
+
+async def mcp_http(fake: FakeHolded, args: argparse.Namespace) -> dict[str, Any]:
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    fake_url, stop_fake = _serve(fake.asgi_app())
+    os.environ.update(_server_env(fake_url))
+    from holded_mcp.app import app
+
+    url, stop_app = _serve(app)
+    try:
+        async with streamablehttp_client(f"{url}/mcp") as (read, write, _), ClientSession(read, write) as session:
+            await session.initialize()
+            latencies, elapsed = await _mcp_get(session, fake.ids()[: args.ops], args.concurrency)
+    finally:
+        stop_app()
+        stop_fake()
+    return _summary(latencies, elapsed, len(latencies))
+
+
+async def cli(fake: FakeHolded, args: argparse.Namespace) -> dict[str, Any]:
+    # One process per call: this measures cold start plus a single request.
+    url, stop = _serve(fake.asgi_app())
+    env = _server_env(url)
+    ids = fake.ids()[: args.cli_ops]
+    latencies: list[float] = []
+    started = time.perf_counter()
+    try:
+        for doc_id in ids:
+            t0 = time.perf_counter()
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                "holded_mcp.cli",
+                "get",
+                doc_id,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+            _, stderr = await proc.communicate()
+            if proc.returncode != 0:
+                raise RuntimeError(stderr.decode())
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        stop()
+    return _summary(latencies, time.perf_counter() - started, len(ids))
+
+
+RUNNERS: dict[str, Callable[[FakeHolded, argparse.Namespace], Awaitable[dict[str, Any]]]] = {
+    "client_get": client_get,
+    "invoices_iter": invoices_iter,
+    "bulk_pay": bulk_pay,
+    "mcp_stdio": mcp_stdio,
+    "mcp_http": mcp_http,
+    "cli": cli,
+}
+
+
+def _fake(args: argparse.Namespace) -> FakeHolded:
+    return FakeHolded(
+        invoices=args.invoices,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        max_page_size=args.max_page_size,
+        payload_kb=args.payload_kb,
+        pdf_kb=args.pdf_kb,
+        rate_429=args.rate_429,
+    )
+
+
+def _run_worker(args: argparse.Namespace) -> None:
+    fake = _fake(args)
+    result = asyncio.run(RUNNERS[args.worker](fake, args))
+    result["upstream_requests"] = fake.requests
+    result["upstream_429"] = fake.throttled
+    print(json.dumps(result))
+
+
+def _compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "error" in result or "error" in base:
+            continue
+        if base["throughput"] and result["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput']} -> {result['throughput']}")
+        if base["p95_ms"] and result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+    return regressions
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="holded-mcp offline benchmarks")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Scenario to run (repeatable)")
+    parser.add_argument("--ops", type=int, default=500, help="Operations per scenario")
+    parser.add_argument("--cli-ops", type=int, default=10, help="CLI process launches")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--prefetch", type=int, default=4)
+    parser.add_argument("--invoices", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--max-page-size", type=int, default=500)
+    parser.add_argument("--payload-kb", type=float, default=1.0)
+    parser.add_argument("--pdf-kb", type=int, default=200)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="Baseline results JSON; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--worker", choices=SCENARIOS, help=argparse.SUPPRESS)
+    return parser
+
+
+def main() -> None:
+    parser = _parser()
+    args = parser.parse_args()
+    if args.worker:
+        _run_worker(args)
+        return
+
+    worker_args = _strip_driver_args(sys.argv[1:])
+    results: dict[str, Any] = {}
+    for name in args.scenario or SCENARIOS:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", name, *worker_args],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            results[name] = {"error": proc.stderr.strip().splitlines()[-1:] or ["failed"]}
+        else:
+            results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fake": {
+                k: v
+                for k, v in asdict(_fake(args)).items()
+                if not k.startswith("_") and k not in ("requests", "throttled")
+            },
+            "ops": args.ops,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            regressions = _compare(report, json.load(handle), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def _strip_driver_args(argv: list[str]) -> list[str]:
+    # Drop --scenario/--output/--compare/--threshold (and their values) before handing
+    # the remaining options to a worker.
+    out: list[str] = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        if arg in ("--scenario", "--output", "--compare", "--threshold"):
+            skip = True
+            continue
+        if arg.startswith(("--scenario=", "--output=", "--compare=", "--threshold=")):
+            continue
+        out.append(arg)
+    return out
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Startup budget check for holded-cli and holded-mcp-stdio.
+
+Measures `python -X importtime` for the entry-point modules (best of --repeat runs),
+checks that the CLI does not import heavy dependencies eagerly, and times
+`holded-cli --help` and the stdio server's MCP `initialize` round trip end to end.
+Prints JSON and exits 1 when a budget is exceeded:
+
+    uv run python benchmarks/startup.py
+    uv run python benchmarks/startup.py --scale 2   # slower machine: double the budgets
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any
+
+# module -> (cumulative import budget in ms, modules it must not pull in at import time)
+IMPORT_BUDGETS: dict[str, tuple[float, tuple[str, ...]]] = {
+    "holded_mcp.cli": (120.0, ("httpx", "pydantic", "pydantic_settings", "sqlite3", "zipfile")),
+    "holded_mcp.invoices": (100.0, ("httpx", "pydantic")),
+    "holded_mcp.config": (250.0, ("pydantic_settings", "httpx")),
+    "holded_mcp.stdio": (1500.0, ()),
+}
+
+# end-to-end wall time budgets in ms
+WALL_BUDGETS = {"cli_help": 250.0, "stdio_initialize": 2000.0}
+
+_INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "startup-check", "version": "0"},
+    },
+}
+
+
+def _env() -> dict[str, str]:
+    return {
+        **os.environ,
+        "HOLDED_API_KEY": os.environ.get("HOLDED_API_KEY", "startup-check"),
+        "HOLDED_PREWARM_CONNECTIONS": "0",
+    }
+
+
+def import_profile(module: str) -> tuple[float, set[str]]:
+    """Cumulative import time of `module` in ms, and every module imported with it."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=_env(),
+        check=True,
+    )
+    cumulative = 0.0
+    modules: set[str] = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if not cum.isdigit():
+            continue  # header line
+        modules.add(name)
+        if name == module:
+            cumulative = int(cum) / 1000
+    return cumulative, modules
+
+
+def time_cli_help() -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "holded_mcp.cli", "--help"],
+        capture_output=True,
+        env=_env(),
+        check=True,
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def time_stdio_initialize() -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", "from holded_mcp.stdio import main; main()"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        env=_env(),
+    )
+    try:
+        assert proc.stdin is not None and proc.stdout is not None
+        proc.stdin.write(json.dumps(_INITIALIZE) + "\n")
+        proc.stdin.flush()
+        response = proc.stdout.readline()
+        elapsed = (time.perf_counter() - started) * 1000
+        if '"result"' not in response:
+            raise RuntimeError(f"unexpected initialize response: {response!r}")
+        return elapsed
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def run(repeat: int, scale: float) -> dict[str, Any]:
+    report: dict[str, Any] = {"python": sys.version.split()[0], "imports": {}, "wall": {}, "violations": []}
+    for module, (budget, forbidden) in IMPORT_BUDGETS.items():
+        best = float("inf")
+        loaded: set[str] = set()
+        for _ in range(repeat):
+            ms, loaded = import_profile(module)
+            best = min(best, ms)
+        eager = sorted(m for m in forbidden if m in loaded)
+        report["imports"][module] = {"ms": round(best, 1), "budget_ms": budget * scale, "eager": eager}
+        if best > budget * scale:
+            report["violations"].append(f"import {module}: {best:.1f} ms > {budget * scale:.0f} ms")
+        if eager:
+            report["violations"].append(f"import {module} eagerly imports {', '.join(eager)}")
+
+    for name, fn in (("cli_help", time_cli_help), ("stdio_initialize", time_stdio_initialize)):
+        samples = [fn() for _ in range(repeat)]
+        median = statistics.median(samples)
+        budget = WALL_BUDGETS[name] * scale
+        report["wall"][name] = {"median_ms": round(median, 1), "min_ms": round(min(samples), 1), "budget_ms": budget}
+        if median > budget:
+            report["violations"].append(f"{name}: {median:.1f} ms > {budget:.0f} ms")
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default: 5)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every time budget (default: 1.0)")
+    args = parser.parse_args()
+
+    report = run(max(1, args.repeat), args.scale)
+    print(json.dumps(report, indent=2))
+    if report["violations"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
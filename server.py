@@ -1,8 +1,7 @@
 from __future__ import annotations
 
-from holded_mcp.mcp_server import mcp
+from holded_mcp.stdio import main
 
 
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
-
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import logging
 import os
 
 import uvicorn
@@ -8,5 +9,10 @@ import uvicorn
 def main() -> None:
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
-    uvicorn.run("holded_mcp.app:app", host=host, port=port, reload=False)
-
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1 and not os.getenv("HOLDED_SHARED_STATE"):
+        logging.getLogger(__name__).warning(
+            "WORKERS=%d without HOLDED_SHARED_STATE: each worker rate-limits and caches on its own",
+            workers,
+        )
+    uvicorn.run("holded_mcp.app:app", host=host, port=port, reload=False, workers=workers)
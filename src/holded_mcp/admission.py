@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from . import metrics
+from .tenants import tenant_id
+
+if TYPE_CHECKING:
+    from .config import Settings
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+# JSON-RPC "server error" range; the request id is unknown without reading the body.
+_OVERLOADED = json.dumps(
+    {"jsonrpc": "2.0", "id": None, "error": {"code": -32000, "message": "Server overloaded, retry later"}}
+).encode()
+
+
+class AdmissionController:
+    """
+    Caps concurrent requests globally and per client. Requests over a cap wait in a
+    bounded queue for at most `queue_timeout` seconds; when the queue is full or the
+    wait times out they are shed instead of slowing down everyone else.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int,
+        max_per_client: int,
+        queue_size: int,
+        queue_timeout: float,
+    ) -> None:
+        self.max_concurrent = max(0, max_concurrent)
+        self.max_per_client = max(0, max_per_client)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self._cond = asyncio.Condition()
+        self._per_client: dict[str, int] = {}
+        self.active = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "timeout": 0}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> AdmissionController:
+        return cls(
+            max_concurrent=settings.holded_max_concurrent_requests,
+            max_per_client=settings.holded_max_concurrent_per_client,
+            queue_size=settings.holded_admission_queue_size,
+            queue_timeout=settings.holded_admission_queue_timeout_seconds,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0 or self.max_per_client > 0
+
+    def _can_admit(self, client: str) -> bool:
+        if self.max_concurrent and self.active >= self.max_concurrent:
+            return False
+        return not self.max_per_client or self._per_client.get(client, 0) < self.max_per_client
+
+    def _admit(self, client: str) -> None:
+        self.active += 1
+        self._per_client[client] = self._per_client.get(client, 0) + 1
+        self.admitted += 1
+
+    def _shed(self, reason: str) -> str:
+        self.shed[reason] += 1
+        metrics.ADMISSION_SHED.inc(reason=reason)
+        return reason
+
+    def _set_queued(self, delta: int) -> None:
+        self.queued += delta
+        self.peak_queued = max(self.peak_queued, self.queued)
+        metrics.ADMISSION_QUEUED.set(self.queued)
+
+    async def acquire(self, client: str) -> str | None:
+        """Wait for a slot. Returns None once admitted, or the reason the request was shed."""
+        async with self._cond:
+            if self._can_admit(client):
+                self._admit(client)
+                return None
+            if self.queued >= self.queue_size:
+                return self._shed("queue_full")
+            self._set_queued(+1)
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self._can_admit(client)), self.queue_timeout)
+            except asyncio.TimeoutError:
+                return self._shed("timeout")
+            finally:
+                self._set_queued(-1)
+            self._admit(client)
+            return None
+
+    async def release(self, client: str) -> None:
+        async with self._cond:
+            self.active -= 1
+            remaining = self._per_client.get(client, 1) - 1
+            if remaining:
+                self._per_client[client] = remaining
+            else:
+                self._per_client.pop(client, None)
+            self._cond.notify_all()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "queued": self.queued,
+            "peakQueued": self.peak_queued,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "maxConcurrent": self.max_concurrent,
+            "maxPerClient": self.max_per_client,
+            "queueSize": self.queue_size,
+            "queueTimeoutSeconds": self.queue_timeout,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an `AdmissionController` to POSTs under `path_prefix`."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        controller: AdmissionController,
+        path_prefix: str = "/mcp",
+        client_header: str | None = None,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.path_prefix = path_prefix
+        self.client_header = client_header.lower().encode() if client_header else None
+
+    def _client(self, scope: dict[str, Any]) -> str:
+        # Tenants (per-request API keys) are limited per key, everyone else per address.
+        if self.client_header is not None:
+            for name, value in scope.get("headers", ()):
+                if name == self.client_header and value:
+                    return "tenant:" + tenant_id(value.decode("latin-1"))
+        client = scope.get("client")
+        return "addr:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path_prefix)
+            or not self.controller.enabled
+        ):
+            await self.app(scope, receive, send)
+            return
+        client = self._client(scope)
+        if await self.controller.acquire(client) is not None:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [(b"content-type", b"application/json"), (b"retry-after", b"1")],
+                }
+            )
+            await send({"type": "http.response.body", "body": _OVERLOADED})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.controller.release(client)
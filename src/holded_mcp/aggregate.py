@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import datetime as dt
+from typing import Any, AsyncIterable, Iterable, Sequence
+
+GROUP_KEYS = ("contact", "month", "status", "tax")
+
+# Output column for each group key ("tax" is already the tax amount column).
+_COLUMNS = {"contact": "contact", "month": "month", "status": "status", "tax": "taxRate"}
+
+
+def _number(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+
+
+def _month(doc: dict[str, Any]) -> str | None:
+    ts = doc.get("date")
+    if not isinstance(ts, (int, float)):
+        return None
+    return dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m")
+
+
+def _tax_lines(doc: dict[str, Any]) -> dict[float, dict[str, float]]:
+    """Line items folded per tax rate: {rate: {"subtotal", "tax", "total"}}."""
+    lines: dict[float, dict[str, float]] = {}
+    products = doc.get("products")
+    for item in products if isinstance(products, list) else ():
+        if not isinstance(item, dict):
+            continue
+        rate = _number(item.get("tax"))
+        base = _number(item.get("units")) * _number(item.get("price"))
+        base *= 1 - _number(item.get("discount")) / 100
+        tax = base * rate / 100
+        acc = lines.setdefault(rate, {"subtotal": 0.0, "tax": 0.0, "total": 0.0})
+        acc["subtotal"] += base
+        acc["tax"] += tax
+        acc["total"] += base + tax
+    return lines
+
+
+class InvoiceAggregator:
+    """
+    Running sums per group, fed one invoice at a time.
+
+    Memory grows with the number of groups, not with the number of invoices. Grouping by
+    `tax` splits each invoice by the tax rate of its line items, so amounts in that case
+    come from the lines rather than from the invoice totals (and `pending`, which only
+    exists per invoice, is left out).
+    """
+
+    def __init__(self, group_by: Sequence[str]) -> None:
+        unknown = [k for k in group_by if k not in GROUP_KEYS]
+        if unknown:
+            raise ValueError(f"Unknown groupBy key(s): {', '.join(unknown)} (use {', '.join(GROUP_KEYS)})")
+        self.group_by = tuple(dict.fromkeys(group_by))
+        self._amounts = ("subtotal", "tax", "total")
+        if "tax" not in self.group_by:
+            self._amounts += ("pending",)
+        self.invoices = 0
+        self._groups: dict[tuple[Any, ...], dict[str, Any]] = {}
+
+    def _bucket(self, key: tuple[Any, ...], doc: dict[str, Any]) -> dict[str, Any]:
+        bucket = self._groups.get(key)
+        if bucket is None:
+            bucket = {_COLUMNS[k]: v for k, v in zip(self.group_by, key)}
+            if "contact" in self.group_by:
+                bucket["contactName"] = doc.get("contactName")
+            bucket.update(count=0, **{name: 0.0 for name in self._amounts})
+            self._groups[key] = bucket
+        return bucket
+
+    def add(self, doc: Any) -> None:
+        if not isinstance(doc, dict):
+            return
+        self.invoices += 1
+        base_key = {
+            "contact": doc.get("contact"),
+            "month": _month(doc),
+            "status": doc.get("status"),
+        }
+        if "tax" in self.group_by:
+            for rate, amounts in _tax_lines(doc).items():
+                key = tuple(rate if k == "tax" else base_key[k] for k in self.group_by)
+                bucket = self._bucket(key, doc)
+                bucket["count"] += 1
+                for name, value in amounts.items():
+                    bucket[name] += value
+            return
+        bucket = self._bucket(tuple(base_key[k] for k in self.group_by), doc)
+        bucket["count"] += 1
+        bucket["subtotal"] += _number(doc.get("subtotal"))
+        bucket["tax"] += _number(doc.get("tax"))
+        bucket["total"] += _number(doc.get("total"))
+        bucket["pending"] += _number(doc.get("paymentsPending"))
+
+    def rows(self) -> list[dict[str, Any]]:
+        def order(key: tuple[Any, ...]) -> tuple[Any, ...]:
+            return tuple((v is None, str(v) if not isinstance(v, (int, float)) else v) for v in key)
+
+        rows: list[dict[str, Any]] = []
+        for key in sorted(self._groups, key=order):
+            bucket = dict(self._groups[key])
+            for name in self._amounts:
+                bucket[name] = round(bucket[name], 2)
+            bucket["avgTotal"] = round(bucket["total"] / bucket["count"], 2) if bucket["count"] else 0.0
+            rows.append(bucket)
+        return rows
+
+    def result(self) -> dict[str, Any]:
+        return {"groupBy": list(self.group_by), "invoices": self.invoices, "rows": self.rows()}
+
+
+async def aggregate_invoices(
+    items: AsyncIterable[Any] | Iterable[Any],
+    group_by: Sequence[str],
+) -> dict[str, Any]:
+    """Fold a stream of invoices (e.g. `iter_invoices` or a mirror query) into grouped totals."""
+    aggregator = InvoiceAggregator(group_by)
+    if isinstance(items, AsyncIterable):
+        async for doc in items:
+            aggregator.add(doc)
+    else:
+        for doc in items:
+            aggregator.add(doc)
+    return aggregator.result()
@@ -3,23 +3,37 @@ from __future__ import annotations
 import contextlib
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
-from .mcp_server import mcp
+from .admission import AdmissionController, AdmissionMiddleware
+from .config import Settings
+from .mcp_server import mcp, shared_app_context
+from .metrics import REGISTRY
 
 
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
     async with contextlib.AsyncExitStack() as stack:
+        await stack.enter_async_context(shared_app_context())
         await stack.enter_async_context(mcp.session_manager.run())
         yield
 
 
+_settings = Settings()
+admission = AdmissionController.from_settings(_settings)
+
 app = FastAPI(title="holded-mcp", lifespan=lifespan, redirect_slashes=False)
+app.add_middleware(AdmissionMiddleware, controller=admission, client_header=_settings.holded_tenant_header)
 
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "admission": admission.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 _mcp_http_app = mcp.streamable_http_app()
 app.router.routes.extend(_mcp_http_app.routes)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Sequence, TypeVar
+
+from .errors import HoldedAPIError
+from .invoices import (
+    approve_invoice,
+    create_invoice,
+    delete_invoice,
+    get_invoice,
+    invoice_pdf,
+    pay_invoice,
+    send_invoice,
+    update_invoice,
+)
+
+if TYPE_CHECKING:
+    from .holded_client import HoldedClient
+
+T = TypeVar("T")
+
+
+def error_payload(error: Exception) -> dict[str, Any]:
+    if isinstance(error, HoldedAPIError):
+        return error.to_dict()
+    return {"message": str(error)}
+
+
+async def run_bounded(
+    items: Sequence[T],
+    fn: Callable[[T], Awaitable[Any]],
+    *,
+    concurrency: int,
+) -> list[dict[str, Any]]:
+    """
+    Apply `fn` to every item with at most `concurrency` calls in flight.
+
+    Returns one `{"ok": True, "result": ...}` or `{"ok": False, "error": {...}}` entry per
+    item, in input order; a Holded error or invalid item (`ValueError`) never aborts the
+    rest of the batch. Anything else is a bug and propagates.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(item: T) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                return {"ok": True, "result": await fn(item)}
+            except (HoldedAPIError, ValueError) as exc:
+                return {"ok": False, "error": error_payload(exc)}
+
+    return list(await asyncio.gather(*(one(item) for item in items)))
+
+
+WRITE_OPERATIONS = frozenset({"create", "update", "approve", "delete", "pay", "send"})
+
+
+def _document_id(op: dict[str, Any]) -> str:
+    doc_id = op.get("document_id")
+    if not isinstance(doc_id, str) or not doc_id:
+        raise ValueError("document_id is required")
+    return doc_id
+
+
+def _payload(op: dict[str, Any]) -> dict[str, Any]:
+    payload = op.get("payload")
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be a JSON object")
+    return payload
+
+
+async def _pay(client: HoldedClient, op: dict[str, Any]) -> Any:
+    if not isinstance(op.get("date"), int) or not isinstance(op.get("amount"), (int, float)):
+        raise ValueError("date (unix seconds) and amount are required")
+    return await pay_invoice(
+        client,
+        _document_id(op),
+        date=op["date"],
+        amount=op["amount"],
+        treasury=op.get("treasury"),
+        desc=op.get("desc"),
+    )
+
+
+async def _send(client: HoldedClient, op: dict[str, Any]) -> Any:
+    if not isinstance(op.get("emails"), str):
+        raise ValueError("emails is required")
+    return await send_invoice(
+        client,
+        _document_id(op),
+        emails=op["emails"],
+        subject=op.get("subject"),
+        message=op.get("message"),
+        mail_template_id=op.get("mail_template_id"),
+        doc_ids=op.get("doc_ids"),
+    )
+
+
+_OPERATIONS: dict[str, Callable[[HoldedClient, dict[str, Any]], Awaitable[Any]]] = {
+    "get": lambda client, op: get_invoice(client, _document_id(op), fields=op.get("fields")),
+    "create": lambda client, op: create_invoice(client, _payload(op)),
+    "update": lambda client, op: update_invoice(client, _document_id(op), _payload(op)),
+    "approve": lambda client, op: approve_invoice(client, _document_id(op)),
+    "delete": lambda client, op: delete_invoice(client, _document_id(op)),
+    "pay": _pay,
+    "send": _send,
+    "pdf": lambda client, op: invoice_pdf(client, _document_id(op)),
+}
+
+
+async def run_operation(client: HoldedClient, op: dict[str, Any]) -> Any:
+    """
+    Run one `{"op": ..., "document_id": ..., ...}` operation; fields use the same
+    snake_case names as the holded-cli options.
+    """
+    name = op.get("op")
+    handler = _OPERATIONS.get(name) if isinstance(name, str) else None
+    if handler is None:
+        raise ValueError(f"Unknown op: {name!r} (expected one of: {', '.join(_OPERATIONS)})")
+    return await handler(client, op)
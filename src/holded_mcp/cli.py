@@ -2,29 +2,48 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import json
 import sys
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, TextIO
 
-from pydantic import ValidationError
-
-from .config import Settings
+from . import jsonio
+from .aggregate import GROUP_KEYS, aggregate_invoices
+from .bulk import WRITE_OPERATIONS, error_payload, run_operation
 from .errors import HoldedAPIError
-from .holded_client import HoldedClient
 from .invoices import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_PREFETCH,
+    VIEWS,
     approve_invoice,
+    compile_fields,
     create_invoice,
     delete_invoice,
     get_invoice,
     invoice_pdf,
+    iter_async,
+    iter_invoices,
     list_invoices,
     pay_invoice,
+    project,
+    project_items,
     send_invoice,
     update_invoice,
 )
+from .timings import RequestTiming, collect_timings
+
+# pydantic, httpx, sqlite3 and zipfile are imported by the commands that need them,
+# so --help and argument errors stay fast (see benchmarks/startup.py).
+if TYPE_CHECKING:
+    from .config import Settings
+    from .holded_client import HoldedClient
+    from .mirror import InvoiceMirror
+
+
+class _SettingsError(ValueError):
+    """Missing or invalid HOLDED_* environment variables."""
 
 
-def _load_json(value: str) -> Any:
+def _load_json(value: str, *, invoice: str | None = None, validation: str = "off") -> Any:
+    """Read JSON from a literal, @file or '-'; `invoice` ("create"/"update") also validates it."""
     if value == "-":
         raw = sys.stdin.read()
     elif value.startswith("@"):
@@ -33,9 +52,17 @@ def _load_json(value: str) -> Any:
     else:
         raw = value
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError as exc:
+        data = jsonio.loads(raw)
+    except jsonio.JSONDecodeError as exc:
         raise ValueError(f"Invalid JSON payload: {exc.msg}") from exc
+    if invoice is not None:
+        if not isinstance(data, dict):
+            raise ValueError("Payload must be a JSON object")
+        if validation != "off":
+            from .payloads import validate_invoice_payload
+
+            validate_invoice_payload(data, mode=validation, create=invoice == "create")
+    return data
 
 
 def _add_current_flags(parser: argparse.ArgumentParser) -> None:
@@ -45,8 +72,50 @@ def _add_current_flags(parser: argparse.ArgumentParser) -> None:
     parser.set_defaults(current=None)
 
 
+def _add_validation_flag(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--validation",
+        choices=("strict", "lenient", "off"),
+        default=None,
+        help="Check the payload locally before sending it (default: HOLDED_PAYLOAD_VALIDATION, off)",
+    )
+
+
+def _add_live_flag(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Always query Holded, bypassing the local mirror (HOLDED_MIRROR_PATH)",
+    )
+
+
+def _split_fields(value: str) -> list[str]:
+    return [f.strip() for f in value.split(",") if f.strip()]
+
+
+def _add_fields_flag(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--fields",
+        type=_split_fields,
+        help=(
+            "Comma-separated dotted paths to keep (e.g. id,docNumber,products.name); "
+            f"views: {', '.join(VIEWS)}"
+        ),
+    )
+
+
 def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="holded-cli", description="Holded invoicing CLI")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Print single-line JSON instead of indented output",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print a per-request phase breakdown (connect, TLS, TTFB, download, decode) to stderr",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     list_parser = subparsers.add_parser("list", help="List invoices")
@@ -60,16 +129,33 @@ def _build_parser() -> argparse.ArgumentParser:
     list_parser.add_argument("--order", help="Order direction")
     list_parser.add_argument("--limit", type=int, help="Limit results")
     list_parser.add_argument("--offset", type=int, help="Offset results")
+    list_parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Fetch every page, streaming results (--limit sets the page size)",
+    )
+    list_parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH,
+        help=f"Pages fetched concurrently with --all (default: {DEFAULT_PREFETCH})",
+    )
+    _add_fields_flag(list_parser)
+    _add_live_flag(list_parser)
 
     get_parser = subparsers.add_parser("get", help="Get invoice by id")
     get_parser.add_argument("document_id", help="Invoice document id")
+    _add_fields_flag(get_parser)
+    _add_live_flag(get_parser)
 
     create_parser = subparsers.add_parser("create", help="Create invoice")
     create_parser.add_argument("--payload", required=True, help="JSON payload, @file, or '-' for stdin")
+    _add_validation_flag(create_parser)
 
     update_parser = subparsers.add_parser("update", help="Update invoice")
     update_parser.add_argument("document_id", help="Invoice document id")
     update_parser.add_argument("--payload", required=True, help="JSON payload, @file, or '-' for stdin")
+    _add_validation_flag(update_parser)
 
     approve_parser = subparsers.add_parser("approve", help="Approve invoice")
     approve_parser.add_argument("document_id", help="Invoice document id")
@@ -95,15 +181,306 @@ def _build_parser() -> argparse.ArgumentParser:
     pdf_parser = subparsers.add_parser("pdf", help="Get invoice PDF (base64)")
     pdf_parser.add_argument("document_id", help="Invoice document id")
 
+    export_pdf_parser = subparsers.add_parser(
+        "pdf-export",
+        help="Download invoice PDFs to a directory or zip file",
+        description="Export PDFs for the given ids, or for every invoice in --date-from/--date-to.",
+    )
+    export_pdf_parser.add_argument("document_ids", nargs="*", help="Invoice document ids")
+    export_pdf_parser.add_argument("--date-from", dest="date_from", help="Export invoices from (YYYY-MM-DD)")
+    export_pdf_parser.add_argument("--date-to", dest="date_to", help="Export invoices to (YYYY-MM-DD)")
+    target = export_pdf_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output-dir", dest="output_dir", help="Write one .pdf file per invoice here")
+    target.add_argument("--zip", dest="zip_path", help="Write every PDF into this zip file")
+    export_pdf_parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Parallel downloads (default: HOLDED_BULK_CONCURRENCY)",
+    )
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Run NDJSON operations concurrently over one connection pool",
+        description=(
+            'Reads one JSON operation per line, e.g. {"op": "pay", "document_id": "...", '
+            '"date": 1700000000, "amount": 100.0}, and writes one NDJSON result per '
+            "operation as it completes. Ops: get, create, update, approve, delete, pay, send, pdf."
+        ),
+    )
+    batch_parser.add_argument(
+        "--input",
+        default="-",
+        help="NDJSON file with operations (default: '-' for stdin)",
+    )
+    batch_parser.add_argument(
+        "--parallelism",
+        type=int,
+        help="Operations in flight at once (default: HOLDED_BULK_CONCURRENCY)",
+    )
+
+    aggregate_parser = subparsers.add_parser(
+        "aggregate",
+        help="Aggregate invoice amounts server-side",
+        description="Stream every matching invoice and print totals grouped by --group-by.",
+    )
+    aggregate_parser.add_argument(
+        "--group-by",
+        dest="group_by",
+        type=_split_fields,
+        default=[],
+        help=f"Comma-separated grouping keys: {', '.join(GROUP_KEYS)} (default: one overall row)",
+    )
+    aggregate_parser.add_argument("--status", type=int, help="Invoice status")
+    _add_current_flags(aggregate_parser)
+    aggregate_parser.add_argument("--date-from", dest="date_from", help="Filter by date from (YYYY-MM-DD)")
+    aggregate_parser.add_argument("--date-to", dest="date_to", help="Filter by date to (YYYY-MM-DD)")
+    aggregate_parser.add_argument(
+        "--updated-from", dest="updated_from", help="Filter by updated from (YYYY-MM-DD)"
+    )
+    aggregate_parser.add_argument("--updated-to", dest="updated_to", help="Filter by updated to (YYYY-MM-DD)")
+    aggregate_parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH,
+        help=f"Pages fetched concurrently (default: {DEFAULT_PREFETCH})",
+    )
+    _add_live_flag(aggregate_parser)
+
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Stream invoices to CSV, NDJSON or Parquet",
+        description=(
+            "Write every matching invoice page by page with bounded memory. A checkpoint next to "
+            "the output (<output>.state.json) lets --resume continue an interrupted export or "
+            "append invoices updated since the last one."
+        ),
+    )
+    export_parser.add_argument("--format", dest="fmt", choices=("csv", "ndjson", "parquet"), required=True)
+    export_parser.add_argument(
+        "--output",
+        required=True,
+        help="Output file ('-' for stdout with csv/ndjson); a directory of part files for parquet",
+    )
+    export_parser.add_argument(
+        "--lines",
+        action="store_true",
+        help="One row per line item, with line.* columns",
+    )
+    export_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the checkpoint, or append invoices updated since a finished export",
+    )
+    export_parser.add_argument("--status", type=int, help="Invoice status")
+    _add_current_flags(export_parser)
+    export_parser.add_argument("--date-from", dest="date_from", help="Filter by date from (YYYY-MM-DD)")
+    export_parser.add_argument("--date-to", dest="date_to", help="Filter by date to (YYYY-MM-DD)")
+    export_parser.add_argument("--updated-from", dest="updated_from", help="Filter by updated from (YYYY-MM-DD)")
+    export_parser.add_argument("--updated-to", dest="updated_to", help="Filter by updated to (YYYY-MM-DD)")
+    export_parser.add_argument(
+        "--page-size",
+        dest="page_size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f"Invoices per upstream page (default: {DEFAULT_PAGE_SIZE})",
+    )
+    export_parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH,
+        help=f"Pages fetched concurrently (default: {DEFAULT_PREFETCH})",
+    )
+    export_parser.add_argument(
+        "--chunk-rows",
+        dest="chunk_rows",
+        type=int,
+        default=5000,
+        help="Rows buffered before each write and checkpoint (default: 5000)",
+    )
+    _add_fields_flag(export_parser)
+    export_parser.set_defaults(live=True)  # exports always read from Holded, never the mirror
+
+    search_parser = subparsers.add_parser(
+        "search",
+        help="Full-text search over a local invoice index (HOLDED_SEARCH_INDEX_PATH)",
+        description=(
+            "Search doc numbers, contact names, descriptions, notes and line item names. "
+            "The index is refreshed with an updatedFrom delta when older than "
+            "HOLDED_SEARCH_MAX_AGE_SECONDS."
+        ),
+    )
+    search_parser.add_argument("query", help="Words to search for (each also matches as a prefix)")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum results (default: 20)")
+    search_parser.add_argument("--status", type=int, help="Invoice status")
+    search_parser.add_argument("--date-from", dest="date_from", help="Filter by date from (YYYY-MM-DD)")
+    search_parser.add_argument("--date-to", dest="date_to", help="Filter by date to (YYYY-MM-DD)")
+    search_parser.add_argument("--rebuild", action="store_true", help="Re-index every invoice first")
+
+    sync_parser = subparsers.add_parser("sync", help="Sync the local invoice mirror (HOLDED_MIRROR_PATH)")
+    sync_parser.add_argument("--full", action="store_true", help="Reload every invoice instead of a delta sync")
+
     return parser
 
 
+def _render(result: Any, *, compact: bool) -> str:
+    return jsonio.dumps(result, indent=not compact)
+
+
+async def _stream_items(items: AsyncIterator[Any], out: TextIO, *, compact: bool = False) -> None:
+    # Same output as _render({"items": [...]}), written one item at a time.
+    if compact:
+        out.write('{"items":[')
+        first = True
+        async for item in items:
+            if not first:
+                out.write(",")
+            first = False
+            out.write(jsonio.dumps(item))
+        out.write("]}\n")
+        out.flush()
+        return
+    out.write('{\n  "items": [')
+    first = True
+    async for item in items:
+        out.write("\n" if first else ",\n")
+        first = False
+        out.write("\n".join(f"    {line}" for line in jsonio.dumps(item, indent=True).splitlines()))
+    out.write("]\n}\n" if first else "\n  ]\n}\n")
+    out.flush()
+
+
+async def _run_batch_op(
+    client: HoldedClient,
+    mirror: InvoiceMirror | None,
+    line_no: int,
+    line: str,
+) -> dict[str, Any]:
+    record: dict[str, Any] = {"line": line_no}
+    try:
+        try:
+            op = jsonio.loads(line)
+        except jsonio.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON operation: {exc.msg}") from exc
+        if not isinstance(op, dict):
+            raise ValueError("Operation must be a JSON object")
+        for key in ("id", "op", "document_id"):
+            if key in op:
+                record[key] = op[key]
+        result = await run_operation(client, op)
+        if mirror is not None and op["op"] in WRITE_OPERATIONS:
+            if isinstance(op.get("document_id"), str):
+                mirror.discard(op["document_id"])
+            mirror.mark_stale()
+        record.update(ok=True, result=result)
+    except (HoldedAPIError, ValueError) as exc:
+        record.update(ok=False, error=error_payload(exc))
+    return record
+
+
+async def _run_batch(
+    client: HoldedClient,
+    mirror: InvoiceMirror | None,
+    source: TextIO,
+    out: TextIO,
+    *,
+    parallelism: int,
+) -> int:
+    # Keeps at most `parallelism` operations in flight and reads input only as slots
+    # free up, so memory does not grow with the size of the batch.
+    semaphore = asyncio.Semaphore(max(1, parallelism))
+    pending: set[asyncio.Task[None]] = set()
+    failures = 0
+
+    async def run(line_no: int, line: str) -> None:
+        nonlocal failures
+        try:
+            record = await _run_batch_op(client, mirror, line_no, line)
+            if not record["ok"]:
+                failures += 1
+            out.write(jsonio.dumps(record) + "\n")
+            out.flush()
+        finally:
+            semaphore.release()
+
+    line_no = 0
+    while True:
+        line = await asyncio.to_thread(source.readline)
+        if not line:
+            break
+        line_no += 1
+        if not line.strip():
+            continue
+        await semaphore.acquire()
+        task = asyncio.create_task(run(line_no, line))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+    return failures
+
+
+def _load_settings() -> Settings:
+    from pydantic import ValidationError
+
+    from .config import Settings
+
+    try:
+        settings = Settings()
+    except ValidationError as exc:
+        raise _SettingsError(str(exc)) from exc
+    if not settings.holded_api_key:
+        raise _SettingsError("HOLDED_API_KEY is not set")
+    return settings
+
+
 async def _run_command(args: argparse.Namespace) -> Any:
-    settings = Settings()
+    settings = _load_settings()
+    if args.timings:
+        settings = settings.model_copy(update={"holded_timings": True})
+    from .holded_client import HoldedClient
+
     client = HoldedClient(settings)
+    mirror = None
+    if settings.holded_mirror_path and not getattr(args, "live", False):
+        from .mirror import InvoiceMirror
+
+        mirror = InvoiceMirror(
+            settings.holded_mirror_path,
+            max_age_seconds=settings.holded_mirror_max_age_seconds,
+        )
     try:
-        if args.command == "list":
-            return await list_invoices(
+        with collect_timings() as timings:
+            try:
+                result = await _dispatch(args, settings, client, mirror)
+            finally:
+                if args.timings:
+                    _print_timings(timings, compact=args.compact)
+        if mirror is not None and args.command in WRITE_OPERATIONS:
+            document_id = getattr(args, "document_id", None)
+            if document_id is not None:
+                mirror.discard(document_id)
+            mirror.mark_stale()
+        return result
+    finally:
+        if mirror is not None:
+            mirror.close()
+        await client.aclose()
+
+
+async def _dispatch(
+    args: argparse.Namespace,
+    settings: Settings,
+    client: HoldedClient,
+    mirror: InvoiceMirror | None,
+) -> Any:
+    if args.command == "aggregate":
+        if mirror is not None and mirror.supports(
+            current=args.current, updated_from=args.updated_from, updated_to=args.updated_to
+        ):
+            await mirror.refresh(client)
+            items: Any = mirror.query(status=args.status, date_from=args.date_from, date_to=args.date_to)
+        else:
+            items = iter_invoices(
                 client,
                 status=args.status,
                 current=args.current,
@@ -111,51 +488,195 @@ async def _run_command(args: argparse.Namespace) -> Any:
                 date_to=args.date_to,
                 updated_from=args.updated_from,
                 updated_to=args.updated_to,
-                sort=args.sort,
-                order=args.order,
+                prefetch=args.prefetch,
+            )
+        return await aggregate_invoices(items, args.group_by)
+    if args.command == "export":
+        from .export import export_invoices
+
+        summary = await export_invoices(
+            client,
+            args.output,
+            fmt=args.fmt,
+            lines=args.lines,
+            fields=args.fields,
+            filters={
+                "status": args.status,
+                "current": args.current,
+                "date_from": args.date_from,
+                "date_to": args.date_to,
+                "updated_from": args.updated_from,
+                "updated_to": args.updated_to,
+            },
+            resume=args.resume,
+            page_size=args.page_size,
+            prefetch=args.prefetch,
+            chunk_rows=args.chunk_rows,
+        )
+        # With --output - stdout carries the data; the summary would corrupt it.
+        return None if args.output == "-" else summary
+    if args.command == "search":
+        if not settings.holded_search_index_path:
+            raise ValueError("HOLDED_SEARCH_INDEX_PATH is not set")
+        from .search import SearchIndex
+
+        index = SearchIndex(
+            settings.holded_search_index_path,
+            max_age_seconds=settings.holded_search_max_age_seconds,
+            mirror=mirror,
+        )
+        try:
+            if args.rebuild:
+                await index.sync(client, full=True)
+            else:
+                await index.refresh(client)
+            return index.search(
+                args.query,
                 limit=args.limit,
-                offset=args.offset,
+                status=args.status,
+                date_from=args.date_from,
+                date_to=args.date_to,
             )
-        if args.command == "get":
-            return await get_invoice(client, args.document_id)
+        finally:
+            index.close()
+    if args.command == "sync":
+        if mirror is None:
+            raise ValueError("HOLDED_MIRROR_PATH is not set")
+        return await mirror.sync(client, full=args.full)
+    if args.command == "pdf-export":
+        if args.document_ids and (args.date_from or args.date_to):
+            raise ValueError("Pass either document ids or --date-from/--date-to, not both")
+        if not args.document_ids and not (args.date_from or args.date_to):
+            raise ValueError("Pass document ids or a --date-from/--date-to range")
+        from .pdf_export import export_pdfs, invoices_in_range
+
+        documents = (
+            [(doc_id, doc_id) for doc_id in args.document_ids]
+            if args.document_ids
+            else invoices_in_range(client, date_from=args.date_from, date_to=args.date_to)
+        )
+        summary = await export_pdfs(
+            client,
+            documents,
+            output_dir=args.output_dir,
+            zip_path=args.zip_path,
+            concurrency=args.concurrency or settings.holded_bulk_concurrency,
+        )
+        if summary["failed"]:
+            print(_render(summary, compact=args.compact))
+            raise ValueError(f"{len(summary['failed'])} PDF(s) failed to export")
+        return summary
+    if args.command == "batch":
+        parallelism = args.parallelism or settings.holded_bulk_concurrency
+        if args.input == "-":
+            failures = await _run_batch(client, mirror, sys.stdin, sys.stdout, parallelism=parallelism)
+        else:
+            with open(args.input, "r", encoding="utf-8") as handle:
+                failures = await _run_batch(client, mirror, handle, sys.stdout, parallelism=parallelism)
+        if failures:
+            raise ValueError(f"{failures} batch operation(s) failed")
+        return None
+    if (
+        args.command == "list"
+        and mirror is not None
+        and mirror.supports(
+            current=args.current,
+            updated_from=args.updated_from,
+            updated_to=args.updated_to,
+            sort=args.sort,
+            order=args.order,
+        )
+    ):
+        await mirror.refresh(client)
+        items = mirror.query(
+            status=args.status,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            limit=None if args.all else args.limit,
+            offset=args.offset,
+        )
+        items = project_items(items, compile_fields(args.fields))
+        await _stream_items(iter_async(items), sys.stdout, compact=args.compact)
+        return None
+    if args.command == "get" and mirror is not None:
+        await mirror.refresh(client)
+        doc = mirror.get(args.document_id)
+        if doc is not None:
+            return project(doc, compile_fields(args.fields))
+    if args.command == "list" and args.all:
+        items = iter_invoices(
+            client,
+            status=args.status,
+            current=args.current,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            updated_from=args.updated_from,
+            updated_to=args.updated_to,
+            sort=args.sort,
+            order=args.order,
+            page_size=args.limit or DEFAULT_PAGE_SIZE,
+            offset=args.offset,
+            prefetch=args.prefetch,
+            fields=args.fields,
+        )
+        await _stream_items(items, sys.stdout, compact=args.compact)
+        return None
+    if args.command == "list":
+        return await list_invoices(
+            client,
+            status=args.status,
+            current=args.current,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            updated_from=args.updated_from,
+            updated_to=args.updated_to,
+            sort=args.sort,
+            order=args.order,
+            limit=args.limit,
+            offset=args.offset,
+            fields=args.fields,
+        )
+    if args.command == "get":
+        return await get_invoice(client, args.document_id, fields=args.fields)
+    if args.command in ("create", "update"):
+        validation = args.validation or settings.holded_payload_validation
+        payload = _load_json(args.payload, invoice=args.command, validation=validation)
+        # Already validated by _load_json.
         if args.command == "create":
-            payload = _load_json(args.payload)
-            if not isinstance(payload, dict):
-                raise ValueError("Payload must be a JSON object")
-            return await create_invoice(client, payload)
-        if args.command == "update":
-            payload = _load_json(args.payload)
-            if not isinstance(payload, dict):
-                raise ValueError("Payload must be a JSON object")
-            return await update_invoice(client, args.document_id, payload)
-        if args.command == "approve":
-            return await approve_invoice(client, args.document_id)
-        if args.command == "delete":
-            return await delete_invoice(client, args.document_id)
-        if args.command == "pay":
-            return await pay_invoice(
-                client,
-                args.document_id,
-                date=args.date,
-                amount=args.amount,
-                treasury=args.treasury,
-                desc=args.desc,
-            )
-        if args.command == "send":
-            return await send_invoice(
-                client,
-                args.document_id,
-                emails=args.emails,
-                subject=args.subject,
-                message=args.message,
-                mail_template_id=args.mail_template_id,
-                doc_ids=args.doc_ids,
-            )
-        if args.command == "pdf":
-            return await invoice_pdf(client, args.document_id)
-        raise ValueError(f"Unknown command: {args.command}")
-    finally:
-        await client.aclose()
+            return await create_invoice(client, payload, validation="off")
+        return await update_invoice(client, args.document_id, payload, validation="off")
+    if args.command == "approve":
+        return await approve_invoice(client, args.document_id)
+    if args.command == "delete":
+        return await delete_invoice(client, args.document_id)
+    if args.command == "pay":
+        return await pay_invoice(
+            client,
+            args.document_id,
+            date=args.date,
+            amount=args.amount,
+            treasury=args.treasury,
+            desc=args.desc,
+        )
+    if args.command == "send":
+        return await send_invoice(
+            client,
+            args.document_id,
+            emails=args.emails,
+            subject=args.subject,
+            message=args.message,
+            mail_template_id=args.mail_template_id,
+            doc_ids=args.doc_ids,
+        )
+    if args.command == "pdf":
+        return await invoice_pdf(client, args.document_id)
+    raise ValueError(f"Unknown command: {args.command}")
+
+
+def _print_timings(timings: list[RequestTiming], *, compact: bool) -> None:
+    total = sum(t.total or 0.0 for t in timings)
+    report = {"requests": [t.to_dict() for t in timings], "count": len(timings), "totalMs": round(total * 1000, 2)}
+    print(_render({"timings": report}, compact=compact), file=sys.stderr)
 
 
 def _print_error(error: Exception) -> None:
@@ -167,6 +688,8 @@ def _print_error(error: Exception) -> None:
             lines.append(f"request: {error.method} {error.url}")
         if error.response_text:
             lines.append(f"response: {error.response_text}")
+        if error.timing is not None:
+            lines.append(f"timing: {jsonio.dumps(error.timing)}")
         print("\n".join(lines), file=sys.stderr)
         return
     print(str(error), file=sys.stderr)
@@ -177,14 +700,15 @@ def main() -> None:
     args = parser.parse_args()
     try:
         result = asyncio.run(_run_command(args))
-    except ValidationError as exc:
+    except _SettingsError as exc:
         _print_error(exc)
         sys.exit(2)
     except (HoldedAPIError, ValueError) as exc:
         _print_error(exc)
         sys.exit(1)
 
-    print(json.dumps(result, indent=2))
+    if result is not None:
+        print(_render(result, compact=args.compact))
 
 
 if __name__ == "__main__":
@@ -1,16 +1,151 @@
 from __future__ import annotations
 
-from pydantic import Field
-from pydantic_settings import BaseSettings, SettingsConfigDict
+import os
+from typing import Any, Literal
 
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
-class Settings(BaseSettings):
-    model_config = SettingsConfigDict(env_prefix="", extra="ignore")
 
-    holded_api_key: str = Field(validation_alias="HOLDED_API_KEY")
+class Settings(BaseModel):
+    """
+    Runtime settings, read from HOLDED_* environment variables.
+
+    Every field is a scalar, so env values go through pydantic's regular (lax) validation
+    as strings; this avoids importing pydantic-settings on the CLI startup path.
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    # Optional on a multi-tenant server (HOLDED_TENANT_HEADER), where requests carry their own key.
+    holded_api_key: str | None = Field(default=None, validation_alias="HOLDED_API_KEY")
     holded_base_url: str = Field(
         default="https://api.holded.com/api/invoicing/v1",
         validation_alias="HOLDED_BASE_URL",
     )
     holded_timeout_seconds: float = Field(default=20.0, validation_alias="HOLDED_TIMEOUT_SECONDS")
+    # Per-phase timeouts; unset ones fall back to holded_timeout_seconds.
+    holded_connect_timeout_seconds: float | None = Field(
+        default=None,
+        validation_alias="HOLDED_CONNECT_TIMEOUT_SECONDS",
+    )
+    holded_read_timeout_seconds: float | None = Field(
+        default=None,
+        validation_alias="HOLDED_READ_TIMEOUT_SECONDS",
+    )
+    holded_write_timeout_seconds: float | None = Field(
+        default=None,
+        validation_alias="HOLDED_WRITE_TIMEOUT_SECONDS",
+    )
+    holded_pool_timeout_seconds: float | None = Field(
+        default=None,
+        validation_alias="HOLDED_POOL_TIMEOUT_SECONDS",
+    )
+    holded_max_connections: int = Field(default=20, validation_alias="HOLDED_MAX_CONNECTIONS")
+    holded_max_keepalive_connections: int = Field(
+        default=10,
+        validation_alias="HOLDED_MAX_KEEPALIVE_CONNECTIONS",
+    )
+    holded_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        validation_alias="HOLDED_KEEPALIVE_EXPIRY_SECONDS",
+    )
+    holded_http2: bool = Field(default=False, validation_alias="HOLDED_HTTP2")
+    holded_prewarm_connections: int = Field(default=1, validation_alias="HOLDED_PREWARM_CONNECTIONS")
+
+    holded_mirror_path: str | None = Field(default=None, validation_alias="HOLDED_MIRROR_PATH")
+    holded_mirror_max_age_seconds: float = Field(
+        default=300.0,
+        validation_alias="HOLDED_MIRROR_MAX_AGE_SECONDS",
+    )
+
+    # Text search index (holded_invoices_search); in memory unless a path is set.
+    holded_search_index_path: str | None = Field(default=None, validation_alias="HOLDED_SEARCH_INDEX_PATH")
+    holded_search_max_age_seconds: float = Field(
+        default=300.0,
+        validation_alias="HOLDED_SEARCH_MAX_AGE_SECONDS",
+    )
+
+    holded_cache_max_entries: int = Field(default=512, validation_alias="HOLDED_CACHE_MAX_ENTRIES")
+    holded_cache_ttl_seconds: float = Field(default=60.0, validation_alias="HOLDED_CACHE_TTL_SECONDS")
+    holded_cache_pdf: bool = Field(default=False, validation_alias="HOLDED_CACHE_PDF")
+
+    holded_rate_limit_per_second: float = Field(default=0.0, validation_alias="HOLDED_RATE_LIMIT_PER_SECOND")
+    holded_rate_limit_burst: int = Field(default=10, validation_alias="HOLDED_RATE_LIMIT_BURST")
+    holded_max_retries: int = Field(default=3, validation_alias="HOLDED_MAX_RETRIES")
+    holded_retry_backoff_seconds: float = Field(default=0.5, validation_alias="HOLDED_RETRY_BACKOFF_SECONDS")
+    holded_retry_max_backoff_seconds: float = Field(
+        default=30.0,
+        validation_alias="HOLDED_RETRY_MAX_BACKOFF_SECONDS",
+    )
+
+    holded_coalesce_gets: bool = Field(default=True, validation_alias="HOLDED_COALESCE_GETS")
+
+    # Hedged GETs: a duplicate is sent once a GET outlives this percentile of recent ones.
+    holded_hedge_gets: bool = Field(default=False, validation_alias="HOLDED_HEDGE_GETS")
+    holded_hedge_percentile: float = Field(default=95.0, validation_alias="HOLDED_HEDGE_PERCENTILE")
+    holded_hedge_min_delay_seconds: float = Field(
+        default=0.1,
+        validation_alias="HOLDED_HEDGE_MIN_DELAY_SECONDS",
+    )
+    holded_hedge_max_delay_seconds: float = Field(
+        default=2.0,
+        validation_alias="HOLDED_HEDGE_MAX_DELAY_SECONDS",
+    )
+    # Circuit breaker; 0 consecutive failures disables it.
+    holded_breaker_failures: int = Field(default=0, validation_alias="HOLDED_BREAKER_FAILURES")
+    holded_breaker_reset_seconds: float = Field(default=30.0, validation_alias="HOLDED_BREAKER_RESET_SECONDS")
+
+    # Per-request phase timings (DNS/connect, TLS, TTFB, download, decode).
+    holded_timings: bool = Field(default=False, validation_alias="HOLDED_TIMINGS")
+    holded_slow_request_seconds: float = Field(default=0.0, validation_alias="HOLDED_SLOW_REQUEST_SECONDS")
+    holded_slow_request_log: str | None = Field(default=None, validation_alias="HOLDED_SLOW_REQUEST_LOG")
+
+    # State shared by worker processes (token bucket, invoice cache): `sqlite:///path` or a path.
+    holded_shared_state: str | None = Field(default=None, validation_alias="HOLDED_SHARED_STATE")
+
+    holded_bulk_concurrency: int = Field(default=8, validation_alias="HOLDED_BULK_CONCURRENCY")
+
+    # Local check of create/update payloads before they are sent to Holded (opt-in).
+    holded_payload_validation: Literal["strict", "lenient", "off"] = Field(
+        default="off",
+        validation_alias="HOLDED_PAYLOAD_VALIDATION",
+    )
+
+    # Journal for background approve/pay/send (background=true); disabled when unset.
+    holded_jobs_path: str | None = Field(default=None, validation_alias="HOLDED_JOBS_PATH")
+    holded_jobs_concurrency: int = Field(default=4, validation_alias="HOLDED_JOBS_CONCURRENCY")
+    holded_jobs_max_attempts: int = Field(default=5, validation_alias="HOLDED_JOBS_MAX_ATTEMPTS")
+
+    holded_export_dir: str | None = Field(default=None, validation_alias="HOLDED_EXPORT_DIR")
+
+    # Per-request API keys: the HTTP header to read them from (disabled when unset).
+    holded_tenant_header: str | None = Field(default=None, validation_alias="HOLDED_TENANT_HEADER")
+    holded_tenant_max_clients: int = Field(default=32, validation_alias="HOLDED_TENANT_MAX_CLIENTS")
+    holded_tenant_idle_seconds: float = Field(default=600.0, validation_alias="HOLDED_TENANT_IDLE_SECONDS")
+
+    # Admission control for POST /mcp; 0 disables a cap.
+    holded_max_concurrent_requests: int = Field(default=0, validation_alias="HOLDED_MAX_CONCURRENT_REQUESTS")
+    holded_max_concurrent_per_client: int = Field(
+        default=0,
+        validation_alias="HOLDED_MAX_CONCURRENT_PER_CLIENT",
+    )
+    holded_admission_queue_size: int = Field(default=100, validation_alias="HOLDED_ADMISSION_QUEUE_SIZE")
+    holded_admission_queue_timeout_seconds: float = Field(
+        default=5.0,
+        validation_alias="HOLDED_ADMISSION_QUEUE_TIMEOUT_SECONDS",
+    )
 
+    @model_validator(mode="before")
+    @classmethod
+    def _read_environment(cls, data: Any) -> Any:
+        # Explicit values win over the environment, as with pydantic-settings. Variable
+        # names are matched case-insensitively.
+        if not isinstance(data, dict):
+            return data
+        env = {k.upper(): v for k, v in os.environ.items()}
+        values = {}
+        for field in cls.model_fields.values():
+            alias = field.validation_alias
+            if isinstance(alias, str) and alias.upper() in env:
+                values[alias] = env[alias.upper()]
+        return {**values, **data}
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 
 class HoldedAPIError(RuntimeError):
     def __init__(
@@ -10,10 +12,21 @@ class HoldedAPIError(RuntimeError):
         response_text: str | None = None,
         method: str | None = None,
         url: str | None = None,
+        timing: dict[str, Any] | None = None,
     ) -> None:
         super().__init__(message)
         self.status_code = status_code
         self.response_text = response_text
         self.method = method
         self.url = url
+        self.timing = timing
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "message": str(self),
+            "statusCode": self.status_code,
+            "method": self.method,
+            "url": self.url,
+            "responseText": self.response_text,
+            "timing": self.timing,
+        }
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import datetime as dt
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Iterator, Sequence, TextIO
+
+from . import jsonio
+from .invoices import DEFAULT_PAGE_SIZE, DEFAULT_PREFETCH, VIEWS, compile_fields, iter_invoice_pages, project
+
+if TYPE_CHECKING:
+    from .holded_client import HoldedClient
+
+FORMATS = ("csv", "ndjson", "parquet")
+DEFAULT_CHUNK_ROWS = 5000
+
+INVOICE_COLUMNS = (
+    "id",
+    "docNumber",
+    "contact",
+    "contactName",
+    "date",
+    "dueDate",
+    "status",
+    "currency",
+    "subtotal",
+    "tax",
+    "total",
+    "paymentsPending",
+)
+# Line item columns (`--lines`); `line.<key>` reads `<key>` from each entry of `products`.
+LINE_COLUMNS = ("line.name", "line.desc", "line.sku", "line.units", "line.price", "line.discount", "line.tax")
+
+# Fixed column types keep every chunk (and every Parquet part) on the same schema.
+_INT_COLUMNS = frozenset({"date", "dueDate", "status"})
+_FLOAT_COLUMNS = frozenset(
+    {"subtotal", "tax", "total", "paymentsPending", "line.units", "line.price", "line.discount", "line.tax"}
+)
+
+
+def export_columns(fields: Sequence[str] | None, *, lines: bool) -> list[str]:
+    columns = [path for entry in fields for path in VIEWS.get(entry, (entry,))] if fields else list(INVOICE_COLUMNS)
+    columns = list(dict.fromkeys(columns))
+    has_lines = any(c.startswith("line.") for c in columns)
+    if has_lines and not lines:
+        raise ValueError("line.* columns need --lines")
+    if lines and not has_lines:
+        columns.extend(LINE_COLUMNS)
+    return columns
+
+
+def _lookup(doc: Any, path: str) -> Any:
+    """Value at a dotted path; through a list (`products.name`) it is the list of values."""
+    parts = path.split(".")
+    for i, part in enumerate(parts):
+        if isinstance(doc, list):
+            rest = ".".join(parts[i:])
+            values = [v for v in (_lookup(item, rest) for item in doc) if v is not None]
+            return values or None
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def _cell(column: str, value: Any) -> Any:
+    if value is None:
+        return None
+    numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if column in _INT_COLUMNS:
+        return int(value) if numeric else None
+    if column in _FLOAT_COLUMNS:
+        return float(value) if numeric else None
+    return value if isinstance(value, str) else jsonio.dumps(value)
+
+
+def invoice_rows(doc: dict[str, Any], columns: Sequence[str], *, lines: bool) -> Iterator[dict[str, Any]]:
+    """Flat rows for one invoice: one row, or one per line item with `lines`."""
+    row = {c: _cell(c, _lookup(doc, c)) for c in columns if not c.startswith("line.")}
+    if not lines:
+        yield row
+        return
+    line_columns = [c for c in columns if c.startswith("line.")]
+    products = doc.get("products")
+    products = [p for p in products if isinstance(p, dict)] if isinstance(products, list) else []
+    if not products:
+        yield {**row, **dict.fromkeys(line_columns)}
+    for product in products:
+        yield {**row, **{c: _cell(c, _lookup(product, c[len("line.") :])) for c in line_columns}}
+
+
+class _TextSink:
+    """CSV or NDJSON appended to one file (or stdout); `position` is the checkpointed size."""
+
+    def __init__(self, path: str, fmt: str, columns: Sequence[str], *, position: int) -> None:
+        self.fmt = fmt
+        self.columns = list(columns)
+        self.parts = 0
+        if path == "-":
+            self._handle: TextIO = sys.stdout
+            self._owned = False
+        else:
+            if position and not _has_prefix(path, position):
+                raise ValueError(f"{path} is missing or shorter than its checkpoint")
+            self._handle = open(path, "r+" if position else "w", encoding="utf-8", newline="")
+            self._owned = True
+            # Drop anything written after the last checkpoint by an interrupted run.
+            self._handle.seek(position)
+            self._handle.truncate()
+        self.position = position
+        self._writer = csv.DictWriter(self._handle, fieldnames=self.columns) if fmt == "csv" else None
+        if self._writer is not None and position == 0:
+            self._writer.writeheader()
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        if self._writer is not None:
+            self._writer.writerows(rows)
+        else:
+            self._handle.writelines(jsonio.dumps(row) + "\n" for row in rows)
+        self._handle.flush()
+        if self._owned:
+            os.fsync(self._handle.fileno())
+            self.position = self._handle.tell()
+
+    def close(self) -> None:
+        if self._owned:
+            self._handle.close()
+
+
+class _ParquetSink:
+    """One Parquet file per chunk (`part-00000.parquet`, ...) in a directory; `parts` is checkpointed."""
+
+    def __init__(self, path: str, columns: Sequence[str], *, parts: int) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ValueError("Parquet export needs pyarrow (uv sync --extra parquet)") from exc
+        self._pq = pq
+        self._pa = pa
+        self.path = path
+        self.parts = parts
+        self.position = 0
+        self._schema = pa.schema(
+            [
+                (c, pa.int64() if c in _INT_COLUMNS else pa.float64() if c in _FLOAT_COLUMNS else pa.string())
+                for c in columns
+            ]
+        )
+        os.makedirs(path, exist_ok=True)
+        # Parts past the checkpoint belong to an interrupted or earlier export.
+        for name in os.listdir(path):
+            if name.startswith("part-") and name.endswith(".parquet") and name[5:10].isdigit():
+                if int(name[5:10]) >= parts:
+                    os.remove(os.path.join(path, name))
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        table = self._pa.Table.from_pylist(rows, schema=self._schema)
+        name = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        tmp = os.path.join(self.path, f".part-{self.parts:05d}.tmp")
+        self._pq.write_table(table, tmp)
+        os.replace(tmp, name)
+        self.parts += 1
+
+    def close(self) -> None:
+        pass
+
+
+def _has_prefix(path: str, position: int) -> bool:
+    try:
+        return os.path.getsize(path) >= position
+    except OSError:
+        return False
+
+
+def _intact(output: str, fmt: str, state: dict[str, Any]) -> bool:
+    """Whether everything the checkpoint says was written is still there."""
+    if fmt == "parquet":
+        return all(os.path.exists(os.path.join(output, f"part-{n:05d}.parquet")) for n in range(state["parts"]))
+    return _has_prefix(output, state["position"])
+
+
+def state_path(output: str) -> str:
+    return f"{output.rstrip(os.sep)}.state.json"
+
+
+def _load_state(path: str) -> dict[str, Any] | None:
+    try:
+        with open(path, "rb") as handle:
+            return jsonio.loads(handle.read())
+    except FileNotFoundError:
+        return None
+
+
+def _save_state(path: str, state: dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as handle:
+        handle.write(jsonio.dumps(state, indent=True))
+    os.replace(tmp, path)
+
+
+async def export_invoices(
+    client: HoldedClient,
+    output: str,
+    *,
+    fmt: str,
+    lines: bool = False,
+    fields: Sequence[str] | None = None,
+    filters: dict[str, Any] | None = None,
+    resume: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: int = DEFAULT_PREFETCH,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> dict[str, Any]:
+    """
+    Stream invoices page by page into a CSV file, an NDJSON file or a Parquet directory.
+
+    Rows are buffered up to `chunk_rows` (always whole pages) and then written, after
+    which a checkpoint (`<output>.state.json`) records the upstream offset. With `resume`,
+    an interrupted export continues from that offset, and a finished one runs again
+    with `updatedFrom` set to the day it started, appending only updated invoices.
+    Memory is bounded by `chunk_rows` plus `prefetch` pages, whatever the volume.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt} (use {', '.join(FORMATS)})")
+    if output == "-" and (fmt == "parquet" or resume):
+        raise ValueError("Parquet output and --resume need a file path, not '-'")
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+    columns = export_columns(fields, lines=lines)
+    # NDJSON without --lines keeps whole (or projected) invoices instead of flat rows.
+    nested = fmt == "ndjson" and not lines
+    projection = compile_fields(fields) if nested else None
+    query = {"format": fmt, "lines": lines, "columns": None if nested else columns, "filters": filters}
+
+    checkpoint = state_path(output) if output != "-" else None
+    state = _load_state(checkpoint) if resume and checkpoint else None
+    if state is not None and state.get("query") != query:
+        raise ValueError(f"{checkpoint} was written by an export with different options")
+    if state is not None and not _intact(output, fmt, state):
+        # The output was deleted or truncated since: appending to it would leave a gap.
+        state = None
+    today = dt.datetime.now(dt.timezone.utc).date().isoformat()
+    if state is None:
+        mode, offset, updated_from = "full", 0, filters.get("updated_from")
+        state = {"query": query, "highWater": today, "rows": 0, "invoices": 0, "position": 0, "parts": 0}
+    elif state["complete"]:
+        # updatedFrom has day granularity, so the delta re-reads the last export's final day.
+        mode, offset, updated_from = "delta", 0, state["highWater"]
+        state["highWater"] = today
+    else:
+        mode, offset, updated_from = "resume", state["offset"], state["updatedFrom"]
+
+    sink: _TextSink | _ParquetSink
+    if fmt == "parquet":
+        sink = _ParquetSink(output, columns, parts=state["parts"])
+    else:
+        sink = _TextSink(output, fmt, columns, position=state["position"])
+    invoices = rows = 0
+    buffer: list[dict[str, Any]] = []
+
+    async def flush(next_offset: int, *, complete: bool) -> None:
+        nonlocal rows
+        if buffer:
+            await asyncio.to_thread(sink.write, buffer)
+            rows += len(buffer)
+            state["rows"] += len(buffer)
+            buffer.clear()
+        state.update(
+            offset=next_offset,
+            updatedFrom=updated_from,
+            complete=complete,
+            position=sink.position,
+            parts=sink.parts,
+        )
+        if checkpoint is not None:
+            _save_state(checkpoint, state)
+
+    try:
+        pages = iter_invoice_pages(
+            client,
+            status=filters.get("status"),
+            current=filters.get("current"),
+            date_from=filters.get("date_from"),
+            date_to=filters.get("date_to"),
+            updated_from=updated_from,
+            updated_to=filters.get("updated_to"),
+            page_size=page_size,
+            offset=offset,
+            prefetch=prefetch,
+        )
+        async for next_offset, items in pages:
+            for doc in items:
+                if nested:
+                    buffer.append(project(doc, projection))
+                else:
+                    buffer.extend(invoice_rows(doc, columns, lines=lines))
+            invoices += len(items)
+            state["invoices"] += len(items)
+            offset = next_offset
+            if len(buffer) >= chunk_rows:
+                await flush(offset, complete=False)
+        await flush(offset, complete=True)
+    finally:
+        sink.close()
+
+    return {
+        "format": fmt,
+        "output": os.path.abspath(output) if output != "-" else "-",
+        "mode": mode,
+        "updatedFrom": updated_from,
+        "invoices": invoices,
+        "rows": rows,
+        "totalRows": state["rows"],
+        "state": checkpoint,
+    }
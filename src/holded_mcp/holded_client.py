@@ -1,21 +1,103 @@
 from __future__ import annotations
 
-import json
-from typing import Any
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
 import httpx
 
-from .config import Settings
+from . import jsonio, metrics
 from .errors import HoldedAPIError
+from .ratelimit import TokenBucket, backoff_delay, parse_retry_after
+from .resilience import CircuitBreaker, LatencyWindow
+from .timings import RequestTiming, current_collector
+
+if TYPE_CHECKING:
+    from .config import Settings
+    from .shared import SharedTokenBucket
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("holded_mcp.slow")
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Below this many samples the hedge delay is HOLDED_HEDGE_MAX_DELAY_SECONDS.
+_HEDGE_MIN_SAMPLES = 20
+
+
+def _or(value: float | None, default: float) -> float:
+    return default if value is None else value
 
 
 class HoldedClient:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+        tenant: str | None = None,
+    ) -> None:
+        if not settings.holded_api_key:
+            raise ValueError("HOLDED_API_KEY is not set")
         self._settings = settings
+        self.tenant = tenant
+        self.payload_validation = settings.holded_payload_validation
+        self._limiter: TokenBucket | SharedTokenBucket
+        if settings.holded_shared_state:
+            from .shared import SharedTokenBucket, open_store
+
+            # One bucket per API key: Holded's quota is per key, whichever worker sends.
+            self._limiter = SharedTokenBucket(
+                open_store(settings.holded_shared_state),
+                "ratelimit:" + hashlib.sha256(settings.holded_api_key.encode()).hexdigest()[:12],
+                rate=settings.holded_rate_limit_per_second,
+                burst=settings.holded_rate_limit_burst,
+            )
+        else:
+            self._limiter = TokenBucket(
+                rate=settings.holded_rate_limit_per_second,
+                burst=settings.holded_rate_limit_burst,
+            )
+        self.retries = 0
+        self.throttled = 0
+        self.coalesced = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies = LatencyWindow()
+        self._breaker = CircuitBreaker(
+            threshold=settings.holded_breaker_failures,
+            reset_seconds=settings.holded_breaker_reset_seconds,
+        )
+        # Phase timings are traced when asked for or when a slow-request threshold is set.
+        self._tracing = settings.holded_timings or settings.holded_slow_request_seconds > 0
+        self.recent_timings: deque[RequestTiming] = deque(maxlen=20)
+        self.slow_requests = 0
+        self._upstream_in_flight = 0
+        self._inflight: dict[tuple[Any, ...], asyncio.Task[Any]] = {}
+        default_timeout = settings.holded_timeout_seconds
         self._client = httpx.AsyncClient(
             base_url=settings.holded_base_url.rstrip("/"),
             follow_redirects=True,
-            timeout=httpx.Timeout(settings.holded_timeout_seconds),
+            transport=transport,
+            http2=settings.holded_http2,
+            limits=httpx.Limits(
+                max_connections=settings.holded_max_connections,
+                max_keepalive_connections=settings.holded_max_keepalive_connections,
+                keepalive_expiry=settings.holded_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(
+                default_timeout,
+                connect=_or(settings.holded_connect_timeout_seconds, default_timeout),
+                read=_or(settings.holded_read_timeout_seconds, default_timeout),
+                write=_or(settings.holded_write_timeout_seconds, default_timeout),
+                pool=_or(settings.holded_pool_timeout_seconds, default_timeout),
+            ),
             headers={
                 "Content-Type": "application/json",
                 "key": settings.holded_api_key,
@@ -25,6 +107,284 @@ class HoldedClient:
     async def aclose(self) -> None:
         await self._client.aclose()
 
+    @property
+    def in_flight(self) -> int:
+        return self._upstream_in_flight
+
+    async def warmup(self, connections: int = 1) -> None:
+        """
+        Open up to `connections` pooled connections (DNS + TCP + TLS) ahead of the first
+        real call, with an anonymous HEAD on the base URL whose answer is ignored.
+
+        Without the API key it costs the account no rate-limit budget, so it takes no
+        limiter token; it is skipped while the circuit breaker is not closed, and like
+        any request it is counted in the upstream metrics and its network errors count
+        towards the breaker.
+        """
+        if connections < 1 or self._breaker.state != "closed":
+            return
+        if self._settings.holded_http2:
+            connections = 1  # one HTTP/2 connection multiplexes every request
+
+        async def touch() -> None:
+            request = self._client.build_request("HEAD", "/")
+            request.headers.pop("key", None)
+            try:
+                resp = await self._timed_send(request, route="/", stream=False)
+            except httpx.HTTPError as e:
+                logger.debug("Holded connection warmup failed: %s", e)
+            else:
+                await resp.aclose()
+
+        await asyncio.gather(*(touch() for _ in range(min(connections, self._settings.holded_max_connections))))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rateLimiter": self._limiter.stats(),
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "hedging": {
+                "enabled": self._settings.holded_hedge_gets,
+                "delaySeconds": round(self._hedge_delay(), 3),
+                "sent": self.hedged,
+                "won": self.hedge_wins,
+            },
+            "circuitBreaker": self._breaker.stats(),
+            "timings": {
+                "enabled": self._tracing,
+                "slowRequests": self.slow_requests,
+                "recent": [t.to_dict() for t in self.recent_timings],
+            },
+        }
+
+    def _hedge_delay(self) -> float:
+        settings = self._settings
+        observed = None
+        if len(self._latencies) >= _HEDGE_MIN_SAMPLES:
+            observed = self._latencies.percentile(settings.holded_hedge_percentile)
+        if observed is None:
+            return settings.holded_hedge_max_delay_seconds
+        return min(max(observed, settings.holded_hedge_min_delay_seconds), settings.holded_hedge_max_delay_seconds)
+
+    def _record_outcome(self, ok: bool) -> None:
+        was_closed = self._breaker.state == "closed"
+        if ok:
+            self._breaker.record_success()
+        else:
+            self._breaker.record_failure()
+        is_closed = self._breaker.state == "closed"
+        if was_closed != is_closed:
+            metrics.BREAKER_OPEN.inc(1 if was_closed else -1)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None,
+        json_body: Any | None,
+        stream: bool = False,
+    ) -> httpx.Response:
+        # 429 means Holded rejected the request without processing it, so it is retried for
+        # every method; 5xx gateway errors and network failures only for idempotent ones.
+        settings = self._settings
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        hedge = settings.holded_hedge_gets and not stream and method.upper() == "GET"
+        route = metrics.route_template(url)
+        attempt = 0
+        while True:
+            if not self._breaker.allow():
+                metrics.BREAKER_REJECTED.inc()
+                raise HoldedAPIError(
+                    message=(
+                        f"Holded is failing ({self._breaker.failures} consecutive errors); "
+                        f"not calling it for another {self._breaker.retry_in():.0f}s"
+                    ),
+                    method=method.upper(),
+                    url=url,
+                )
+            waited = time.perf_counter()
+            await self._limiter.acquire()
+            timing = None
+            if self._tracing:
+                timing = RequestTiming(
+                    method.upper(),
+                    route,
+                    attempt=attempt,
+                    rate_limit_wait=time.perf_counter() - waited,
+                )
+            try:
+                request = self._client.build_request(
+                    method,
+                    url,
+                    params=params,
+                    content=jsonio.dumpb(json_body) if json_body is not None else None,
+                )
+                if hedge:
+                    resp = await self._hedged_send(request, route=route, timing=timing)
+                else:
+                    resp = await self._timed_send(request, route=route, stream=stream, timing=timing)
+            except httpx.RequestError as e:
+                self._record_timing(timing)
+                if not idempotent or attempt >= settings.holded_max_retries:
+                    raise HoldedAPIError(
+                        message=f"Network error calling Holded: {e}",
+                        timing=timing.to_dict() if timing is not None else None,
+                    ) from e
+                delay = backoff_delay(
+                    attempt,
+                    base=settings.holded_retry_backoff_seconds,
+                    cap=settings.holded_retry_max_backoff_seconds,
+                )
+            else:
+                status = resp.status_code
+                if status not in RETRY_STATUSES or attempt >= settings.holded_max_retries:
+                    return resp
+                if status != 429 and not idempotent:
+                    return resp
+                retry_after = parse_retry_after(resp.headers.get("retry-after"))
+                if retry_after is not None and retry_after > settings.holded_retry_max_backoff_seconds:
+                    return resp
+                delay = (
+                    retry_after
+                    if retry_after is not None
+                    else backoff_delay(
+                        attempt,
+                        base=settings.holded_retry_backoff_seconds,
+                        cap=settings.holded_retry_max_backoff_seconds,
+                    )
+                )
+                self._record_timing(_timing_of(resp))
+                await resp.aclose()
+                if status == 429:
+                    # Hold back every caller sharing this client, not just this request.
+                    self.throttled += 1
+                    await self._limiter.pause(delay)
+                    delay = 0.0
+            attempt += 1
+            self.retries += 1
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _timed_send(
+        self,
+        request: httpx.Request,
+        *,
+        route: str,
+        stream: bool,
+        timing: RequestTiming | None = None,
+    ) -> httpx.Response:
+        method = request.method
+        if timing is not None:
+            request.extensions["trace"] = timing.trace
+        metrics.UPSTREAM_SENT_BYTES.inc(len(request.content), method=method, route=route)
+        self._set_in_flight(+1)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            try:
+                resp = await self._client.send(request, stream=stream)
+            except httpx.RequestError:
+                self._record_outcome(False)
+                raise
+            status = str(resp.status_code)
+            if timing is not None:
+                timing.status = status
+                resp.extensions["holded_timing"] = timing
+            self._record_outcome(resp.status_code < 500)
+            if not stream:
+                metrics.UPSTREAM_RECEIVED_BYTES.inc(len(resp.content), method=method, route=route)
+                if method == "GET" and resp.status_code < 500:
+                    self._latencies.add(time.perf_counter() - started)
+            return resp
+        finally:
+            metrics.UPSTREAM_DURATION.observe(time.perf_counter() - started, method=method, route=route)
+            metrics.UPSTREAM_REQUESTS.inc(method=method, route=route, status=status)
+            if self.tenant is not None:
+                metrics.TENANT_REQUESTS.inc(tenant=self.tenant, status=status)
+            self._set_in_flight(-1)
+
+    async def _hedged_send(
+        self,
+        request: httpx.Request,
+        *,
+        route: str,
+        timing: RequestTiming | None = None,
+    ) -> httpx.Response:
+        # If the GET is still running after the hedge delay, send a duplicate and keep
+        # whichever answers first; the other one is cancelled. Errors only win when both fail.
+        original = asyncio.ensure_future(self._timed_send(request, route=route, stream=False, timing=timing))
+        done, _ = await asyncio.wait({original}, timeout=self._hedge_delay())
+        if done or self._breaker.state != "closed":
+            return await original
+
+        async def duplicate() -> httpx.Response:
+            waited = time.perf_counter()
+            await self._limiter.acquire()
+            copy = self._client.build_request(request.method, request.url)
+            hedge_timing = None
+            if timing is not None:
+                hedge_timing = RequestTiming(
+                    request.method,
+                    route,
+                    attempt=timing.attempt,
+                    rate_limit_wait=time.perf_counter() - waited,
+                )
+                hedge_timing.hedge = True
+            return await self._timed_send(copy, route=route, stream=False, timing=hedge_timing)
+
+        hedge = asyncio.ensure_future(duplicate())
+        self.hedged += 1
+        pending = {original, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (original, hedge):
+                    if task in done and task.exception() is None:
+                        winner = "original" if task is original else "hedge"
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        metrics.UPSTREAM_HEDGES.inc(winner=winner)
+                        return task.result()
+            return original.result()  # both failed: re-raise the original error
+        finally:
+            for task in (original, hedge):
+                if not task.done():
+                    task.cancel()
+                    task.add_done_callback(_discard_result)
+
+    def _record_timing(self, timing: RequestTiming | None) -> None:
+        if timing is None or timing.total is not None:
+            return  # tracing disabled, or already recorded
+        timing.finish()
+        self.recent_timings.append(timing)
+        collector = current_collector()
+        if collector is not None:
+            collector.append(timing)
+        threshold = self._settings.holded_slow_request_seconds
+        if threshold > 0 and timing.total is not None and timing.total >= threshold:
+            self.slow_requests += 1
+            self._log_slow(timing)
+
+    def _log_slow(self, timing: RequestTiming) -> None:
+        record = {"at": round(time.time(), 3), "tenant": self.tenant, **timing.to_dict()}
+        line = jsonio.dumps(record)
+        slow_logger.warning("Slow Holded request: %s", line)
+        path = self._settings.holded_slow_request_log
+        if path:
+            try:
+                with open(os.path.expanduser(path), "a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+            except OSError as e:
+                logger.debug("Could not write the slow-request log: %s", e)
+
+    def _set_in_flight(self, delta: int) -> None:
+        self._upstream_in_flight += delta
+        metrics.UPSTREAM_IN_FLIGHT.inc(delta)
+        metrics.POOL_SATURATION.set(self._upstream_in_flight / max(1, self._settings.holded_max_connections))
+
     async def request(
         self,
         method: str,
@@ -34,34 +394,100 @@ class HoldedClient:
         json_body: Any | None = None,
     ) -> Any:
         url = path if path.startswith("/") else f"/{path}"
-        try:
-            resp = await self._client.request(method, url, params=params, json=json_body)
-        except httpx.RequestError as e:
-            raise HoldedAPIError(message=f"Network error calling Holded: {e}") from e
+        if method.upper() != "GET" or not self._settings.holded_coalesce_gets:
+            return await self._request(method, url, params=params, json_body=json_body)
 
-        if resp.status_code >= 400:
-            text = None
+        # Singleflight: identical concurrent GETs share one upstream request (and its
+        # result or error). Callers receive the same object and must not mutate it.
+        key = (url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request(method, url, params=params, json_body=json_body))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._flight_done(key, t))
+        else:
+            self.coalesced += 1
+        # shield(): a cancelled caller must not cancel the request other callers wait on.
+        return await asyncio.shield(task)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict[str, Any] | None = None,
+    ) -> AsyncIterator[httpx.Response]:
+        """Like `request`, but yields the response with its body unread (for large payloads)."""
+        url = path if path.startswith("/") else f"/{path}"
+        resp = await self._send(method, url, params=params, json_body=None, stream=True)
+        try:
+            if resp.status_code >= 400:
+                await resp.aread()
+                raise self._status_error(method, url, resp)
             try:
-                text = resp.text
-            except Exception:
-                text = None
-            raise HoldedAPIError(
-                message=f"Holded API error ({resp.status_code}) calling {method.upper()} {url}",
-                status_code=resp.status_code,
-                response_text=text,
+                yield resp
+            except (httpx.HTTPError, httpx.StreamError) as e:
+                # The connection broke while the caller was reading the body.
+                raise HoldedAPIError(
+                    message=f"Network error reading the Holded response: {e}",
+                    method=method.upper(),
+                    url=str(resp.request.url),
+                ) from e
+        finally:
+            await resp.aclose()
+            self._record_timing(_timing_of(resp))
+            metrics.UPSTREAM_RECEIVED_BYTES.inc(
+                resp.num_bytes_downloaded,
                 method=method.upper(),
-                url=str(resp.request.url),
+                route=metrics.route_template(url),
             )
 
+    def _status_error(self, method: str, url: str, resp: httpx.Response) -> HoldedAPIError:
+        text = resp.content.decode(resp.encoding or "utf-8", errors="replace")
+        timing = _timing_of(resp)
+        self._record_timing(timing)
+        return HoldedAPIError(
+            message=f"Holded API error ({resp.status_code}) calling {method.upper()} {url}",
+            status_code=resp.status_code,
+            response_text=text,
+            method=method.upper(),
+            url=str(resp.request.url),
+            timing=timing.to_dict() if timing is not None else None,
+        )
+
+    def _flight_done(self, key: tuple[Any, ...], task: asyncio.Task[Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every caller went away
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None,
+        json_body: Any | None,
+    ) -> Any:
+        resp = await self._send(method, url, params=params, json_body=json_body)
+
+        if resp.status_code >= 400:
+            raise self._status_error(method, url, resp)
+
         # Holded API endpoints we use are expected to return JSON. If we receive HTML
         # (e.g. an app page, WAF page, or unexpected redirect target), fail with a
         # clear error instead of returning a string that breaks tool output validation.
+        # The body is already buffered; decode the raw bytes exactly once.
+        body = resp.content
+        timing = _timing_of(resp)
+        decoding = time.perf_counter()
         try:
-            return resp.json()
-        except Exception:
+            result = jsonio.loads(body)
+        except ValueError:
+            self._record_timing(timing)
             content_type = resp.headers.get("content-type", "")
-            raw = resp.text
-            snippet = raw[:800]
+            snippet = body[:800].decode(resp.encoding or "utf-8", errors="replace")
             raise HoldedAPIError(
                 message=(
                     "Holded returned a non-JSON response for an API request. "
@@ -72,4 +498,18 @@ class HoldedClient:
                 response_text=snippet,
                 method=method.upper(),
                 url=str(resp.request.url),
+                timing=timing.to_dict() if timing is not None else None,
             )
+        if timing is not None:
+            timing.phases["decode"] = time.perf_counter() - decoding
+            self._record_timing(timing)
+        return result
+
+
+def _timing_of(resp: httpx.Response) -> RequestTiming | None:
+    return resp.extensions.get("holded_timing")
+
+
+def _discard_result(task: asyncio.Task[Any]) -> None:
+    if not task.cancelled():
+        task.exception()  # a cancelled hedge may still have failed; don't log it as unretrieved
@@ -1,32 +1,135 @@
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
-from typing import Any
+from collections import deque
+from contextlib import AbstractAsyncContextManager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, Iterator, TypeVar
 
-from .holded_client import HoldedClient
+from .errors import HoldedAPIError
 
+if TYPE_CHECKING:
+    import httpx
 
-def _filter_items_by_date(items: list[Any], date_from: str | None, date_to: str | None) -> list[Any]:
-    if date_from is None and date_to is None:
-        return items
+    from .holded_client import HoldedClient
 
-    start = dt.date.fromisoformat(date_from) if date_from is not None else None
-    end = dt.date.fromisoformat(date_to) if date_to is not None else None
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_PREFETCH = 4
 
-    filtered: list[Any] = []
+# Predefined projections; a `fields` entry naming a view expands to its paths.
+VIEWS: dict[str, tuple[str, ...]] = {
+    "summary": ("id", "docNumber", "contact", "contactName", "date", "total", "status"),
+}
+
+Projection = dict[str, Any]
+
+_T = TypeVar("_T")
+
+
+def compile_fields(fields: Iterable[str] | None) -> Projection | None:
+    """
+    Turn dotted paths (`["id", "products.name"]`) into a nested projection tree.
+
+    Returns None when there is nothing to project, so callers can skip the step.
+    """
+    if not fields:
+        return None
+    tree: Projection = {}
+    for entry in fields:
+        for path in VIEWS.get(entry, (entry,)):
+            node = tree
+            parts = [p for p in path.split(".") if p]
+            if not parts:
+                continue
+            for part in parts[:-1]:
+                child = node.get(part, {})
+                if child is None:  # parent already selected whole
+                    break
+                node = node.setdefault(part, child)
+            else:
+                node[parts[-1]] = None
+    return tree or None
+
+
+def project(value: Any, projection: Projection | None) -> Any:
+    """Keep only the projected keys; lists are projected element by element."""
+    if projection is None:
+        return value
+    if isinstance(value, list):
+        return [project(v, projection) for v in value]
+    if not isinstance(value, dict):
+        return value
+    out: dict[str, Any] = {}
+    for key, sub in projection.items():
+        if key in value:
+            out[key] = value[key] if sub is None else project(value[key], sub)
+    return out
+
+
+def project_items(items: Iterable[Any], projection: Projection | None) -> Iterator[Any]:
+    if projection is None:
+        yield from items
+        return
+    for it in items:
+        yield project(it, projection)
+
+
+def _day_start(value: str) -> int:
+    d = dt.date.fromisoformat(value)
+    return int(dt.datetime(d.year, d.month, d.day, tzinfo=dt.timezone.utc).timestamp())
+
+
+def date_bounds(date_from: str | None, date_to: str | None) -> tuple[int | None, int | None]:
+    """Inclusive YYYY-MM-DD bounds as a half-open UTC epoch range `[start, end)`."""
+    start = _day_start(date_from) if date_from is not None else None
+    end = _day_start(date_to) + 86400 if date_to is not None else None
+    return start, end
+
+
+def _filter_items_by_date(items: Iterable[Any], start: int | None, end: int | None) -> Iterator[Any]:
+    if start is None and end is None:
+        yield from items
+        return
     for it in items:
         if not isinstance(it, dict):
             continue
         ts = it.get("date")
         if not isinstance(ts, (int, float)):
             continue
-        d = dt.datetime.utcfromtimestamp(ts).date()
-        if start is not None and d < start:
+        if start is not None and ts < start:
             continue
-        if end is not None and d > end:
+        if end is not None and ts >= end:
             continue
-        filtered.append(it)
-    return filtered
+        yield it
+
+
+def _past_range(page: list[Any], start: int | None, end: int | None, *, descending: bool) -> bool:
+    """For date-sorted pages: whether this page already runs past the requested range."""
+    ts = page[-1].get("date") if page and isinstance(page[-1], dict) else None
+    if not isinstance(ts, (int, float)):
+        return False
+    if descending:
+        return start is not None and ts < start
+    return end is not None and ts >= end
+
+
+def _list_params(**filters: Any) -> dict[str, Any]:
+    params: dict[str, Any] = {}
+    for key, value in filters.items():
+        if value is not None:
+            params[key] = value
+    return params
+
+
+async def _fetch_page(client: HoldedClient, params: dict[str, Any]) -> list[Any]:
+    items = await client.request("GET", "/documents/invoice", params=params)
+    if not isinstance(items, list):
+        raise HoldedAPIError(
+            message="Holded returned an unexpected (non-list) response while paginating invoices.",
+            method="GET",
+            url="/documents/invoice",
+        )
+    return items
 
 
 async def list_invoices(
@@ -42,38 +145,217 @@ async def list_invoices(
     order: str | None = None,
     limit: int | None = None,
     offset: int | None = None,
+    fields: Iterable[str] | None = None,
 ) -> dict[str, Any]:
-    params: dict[str, Any] = {}
-    for key, value in {
-        "status": status,
-        "current": current,
-        "dateFrom": date_from,
-        "dateTo": date_to,
-        "updatedFrom": updated_from,
-        "updatedTo": updated_to,
-        "sort": sort,
-        "order": order,
-        "limit": limit,
-        "offset": offset,
-    }.items():
-        if value is not None:
-            params[key] = value
+    params = _list_params(
+        status=status,
+        current=current,
+        dateFrom=date_from,
+        dateTo=date_to,
+        updatedFrom=updated_from,
+        updatedTo=updated_to,
+        sort=sort,
+        order=order,
+        limit=limit,
+        offset=offset,
+    )
 
     items = await client.request("GET", "/documents/invoice", params=params)
     if isinstance(items, list):
-        items = _filter_items_by_date(items, date_from, date_to)
+        start, end = date_bounds(date_from, date_to)
+        items = list(project_items(_filter_items_by_date(items, start, end), compile_fields(fields)))
     return {"items": items}
 
 
-async def get_invoice(client: HoldedClient, document_id: str) -> dict[str, Any]:
-    return await client.request("GET", f"/documents/invoice/{document_id}")
+async def iter_invoice_pages(
+    client: HoldedClient,
+    *,
+    status: int | None = None,
+    current: bool | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    updated_from: str | None = None,
+    updated_to: str | None = None,
+    sort: str | None = None,
+    order: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    offset: int | None = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    fields: Iterable[str] | None = None,
+) -> AsyncIterator[tuple[int, list[dict[str, Any]]]]:
+    """
+    Like `iter_invoices`, but yields `(next_offset, invoices)` once per upstream page.
+
+    `next_offset` is the upstream offset right after the page (before date filtering), so
+    a walk interrupted after consuming a page can be resumed with `offset=next_offset`.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be >= 1")
+    base = _list_params(
+        status=status,
+        current=current,
+        dateFrom=date_from,
+        dateTo=date_to,
+        updatedFrom=updated_from,
+        updatedTo=updated_to,
+        sort=sort,
+        order=order,
+    )
+    projection = compile_fields(fields)
+    start, end = date_bounds(date_from, date_to)
+    by_date = sort == "date" and (start is not None or end is not None)
+    descending = (order or "").lower() == "desc"
+    next_offset = offset or 0
+    # Offset step between prefetched pages: page_size until Holded is seen capping it.
+    stride = page_size
+    shrunk = False
+    largest = 0
+    previous_first: Any = None
+    pending: deque[tuple[int, asyncio.Task[list[Any]]]] = deque()
+
+    def schedule() -> None:
+        nonlocal next_offset
+        params = {**base, "limit": page_size, "offset": next_offset}
+        pending.append((next_offset, asyncio.ensure_future(_fetch_page(client, params))))
+        next_offset += stride
+
+    async def cancel_pending() -> None:
+        for _, task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+        pending.clear()
+
+    try:
+        for _ in range(max(1, prefetch)):
+            schedule()
+        while pending:
+            page_offset, task = pending.popleft()
+            page = await task
+            first = page[0].get("id") if page and isinstance(page[0], dict) else None
+            if first is not None and first == previous_first:
+                # Holded ignored `offset` and sent the previous page again.
+                break
+            previous_first = first
+            largest = max(largest, len(page))
+            # A short page is only the end if a longer one was seen: Holded may cap the page
+            # size below `limit`. A page larger than requested means `limit` was ignored and
+            # it is the whole set.
+            last = not page or len(page) < largest or len(page) > page_size
+            if by_date and _past_range(page, start, end, descending=descending):
+                last = True
+            if not last and len(page) < stride:
+                if shrunk:
+                    # The cap keeps moving: offsets cannot be trusted, stop rather than loop.
+                    last = True
+                else:
+                    # Capped: the pages prefetched at the old stride would leave gaps.
+                    await cancel_pending()
+                    stride = len(page)
+                    shrunk = True
+                    next_offset = page_offset + stride
+            if not last:
+                while len(pending) < max(1, prefetch):
+                    schedule()
+            yield page_offset + len(page), list(project_items(_filter_items_by_date(page, start, end), projection))
+            if last:
+                break
+    finally:
+        await cancel_pending()
+
+
+async def iter_invoices(
+    client: HoldedClient,
+    *,
+    status: int | None = None,
+    current: bool | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    updated_from: str | None = None,
+    updated_to: str | None = None,
+    sort: str | None = None,
+    order: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    offset: int | None = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    fields: Iterable[str] | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Walk every page of GET /documents/invoice, yielding invoices as pages arrive.
+
+    Up to `prefetch` pages are requested concurrently ahead of the consumer, so at most
+    `prefetch * page_size` items are held in memory at any time. Iteration stops at the
+    first short page, at a page repeating the previous one (`offset` ignored upstream),
+    or, when sorted by date (`sort="date"`), at the first page that runs past the date
+    range. With `fields`, each page is projected as soon as it is
+    consumed, so only the projected copies outlive the page.
+    """
+    pages = iter_invoice_pages(
+        client,
+        status=status,
+        current=current,
+        date_from=date_from,
+        date_to=date_to,
+        updated_from=updated_from,
+        updated_to=updated_to,
+        sort=sort,
+        order=order,
+        page_size=page_size,
+        offset=offset,
+        prefetch=prefetch,
+        fields=fields,
+    )
+    try:
+        async for _, items in pages:
+            for it in items:
+                yield it
+    finally:
+        await pages.aclose()
+
 
+async def iter_async(items: Iterable[_T]) -> AsyncIterator[_T]:
+    """`items` as an async iterator, for consumers that also take `iter_invoices()`."""
+    for item in items:
+        yield item
 
-async def create_invoice(client: HoldedClient, payload: dict[str, Any]) -> dict[str, Any]:
+
+async def get_invoice(
+    client: HoldedClient,
+    document_id: str,
+    *,
+    fields: Iterable[str] | None = None,
+) -> dict[str, Any]:
+    doc = await client.request("GET", f"/documents/invoice/{document_id}")
+    return project(doc, compile_fields(fields))
+
+
+def _check_payload(client: HoldedClient, payload: Any, validation: str | None, *, create: bool) -> None:
+    mode = validation or client.payload_validation
+    if mode != "off":
+        from .payloads import validate_invoice_payload
+
+        validate_invoice_payload(payload, mode=mode, create=create)
+
+
+async def create_invoice(
+    client: HoldedClient,
+    payload: dict[str, Any],
+    *,
+    validation: str | None = None,
+) -> dict[str, Any]:
+    """`validation` (strict, lenient, off) defaults to the client's HOLDED_PAYLOAD_VALIDATION."""
+    _check_payload(client, payload, validation, create=True)
     return await client.request("POST", "/documents/invoice", json_body=payload)
 
 
-async def update_invoice(client: HoldedClient, document_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+async def update_invoice(
+    client: HoldedClient,
+    document_id: str,
+    payload: dict[str, Any],
+    *,
+    validation: str | None = None,
+) -> dict[str, Any]:
+    _check_payload(client, payload, validation, create=False)
     return await client.request("PUT", f"/documents/invoice/{document_id}", json_body=payload)
 
 
@@ -126,3 +408,8 @@ async def send_invoice(
 
 async def invoice_pdf(client: HoldedClient, document_id: str) -> dict[str, Any]:
     return await client.request("GET", f"/documents/invoice/{document_id}/pdf")
+
+
+def invoice_pdf_stream(client: HoldedClient, document_id: str) -> AbstractAsyncContextManager[httpx.Response]:
+    """GET /documents/invoice/{id}/pdf with the (JSON, base64) body left unread."""
+    return client.stream("GET", f"/documents/invoice/{document_id}/pdf")
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator
+
+import httpx
+
+from . import jsonio, metrics
+from .bulk import error_payload
+from .errors import HoldedAPIError
+from .ratelimit import backoff_delay
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    op TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_after REAL NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_run_after ON jobs (status, run_after);
+"""
+
+_COLUMNS = (
+    "id, idempotency_key, kind, document_id, op, status, attempts, run_after, created, updated, result, error"
+)
+
+# Operations that may run in the background (`bulk.run_operation` names).
+JOB_OPERATIONS = frozenset({"approve", "pay", "send"})
+STATUSES = ("queued", "running", "succeeded", "failed")
+
+_POLL_SECONDS = 1.0
+_HEARTBEAT_SECONDS = 10.0
+# A running job whose worker stopped heartbeating (crash, kill -9) is given up after this.
+_LEASE_SECONDS = 60.0
+_RETENTION_SECONDS = 7 * 86400.0
+
+_INTERRUPTED = {
+    "message": (
+        "Interrupted while calling Holded; it may or may not have been applied. "
+        "Check the invoice before enqueueing it again."
+    )
+}
+
+# Failures that prove Holded never received the request, so running it again cannot
+# apply it twice.
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def _safe_to_retry(exc: Exception) -> bool:
+    if not isinstance(exc, HoldedAPIError):
+        return False
+    if exc.status_code == 429:
+        return True
+    # No status and no cause: the circuit breaker failed it before sending.
+    return exc.status_code is None and (exc.__cause__ is None or isinstance(exc.__cause__, _NOT_SENT))
+
+
+def _derived_key(op: dict[str, Any]) -> str:
+    return hashlib.sha256(jsonio.dumpb(op)).hexdigest()
+
+
+class JobQueue:
+    """
+    Durable queue of write operations (approve/pay/send), journaled in SQLite.
+
+    `enqueue()` returns at once; `run()` drains the journal with at most `concurrency`
+    operations in flight until cancelled. Every job has an idempotency key: the caller's,
+    one derived from the operation with `dedupe`, or else a fresh one, so repeating an
+    operation runs it again. Enqueueing a key again returns the existing job (flagged
+    `deduplicated`), whatever its outcome, instead of running it twice. Failures are
+    only retried when Holded cannot have received the request (429, connection errors,
+    open circuit); a job interrupted mid-call is marked failed rather than replayed.
+    Queued jobs survive restarts, and several processes can share one journal. Journal
+    writes (fsync'ed, and possibly waiting on another process's lock) run in a thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        concurrency: int,
+        max_attempts: int,
+        backoff_seconds: float,
+        max_backoff_seconds: float,
+    ) -> None:
+        path = os.path.expanduser(path)
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        # Reads (event loop) and writes (worker threads) use separate connections; with
+        # WAL, reads never wait for a write.
+        self._conn = sqlite3.connect(path, timeout=10.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._writer = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._writer.execute("PRAGMA synchronous=FULL")
+        # Guards `_writer`: one thread at a time.
+        self._lock = threading.Lock()
+        self._wake = asyncio.Event()
+        self._running: set[str] = set()
+        self._maintained = 0.0
+
+    def close(self) -> None:
+        # Waits for a write still running in a thread (e.g. for a cancelled job).
+        with self._lock:
+            self._writer.close()
+        self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front, so claims are atomic across processes.
+        with self._lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self._writer.execute("COMMIT")
+
+    def _fetch(self, job_id: str, conn: sqlite3.Connection | None = None) -> dict[str, Any] | None:
+        row = (conn or self._conn).execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    async def enqueue(
+        self,
+        op: dict[str, Any],
+        *,
+        idempotency_key: str | None = None,
+        dedupe: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Journal `op` (a `bulk.run_operation` dict) and return its job.
+
+        Without `idempotency_key`, `dedupe` keys the job by the operation itself, so an
+        identical operation enqueued within the retention period is not run again.
+        """
+        job = await asyncio.to_thread(self._enqueue, op, idempotency_key=idempotency_key, dedupe=dedupe)
+        if not job["deduplicated"]:
+            self._wake.set()
+        return job
+
+    def _enqueue(self, op: dict[str, Any], *, idempotency_key: str | None, dedupe: bool) -> dict[str, Any]:
+        kind = op.get("op")
+        if kind not in JOB_OPERATIONS:
+            raise ValueError(f"Only {', '.join(sorted(JOB_OPERATIONS))} can run in the background")
+        document_id = op.get("document_id")
+        if not isinstance(document_id, str) or not document_id:
+            raise ValueError("document_id is required")
+        key = idempotency_key or (_derived_key(op) if dedupe else uuid.uuid4().hex)
+        encoded = jsonio.dumps(op)
+        with self._transaction() as conn:
+            row = conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE idempotency_key = ?", (key,)).fetchone()
+            if row is not None and row[4] != encoded:
+                raise ValueError(f"idempotencyKey {key!r} was already used for a different operation")
+            if row is not None:
+                # Even a failed job is not run again: it may have reached Holded.
+                return {**_job(row), "deduplicated": True}
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            conn.execute(
+                f"INSERT INTO jobs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, 'queued', 0, ?, ?, ?, NULL, NULL)",
+                (job_id, key, kind, document_id, encoded, now, now, now),
+            )
+            job = self._fetch(job_id, conn)
+        assert job is not None
+        return {**job, "deduplicated": False}
+
+    def get(self, job_ids: list[str]) -> list[dict[str, Any]]:
+        return [self._fetch(job_id) or {"id": job_id, "status": "unknown"} for job_id in job_ids]
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return counts
+
+    def recent(self, *, status: str | None = None, limit: int = 50) -> list[dict[str, Any]]:
+        sql = f"SELECT {_COLUMNS} FROM jobs"
+        args: list[Any] = []
+        if status is not None:
+            sql += " WHERE status = ?"
+            args.append(status)
+        rows = self._conn.execute(sql + " ORDER BY updated DESC LIMIT ?", (*args, max(0, limit))).fetchall()
+        return [_job(row) for row in rows]
+
+    def _claim(self) -> dict[str, Any] | None:
+        now = time.time()
+        # Cheap read first, so an idle queue never takes the write lock.
+        with self._lock:
+            row = self._writer.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? ORDER BY run_after LIMIT 1", (now,)
+            ).fetchone()
+        if row is None:
+            return None
+        with self._transaction() as conn:
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, row[0]),
+            ).rowcount
+            # Another process may have claimed it in between; the next poll tries again.
+            return self._fetch(row[0], conn) if claimed else None
+
+    def _release(self, job: dict[str, Any]) -> None:
+        """Requeue a claimed job that was never started."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = attempts - 1, updated = ? "
+                "WHERE id = ? AND status = 'running'",
+                (time.time(), job["id"]),
+            )
+
+    async def _claim_next(self) -> dict[str, Any] | None:
+        claim = asyncio.ensure_future(asyncio.to_thread(self._claim))
+        try:
+            return await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            # The claim commits in its thread regardless; hand the job back instead of
+            # leaving it running until its lease expires.
+            job = await claim
+            if job is not None:
+                await asyncio.to_thread(self._release, job)
+            raise
+
+    def _finish(self, job: dict[str, Any], *, result: Any = None, error: Exception | None = None) -> None:
+        now = time.time()
+        if error is None:
+            status, run_after = "succeeded", now
+        elif _safe_to_retry(error) and job["attempts"] < self.max_attempts:
+            status = "queued"
+            run_after = now + backoff_delay(
+                job["attempts"] - 1, base=self.backoff_seconds, cap=self.max_backoff_seconds
+            )
+        else:
+            status, run_after = "failed", now
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, run_after = ?, updated = ?, result = ?, error = ? WHERE id = ?",
+                (
+                    status,
+                    run_after,
+                    now,
+                    jsonio.dumps(result) if error is None else None,
+                    jsonio.dumps(error_payload(error)) if error is not None else None,
+                    job["id"],
+                ),
+            )
+        metrics.JOBS.inc(kind=job["kind"], status="retried" if status == "queued" else status)
+
+    def _maintain(self, running: list[str]) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            if running:
+                conn.execute(
+                    f"UPDATE jobs SET updated = ? WHERE status = 'running' AND id IN ({','.join('?' * len(running))})",
+                    (now, *running),
+                )
+            abandoned = conn.execute(
+                "SELECT kind FROM jobs WHERE status = 'running' AND updated < ?", (now - _LEASE_SECONDS,)
+            ).fetchall()
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated = ? "
+                "WHERE status = 'running' AND updated < ?",
+                (jsonio.dumps(_INTERRUPTED), now, now - _LEASE_SECONDS),
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated < ?",
+                (now - _RETENTION_SECONDS,),
+            )
+        for (kind,) in abandoned:
+            metrics.JOBS.inc(kind=kind, status="interrupted")
+
+    async def _execute(self, job: dict[str, Any], handler: Callable[[dict[str, Any]], Awaitable[Any]]) -> None:
+        try:
+            result = await handler(job["op"])
+        except asyncio.CancelledError:
+            # Shutting down mid-call: Holded may have applied it, so never replay it.
+            with self._transaction() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, updated = ? WHERE id = ?",
+                    (jsonio.dumps(_INTERRUPTED), time.time(), job["id"]),
+                )
+            metrics.JOBS.inc(kind=job["kind"], status="interrupted")
+            raise
+        except Exception as exc:
+            await asyncio.to_thread(self._finish, job, error=exc)
+        else:
+            await asyncio.to_thread(self._finish, job, result=result)
+        finally:
+            self._running.discard(job["id"])
+            self._wake.set()
+
+    async def run(self, handler: Callable[[dict[str, Any]], Awaitable[Any]]) -> None:
+        """Run queued jobs through `handler(op)` until cancelled."""
+        workers: set[asyncio.Task[None]] = set()
+        try:
+            while True:
+                if time.time() - self._maintained >= _HEARTBEAT_SECONDS:
+                    self._maintained = time.time()
+                    await asyncio.to_thread(self._maintain, list(self._running))
+                # `_running` (not `workers`) is freed before the wake-up, so a slot is reused at once.
+                while len(self._running) < self.concurrency:
+                    job = await self._claim_next()
+                    if job is None:
+                        break
+                    self._running.add(job["id"])
+                    task = asyncio.create_task(self._execute(job, handler))
+                    workers.add(task)
+                    task.add_done_callback(workers.discard)
+                self._wake.clear()
+                # Other processes' enqueues and retry backoffs are picked up by polling.
+                # (Not wait_for: before 3.12 it drops a cancel that lands as the event fires.)
+                wake = asyncio.ensure_future(self._wake.wait())
+                try:
+                    await asyncio.wait({wake}, timeout=_POLL_SECONDS)
+                finally:
+                    wake.cancel()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "concurrency": self.concurrency,
+            "inFlight": len(self._running),
+            "counts": self.counts(),
+        }
+
+
+def _job(row: tuple[Any, ...]) -> dict[str, Any]:
+    (job_id, key, kind, document_id, op, status, attempts, run_after, created, updated, result, error) = row
+    job: dict[str, Any] = {
+        "id": job_id,
+        "idempotencyKey": key,
+        "kind": kind,
+        "documentId": document_id,
+        "status": status,
+        "attempts": attempts,
+        "createdAt": created,
+        "updatedAt": updated,
+        "op": jsonio.loads(op),
+    }
+    if status == "queued" and attempts:
+        job["retryAt"] = run_after
+    if result is not None:
+        job["result"] = jsonio.loads(result)
+    if error is not None:
+        job["error"] = jsonio.loads(error)
+    return job
@@ -1,50 +1,276 @@
 from __future__ import annotations
 
+import asyncio
+import os
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
+from mcp import types
 from mcp.server.fastmcp import Context, FastMCP
 
+from .aggregate import aggregate_invoices
+from .bulk import run_bounded, run_operation
+from .cache import TTLCache
 from .config import Settings
 from .holded_client import HoldedClient
 from .invoices import (
+    DEFAULT_PAGE_SIZE,
     approve_invoice,
+    compile_fields,
     create_invoice,
     delete_invoice,
     get_invoice,
     invoice_pdf,
+    iter_invoices,
     list_invoices,
     pay_invoice,
+    project,
+    project_items,
     send_invoice,
     update_invoice,
 )
+from .metrics import instrument_tool
+from .tenants import TenantPool, lease_scope, make_cache
+from .timings import collect_timings
+
+if TYPE_CHECKING:
+    from .jobs import JobQueue
+    from .mirror import InvoiceMirror
+    from .search import SearchIndex
+    from .shared import SharedCache
 
 
 @dataclass(frozen=True)
 class AppContext:
     settings: Settings
     holded: HoldedClient
+    mirror: InvoiceMirror | None = None
+    cache: TTLCache | SharedCache | None = None
+    search: SearchIndex | None = None
 
 
-@asynccontextmanager
-async def app_lifespan(server: FastMCP):
+@dataclass(frozen=True)
+class ServerContext:
+    """Lifespan state: the HOLDED_API_KEY account, the pool for per-request keys and the job queue."""
+
+    settings: Settings
+    default: AppContext | None = None
+    tenants: TenantPool | None = None
+    jobs: JobQueue | None = None
+
+
+def _open_server_context() -> ServerContext:
     settings = Settings()
-    holded = HoldedClient(settings)
+    if not settings.holded_api_key and not settings.holded_tenant_header:
+        raise ValueError("HOLDED_API_KEY is not set (or set HOLDED_TENANT_HEADER for per-request keys)")
+    default = None
+    if settings.holded_api_key:
+        mirror = None
+        if settings.holded_mirror_path:
+            from .mirror import InvoiceMirror
+
+            mirror = InvoiceMirror(
+                settings.holded_mirror_path,
+                max_age_seconds=settings.holded_mirror_max_age_seconds,
+            )
+        from .search import SearchIndex
+
+        default = AppContext(
+            settings=settings,
+            holded=HoldedClient(settings),
+            mirror=mirror,
+            cache=make_cache(settings),
+            search=SearchIndex(
+                settings.holded_search_index_path or ":memory:",
+                max_age_seconds=settings.holded_search_max_age_seconds,
+                mirror=mirror,
+            ),
+        )
+    tenants = None
+    if settings.holded_tenant_header:
+        tenants = TenantPool(
+            settings,
+            max_tenants=settings.holded_tenant_max_clients,
+            idle_seconds=settings.holded_tenant_idle_seconds,
+        )
+    jobs = None
+    if settings.holded_jobs_path:
+        if default is None:
+            raise ValueError("HOLDED_JOBS_PATH needs HOLDED_API_KEY: background jobs run on that account")
+        from .jobs import JobQueue
+
+        jobs = JobQueue(
+            settings.holded_jobs_path,
+            concurrency=settings.holded_jobs_concurrency,
+            max_attempts=settings.holded_jobs_max_attempts,
+            backoff_seconds=settings.holded_retry_backoff_seconds,
+            max_backoff_seconds=settings.holded_retry_max_backoff_seconds,
+        )
+    return ServerContext(settings=settings, default=default, tenants=tenants, jobs=jobs)
+
+
+async def _close_server_context(server: ServerContext) -> None:
+    if server.default is not None:
+        if server.default.mirror is not None:
+            server.default.mirror.close()
+        if server.default.search is not None:
+            server.default.search.close()
+        await server.default.holded.aclose()
+    if server.tenants is not None:
+        await server.tenants.aclose()
+    if server.jobs is not None:
+        server.jobs.close()
+    if server.settings.holded_shared_state:
+        from .shared import close_stores
+
+        close_stores()
+
+
+_shared_server: ServerContext | None = None
+_shared_refs = 0
+_shared_lock = asyncio.Lock()
+_background: list[asyncio.Task[None]] = []
+
+
+@asynccontextmanager
+async def shared_app_context() -> AsyncIterator[ServerContext]:
+    # With stateless_http=True FastMCP enters the lifespan once per HTTP request, so the
+    # client pools, mirror and cache are reference-counted and shared instead. app.py
+    # holds a reference for the whole server lifetime; stdio holds one for the session.
+    global _shared_server, _shared_refs
+    async with _shared_lock:
+        if _shared_server is None:
+            _shared_server = _open_server_context()
+            if _shared_server.default is not None:
+                # In the background, so the MCP handshake does not wait for DNS/TLS.
+                default = _shared_server.default
+                _background.append(
+                    asyncio.create_task(default.holded.warmup(default.settings.holded_prewarm_connections))
+                )
+            if _shared_server.tenants is not None:
+                _background.append(asyncio.create_task(_shared_server.tenants.run_evictions()))
+            if _shared_server.jobs is not None and _shared_server.default is not None:
+                default = _shared_server.default
+                _background.append(asyncio.create_task(_shared_server.jobs.run(lambda op: _run_job(default, op))))
+        _shared_refs += 1
+        server = _shared_server
     try:
-        yield AppContext(settings=settings, holded=holded)
+        yield server
     finally:
-        await holded.aclose()
+        async with _shared_lock:
+            _shared_refs -= 1
+            if _shared_refs == 0:
+                _shared_server = None
+                # Detached first: the next context must not inherit these if we are cancelled.
+                background = list(_background)
+                _background.clear()
+                for task in background:
+                    task.cancel()
+                try:
+                    await asyncio.gather(*background, return_exceptions=True)
+                finally:
+                    await _close_server_context(server)
+
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP):
+    async with shared_app_context() as context:
+        yield context
+
+
+class _HoldedMCP(FastMCP):
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Any:
+        # Tenant clients picked by `_ctx_app` stay leased (never evicted) until the call returns.
+        with lease_scope():
+            server: ServerContext = self.get_context().request_context.lifespan_context
+            if not server.settings.holded_timings:
+                return await super().call_tool(name, arguments)
+            with collect_timings() as timings:
+                result = await super().call_tool(name, arguments)
+            # Beside the result, in the protocol's `_meta`, so the tool output is unchanged.
+            content, structured = result if isinstance(result, tuple) else (result, None)
+            return types.CallToolResult(
+                content=list(content),
+                structuredContent=structured,
+                _meta={"holdedTimings": [timing.to_dict() for timing in timings]},
+            )
+
+
+mcp = _HoldedMCP(name="Holded Invoicing", lifespan=app_lifespan, stateless_http=True)
 
 
-mcp = FastMCP(name="Holded Invoicing", lifespan=app_lifespan, stateless_http=True)
+def _request_api_key(ctx: Context, header: str) -> str | None:
+    # Per-call `_meta.holdedApiKey` (any transport) wins over the HTTP header.
+    request_context = ctx.request_context
+    api_key = getattr(request_context.meta, "holdedApiKey", None)
+    if api_key is None and request_context.request is not None:
+        api_key = request_context.request.headers.get(header)
+    return api_key if isinstance(api_key, str) and api_key else None
+
+
+def _ctx_app(ctx: Context) -> AppContext:
+    server: ServerContext = ctx.request_context.lifespan_context
+    header = server.settings.holded_tenant_header
+    if server.tenants is not None and header:
+        api_key = _request_api_key(ctx, header)
+        if api_key is not None and api_key != server.settings.holded_api_key:
+            tenant = server.tenants.get(api_key)  # leased until the tool call returns
+            return AppContext(settings=tenant.settings, holded=tenant.holded, cache=tenant.cache)
+    if server.default is None:
+        raise ValueError(f"No Holded API key: send it in the {header} header")
+    return server.default
 
 
 def _ctx_holded(ctx: Context) -> HoldedClient:
-    return ctx.request_context.lifespan_context.holded
+    return _ctx_app(ctx).holded
+
+
+async def _invalidate(app: AppContext, document_id: str | None = None) -> None:
+    if app.cache is not None and document_id is not None:
+        await app.cache.pop(("invoice", document_id))
+        await app.cache.pop(("pdf", document_id))
+    if app.mirror is not None:
+        if document_id is not None:
+            app.mirror.discard(document_id)
+        app.mirror.mark_stale()
+    if app.search is not None:
+        if document_id is not None:
+            app.search.discard(document_id)
+        app.search.mark_stale()
+
 
+async def _run_job(app: AppContext, op: dict[str, Any]) -> Any:
+    result = await run_operation(app.holded, op)
+    await _invalidate(app, op["document_id"])
+    return result
 
-@mcp.tool(description="Lista facturas (type=invoice) con filtros opcionales.")
+
+def _ctx_jobs(ctx: Context) -> JobQueue:
+    server: ServerContext = ctx.request_context.lifespan_context
+    if server.jobs is None:
+        raise ValueError("Background jobs are disabled: set HOLDED_JOBS_PATH on the server")
+    if _ctx_app(ctx) is not server.default:
+        raise ValueError("Background jobs only run for the HOLDED_API_KEY account")
+    return server.jobs
+
+
+async def _enqueue(jobs: JobQueue, op: dict[str, Any], idempotency_key: str | None, dedupe: bool) -> dict[str, Any]:
+    return await jobs.enqueue(
+        {k: v for k, v in op.items() if v is not None},
+        idempotency_key=idempotency_key,
+        dedupe=dedupe,
+    )
+
+
+@mcp.tool(
+    description=(
+        "Lista facturas (type=invoice) con filtros opcionales. "
+        "Con all=true recorre todas las páginas (limit actúa como tamaño de página). "
+        "Usa fields=['summary'] (o rutas como 'products.name') para devolver solo esos campos."
+    )
+)
+@instrument_tool
 async def holded_invoices_list(
     ctx: Context,
     status: int | None = None,
@@ -57,12 +283,47 @@ async def holded_invoices_list(
     order: str | None = None,
     limit: int | None = None,
     offset: int | None = None,
+    all: bool = False,
+    fields: list[str] | None = None,
 ) -> dict[str, Any]:
     """
     GET /documents/invoice
     - dateFrom/dateTo/updatedFrom/updatedTo: YYYY-MM-DD
     - status: según Holded (p.ej. 0 borrador, 1 pendiente, 2 aprobada)
+    - all: pagina automáticamente con prefetch concurrente de páginas
+    - fields: rutas con puntos a conservar; 'summary' = id, docNumber, contact,
+      contactName, date, total, status
+    Si HOLDED_MIRROR_PATH está configurado, responde desde la réplica local.
     """
+    app = _ctx_app(ctx)
+    if app.mirror is not None and app.mirror.supports(
+        current=current, updated_from=updatedFrom, updated_to=updatedTo, sort=sort, order=order
+    ):
+        await app.mirror.refresh(app.holded)
+        items = app.mirror.query(
+            status=status,
+            date_from=dateFrom,
+            date_to=dateTo,
+            limit=None if all else limit,
+            offset=offset,
+        )
+        return {"items": list(project_items(items, compile_fields(fields)))}
+    if all:
+        pages = iter_invoices(
+            _ctx_holded(ctx),
+            status=status,
+            current=current,
+            date_from=dateFrom,
+            date_to=dateTo,
+            updated_from=updatedFrom,
+            updated_to=updatedTo,
+            sort=sort,
+            order=order,
+            page_size=limit or DEFAULT_PAGE_SIZE,
+            offset=offset,
+            fields=fields,
+        )
+        return {"items": [it async for it in pages]}
     return await list_invoices(
         _ctx_holded(ctx),
         status=status,
@@ -75,62 +336,192 @@ async def holded_invoices_list(
         order=order,
         limit=limit,
         offset=offset,
+        fields=fields,
     )
 
 
-@mcp.tool(description="Obtiene una factura por id (GET /documents/invoice/{documentId}).")
-async def holded_invoices_get(ctx: Context, documentId: str) -> dict[str, Any]:
-    return await get_invoice(_ctx_holded(ctx), documentId)
+@mcp.tool(
+    description=(
+        "Agrega facturas en el servidor sin devolverlas: recuento, subtotal, impuestos, total, "
+        "pendiente de cobro y media, agrupados por groupBy (contact, month, status, tax). "
+        "Recorre todas las páginas con los mismos filtros que holded_invoices_list."
+    )
+)
+@instrument_tool
+async def holded_invoices_aggregate(
+    ctx: Context,
+    groupBy: list[str],
+    status: int | None = None,
+    current: bool | None = None,
+    dateFrom: str | None = None,
+    dateTo: str | None = None,
+    updatedFrom: str | None = None,
+    updatedTo: str | None = None,
+) -> dict[str, Any]:
+    """
+    - groupBy: combinación de contact, month, status y tax; month es YYYY-MM (UTC)
+    - tax agrupa por tipo impositivo de las líneas (columna taxRate)
+    """
+    app = _ctx_app(ctx)
+    if app.mirror is not None and app.mirror.supports(
+        current=current, updated_from=updatedFrom, updated_to=updatedTo
+    ):
+        await app.mirror.refresh(app.holded)
+        items = app.mirror.query(status=status, date_from=dateFrom, date_to=dateTo)
+    else:
+        items = iter_invoices(
+            app.holded,
+            status=status,
+            current=current,
+            date_from=dateFrom,
+            date_to=dateTo,
+            updated_from=updatedFrom,
+            updated_to=updatedTo,
+        )
+    return await aggregate_invoices(items, groupBy)
+
+
+@mcp.tool(
+    description=(
+        "Busca facturas por texto (número, nombre del contacto, descripción, notas y nombres "
+        "de las líneas) en un índice local, sin recorrer Holded. Devuelve ids y resúmenes "
+        "ordenados por relevancia."
+    )
+)
+@instrument_tool
+async def holded_invoices_search(
+    ctx: Context,
+    query: str,
+    limit: int = 20,
+    status: int | None = None,
+    dateFrom: str | None = None,
+    dateTo: str | None = None,
+) -> dict[str, Any]:
+    """
+    - query: palabras sueltas; cada una también cuenta como prefijo ("host" encuentra "hosting")
+    - el índice se actualiza con updatedFrom cuando tiene más de HOLDED_SEARCH_MAX_AGE_SECONDS
+    """
+    app = _ctx_app(ctx)
+    if app.search is None:
+        raise ValueError("Search is only available for the HOLDED_API_KEY account")
+    await app.search.refresh(app.holded)
+    return app.search.search(query, limit=limit, status=status, date_from=dateFrom, date_to=dateTo)
+
+
+async def _get_invoice(app: AppContext, document_id: str) -> dict[str, Any]:
+    if app.mirror is not None:
+        await app.mirror.refresh(app.holded)
+        doc = app.mirror.get(document_id)
+        if doc is not None:
+            return doc
+    doc = await get_invoice(app.holded, document_id)
+    if app.mirror is not None and isinstance(doc, dict):
+        await app.mirror.put(doc)
+    return doc
+
+
+async def _get_cached_invoice(app: AppContext, document_id: str) -> dict[str, Any]:
+    if app.cache is not None:
+        return await app.cache.get_or_fetch(("invoice", document_id), lambda: _get_invoice(app, document_id))
+    return await _get_invoice(app, document_id)
+
+
+@mcp.tool(
+    description=(
+        "Obtiene una factura por id (GET /documents/invoice/{documentId}). "
+        "fields (p.ej. ['summary'] o ['id', 'products.name']) limita los campos devueltos."
+    )
+)
+@instrument_tool
+async def holded_invoices_get(
+    ctx: Context,
+    documentId: str,
+    fields: list[str] | None = None,
+) -> dict[str, Any]:
+    # The cache and the mirror keep full documents; only the response is projected.
+    doc = await _get_cached_invoice(_ctx_app(ctx), documentId)
+    return project(doc, compile_fields(fields))
 
 
 @mcp.tool(
     description=(
         "Crea una factura (POST /documents/invoice). "
-        "El payload se envía tal cual; usa los campos de Holded (contactId/contactName, date, items, etc.)."
+        "Usa los campos de Holded (contactId/contactName, date en segundos unix, items con units y "
+        "subtotal, etc.); con HOLDED_PAYLOAD_VALIDATION se valida localmente antes de enviarlo y "
+        "los errores indican el campo."
     )
 )
+@instrument_tool
 async def holded_invoices_create(ctx: Context, payload: dict[str, Any]) -> dict[str, Any]:
-    return await create_invoice(_ctx_holded(ctx), payload)
+    result = await create_invoice(_ctx_holded(ctx), payload)
+    await _invalidate(_ctx_app(ctx))
+    return result
 
 
 @mcp.tool(
     description=(
         "Actualiza una factura (PUT /documents/invoice/{documentId}). "
-        "El payload se envía tal cual; permite actualizar desc/notes/date/items/customFields, etc."
+        "Permite actualizar desc/notes/date/items/customFields, etc.; con HOLDED_PAYLOAD_VALIDATION "
+        "se valida localmente antes de enviarlo y los errores indican el campo."
     )
 )
+@instrument_tool
 async def holded_invoices_update(
     ctx: Context,
     documentId: str,
     payload: dict[str, Any],
 ) -> dict[str, Any]:
-    return await update_invoice(_ctx_holded(ctx), documentId, payload)
+    result = await update_invoice(_ctx_holded(ctx), documentId, payload)
+    await _invalidate(_ctx_app(ctx), documentId)
+    return result
 
 
 @mcp.tool(
     description=(
         "Aprueba/numera una factura. "
         "Equivale a la acción 'Aprobar/Emitir' del panel web y usa "
-        "POST /doc/invoice/{documentId}/draftmode/approve."
+        "POST /doc/invoice/{documentId}/draftmode/approve. "
+        "Con background=true (requiere HOLDED_JOBS_PATH) se encola y devuelve un trabajo al momento; "
+        "consulta su estado con holded_jobs_status. Con dedupe=true una operación idéntica ya encolada "
+        "no se repite."
     )
 )
+@instrument_tool
 async def holded_invoices_approve(
     ctx: Context,
     documentId: str,
     info: str | None = None,
+    background: bool = False,
+    idempotencyKey: str | None = None,
+    dedupe: bool = False,
 ) -> dict[str, Any]:
     # El endpoint de aprobación de la app web no requiere body; solo POST.
     # Conservamos info por compatibilidad futura (no se envía).
     _ = info  # unused
-    return await approve_invoice(_ctx_holded(ctx), documentId)
+    if background:
+        return await _enqueue(_ctx_jobs(ctx), {"op": "approve", "document_id": documentId}, idempotencyKey, dedupe)
+    result = await approve_invoice(_ctx_holded(ctx), documentId)
+    await _invalidate(_ctx_app(ctx), documentId)
+    return result
 
 
 @mcp.tool(description="Elimina una factura (DELETE /documents/invoice/{documentId}).")
+@instrument_tool
 async def holded_invoices_delete(ctx: Context, documentId: str) -> dict[str, Any]:
-    return await delete_invoice(_ctx_holded(ctx), documentId)
+    result = await delete_invoice(_ctx_holded(ctx), documentId)
+    await _invalidate(_ctx_app(ctx), documentId)
+    return result
 
 
-@mcp.tool(description="Marca una factura como pagada (POST /documents/invoice/{documentId}/pay).")
+@mcp.tool(
+    description=(
+        "Marca una factura como pagada (POST /documents/invoice/{documentId}/pay). "
+        "Con background=true (requiere HOLDED_JOBS_PATH) se encola y devuelve un trabajo al momento; "
+        "consulta su estado con holded_jobs_status. Con dedupe=true una operación idéntica ya encolada "
+        "no se repite."
+    )
+)
+@instrument_tool
 async def holded_invoices_pay(
     ctx: Context,
     documentId: str,
@@ -138,8 +529,27 @@ async def holded_invoices_pay(
     amount: float,
     treasury: str | None = None,
     desc: str | None = None,
+    background: bool = False,
+    idempotencyKey: str | None = None,
+    dedupe: bool = False,
 ) -> dict[str, Any]:
-    return await pay_invoice(
+    """
+    - idempotencyKey: con background=true, repetir la llamada con la misma clave devuelve
+      el trabajo existente (deduplicated=true) en vez de pagar dos veces
+    - dedupe: sin idempotencyKey, deriva la clave del pago, así que un pago idéntico no se
+      repite durante 7 días; por defecto cada llamada es un pago nuevo
+    """
+    if background:
+        op = {
+            "op": "pay",
+            "document_id": documentId,
+            "date": date,
+            "amount": amount,
+            "treasury": treasury,
+            "desc": desc,
+        }
+        return await _enqueue(_ctx_jobs(ctx), op, idempotencyKey, dedupe)
+    result = await pay_invoice(
         _ctx_holded(ctx),
         documentId,
         date=date,
@@ -147,9 +557,19 @@ async def holded_invoices_pay(
         treasury=treasury,
         desc=desc,
     )
+    await _invalidate(_ctx_app(ctx), documentId)
+    return result
 
 
-@mcp.tool(description="Envía una factura por email (POST /documents/invoice/{documentId}/send).")
+@mcp.tool(
+    description=(
+        "Envía una factura por email (POST /documents/invoice/{documentId}/send). "
+        "Con background=true (requiere HOLDED_JOBS_PATH) se encola y devuelve un trabajo al momento; "
+        "consulta su estado con holded_jobs_status. Con dedupe=true una operación idéntica ya encolada "
+        "no se repite."
+    )
+)
+@instrument_tool
 async def holded_invoices_send(
     ctx: Context,
     documentId: str,
@@ -158,8 +578,22 @@ async def holded_invoices_send(
     message: str | None = None,
     mailTemplateId: str | None = None,
     docIds: str | None = None,
+    background: bool = False,
+    idempotencyKey: str | None = None,
+    dedupe: bool = False,
 ) -> dict[str, Any]:
-    return await send_invoice(
+    if background:
+        op = {
+            "op": "send",
+            "document_id": documentId,
+            "emails": emails,
+            "subject": subject,
+            "message": message,
+            "mail_template_id": mailTemplateId,
+            "doc_ids": docIds,
+        }
+        return await _enqueue(_ctx_jobs(ctx), op, idempotencyKey, dedupe)
+    result = await send_invoice(
         _ctx_holded(ctx),
         documentId,
         emails=emails,
@@ -168,8 +602,272 @@ async def holded_invoices_send(
         mail_template_id=mailTemplateId,
         doc_ids=docIds,
     )
+    await _invalidate(_ctx_app(ctx), documentId)
+    return result
 
 
 @mcp.tool(description="Obtiene el PDF (base64) de una factura (GET /documents/invoice/{documentId}/pdf).")
+@instrument_tool
 async def holded_invoices_pdf(ctx: Context, documentId: str) -> dict[str, Any]:
-    return await invoice_pdf(_ctx_holded(ctx), documentId)
+    app = _ctx_app(ctx)
+    if app.cache is not None and app.settings.holded_cache_pdf:
+        return await app.cache.get_or_fetch(("pdf", documentId), lambda: invoice_pdf(app.holded, documentId))
+    return await invoice_pdf(app.holded, documentId)
+
+
+def _bulk_concurrency(app: AppContext, concurrency: int | None) -> int:
+    return concurrency if concurrency is not None else app.settings.holded_bulk_concurrency
+
+
+def _bulk_response(ids: list[str | None], outcomes: list[dict[str, Any]]) -> dict[str, Any]:
+    results = [{"documentId": doc_id, **outcome} for doc_id, outcome in zip(ids, outcomes)]
+    failed = sum(1 for r in results if not r["ok"])
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+
+def _require_id(item: dict[str, Any]) -> str:
+    doc_id = item.get("documentId")
+    if not isinstance(doc_id, str) or not doc_id:
+        raise ValueError("documentId is required")
+    return doc_id
+
+
+@mcp.tool(
+    description=(
+        "Obtiene varias facturas por id en paralelo (concurrencia limitada). "
+        "Devuelve un resultado o error por id, en el mismo orden."
+    )
+)
+@instrument_tool
+async def holded_invoices_get_many(
+    ctx: Context,
+    documentIds: list[str],
+    concurrency: int | None = None,
+    fields: list[str] | None = None,
+) -> dict[str, Any]:
+    app = _ctx_app(ctx)
+    projection = compile_fields(fields)
+
+    async def fetch(doc_id: str) -> dict[str, Any]:
+        return project(await _get_cached_invoice(app, doc_id), projection)
+
+    outcomes = await run_bounded(
+        documentIds,
+        fetch,
+        concurrency=_bulk_concurrency(app, concurrency),
+    )
+    return _bulk_response(list(documentIds), outcomes)
+
+
+@mcp.tool(
+    description=(
+        "Aprueba varias facturas en paralelo (concurrencia limitada). "
+        "Devuelve un resultado o error por id, en el mismo orden; con background=true, un trabajo por id. "
+        "Con dedupe=true una operación idéntica ya encolada no se repite."
+    )
+)
+@instrument_tool
+async def holded_invoices_approve_many(
+    ctx: Context,
+    documentIds: list[str],
+    concurrency: int | None = None,
+    background: bool = False,
+    dedupe: bool = False,
+) -> dict[str, Any]:
+    app = _ctx_app(ctx)
+    jobs = _ctx_jobs(ctx) if background else None
+
+    async def approve(doc_id: str) -> dict[str, Any]:
+        if jobs is not None:
+            return await _enqueue(jobs, {"op": "approve", "document_id": doc_id}, None, dedupe)
+        result = await approve_invoice(app.holded, doc_id)
+        await _invalidate(app, doc_id)
+        return result
+
+    outcomes = await run_bounded(documentIds, approve, concurrency=_bulk_concurrency(app, concurrency))
+    return _bulk_response(list(documentIds), outcomes)
+
+
+@mcp.tool(
+    description=(
+        "Marca varias facturas como pagadas en paralelo (concurrencia limitada). "
+        "Cada pago: {documentId, date, amount, treasury?, desc?, idempotencyKey?}. "
+        "Devuelve un resultado o error por pago, en el mismo orden; con background=true, un trabajo por pago. "
+        "Con dedupe=true una operación idéntica ya encolada no se repite."
+    )
+)
+@instrument_tool
+async def holded_invoices_pay_many(
+    ctx: Context,
+    payments: list[dict[str, Any]],
+    concurrency: int | None = None,
+    background: bool = False,
+    dedupe: bool = False,
+) -> dict[str, Any]:
+    app = _ctx_app(ctx)
+    jobs = _ctx_jobs(ctx) if background else None
+
+    async def pay(item: dict[str, Any]) -> dict[str, Any]:
+        doc_id = _require_id(item)
+        if not isinstance(item.get("date"), int) or not isinstance(item.get("amount"), (int, float)):
+            raise ValueError("date (unix seconds) and amount are required")
+        if jobs is not None:
+            op = {
+                "op": "pay",
+                "document_id": doc_id,
+                "date": item["date"],
+                "amount": item["amount"],
+                "treasury": item.get("treasury"),
+                "desc": item.get("desc"),
+            }
+            return await _enqueue(jobs, op, item.get("idempotencyKey"), dedupe)
+        result = await pay_invoice(
+            app.holded,
+            doc_id,
+            date=item["date"],
+            amount=item["amount"],
+            treasury=item.get("treasury"),
+            desc=item.get("desc"),
+        )
+        await _invalidate(app, doc_id)
+        return result
+
+    outcomes = await run_bounded(payments, pay, concurrency=_bulk_concurrency(app, concurrency))
+    return _bulk_response([p.get("documentId") for p in payments], outcomes)
+
+
+@mcp.tool(
+    description=(
+        "Envía varias facturas por email en paralelo (concurrencia limitada). "
+        "Cada envío: {documentId, emails, subject?, message?, mailTemplateId?, docIds?, idempotencyKey?}. "
+        "Devuelve un resultado o error por envío, en el mismo orden; con background=true, un trabajo por envío. "
+        "Con dedupe=true una operación idéntica ya encolada no se repite."
+    )
+)
+@instrument_tool
+async def holded_invoices_send_many(
+    ctx: Context,
+    sends: list[dict[str, Any]],
+    concurrency: int | None = None,
+    background: bool = False,
+    dedupe: bool = False,
+) -> dict[str, Any]:
+    app = _ctx_app(ctx)
+    jobs = _ctx_jobs(ctx) if background else None
+
+    async def send(item: dict[str, Any]) -> dict[str, Any]:
+        doc_id = _require_id(item)
+        if not isinstance(item.get("emails"), str):
+            raise ValueError("emails is required")
+        if jobs is not None:
+            op = {
+                "op": "send",
+                "document_id": doc_id,
+                "emails": item["emails"],
+                "subject": item.get("subject"),
+                "message": item.get("message"),
+                "mail_template_id": item.get("mailTemplateId"),
+                "doc_ids": item.get("docIds"),
+            }
+            return await _enqueue(jobs, op, item.get("idempotencyKey"), dedupe)
+        result = await send_invoice(
+            app.holded,
+            doc_id,
+            emails=item["emails"],
+            subject=item.get("subject"),
+            message=item.get("message"),
+            mail_template_id=item.get("mailTemplateId"),
+            doc_ids=item.get("docIds"),
+        )
+        await _invalidate(app, doc_id)
+        return result
+
+    outcomes = await run_bounded(sends, send, concurrency=_bulk_concurrency(app, concurrency))
+    return _bulk_response([s.get("documentId") for s in sends], outcomes)
+
+
+@mcp.tool(
+    description=(
+        "Exporta PDFs de facturas al disco del servidor (HOLDED_EXPORT_DIR), como ficheros .pdf "
+        "o en un zip (asZip=true). Acepta una lista de ids o un rango dateFrom/dateTo (YYYY-MM-DD); "
+        "target es la subcarpeta o el nombre del zip dentro de HOLDED_EXPORT_DIR."
+    )
+)
+@instrument_tool
+async def holded_invoices_pdf_export(
+    ctx: Context,
+    target: str,
+    documentIds: list[str] | None = None,
+    dateFrom: str | None = None,
+    dateTo: str | None = None,
+    asZip: bool = False,
+    concurrency: int | None = None,
+) -> dict[str, Any]:
+    app = _ctx_app(ctx)
+    export_dir = app.settings.holded_export_dir
+    if not export_dir:
+        raise ValueError("PDF export is disabled: set HOLDED_EXPORT_DIR on the server")
+    root = os.path.realpath(os.path.expanduser(export_dir))
+    path = os.path.realpath(os.path.join(root, target))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError("target must be a relative path inside HOLDED_EXPORT_DIR")
+    if bool(documentIds) == bool(dateFrom or dateTo):
+        raise ValueError("Pass either documentIds or a dateFrom/dateTo range")
+    from .pdf_export import export_pdfs, invoices_in_range
+
+    documents = (
+        [(doc_id, doc_id) for doc_id in documentIds]
+        if documentIds
+        else invoices_in_range(app.holded, date_from=dateFrom, date_to=dateTo)
+    )
+    return await export_pdfs(
+        app.holded,
+        documents,
+        output_dir=None if asZip else path,
+        zip_path=path if asZip else None,
+        concurrency=_bulk_concurrency(app, concurrency),
+    )
+
+
+@mcp.tool(
+    description=(
+        "Estado de los trabajos en segundo plano (background=true en aprobar/pagar/enviar): "
+        "recuento por estado y los trabajos pedidos en jobIds, o los más recientes."
+    )
+)
+@instrument_tool
+async def holded_jobs_status(
+    ctx: Context,
+    jobIds: list[str] | None = None,
+    status: str | None = None,
+    limit: int = 20,
+) -> dict[str, Any]:
+    """
+    - status: queued, running, succeeded o failed (solo sin jobIds)
+    - un trabajo que pudo llegar a Holded no se reintenta: si falla, comprueba la factura y
+      vuelve a encolarlo (sin su idempotencyKey)
+    """
+    jobs = _ctx_jobs(ctx)
+    return {
+        "counts": jobs.counts(),
+        "jobs": jobs.get(jobIds) if jobIds else jobs.recent(status=status, limit=limit),
+    }
+
+
+@mcp.tool(
+    description=(
+        "Estadísticas internas del servidor "
+        "(caché de facturas, rate limiter y reintentos contra Holded)."
+    )
+)
+@instrument_tool
+async def holded_stats(ctx: Context) -> dict[str, Any]:
+    app = _ctx_app(ctx)
+    server: ServerContext = ctx.request_context.lifespan_context
+    return {
+        "cache": app.cache.stats() if app.cache is not None else None,
+        "client": app.holded.stats(),
+        "tenants": server.tenants.stats() if server.tenants is not None else None,
+        "search": app.search.stats() if app.search is not None else None,
+        "jobs": server.jobs.stats() if server.jobs is not None else None,
+    }
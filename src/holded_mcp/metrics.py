@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import functools
+import math
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, description, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        lines: list[str] = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TOOL_CALLS = REGISTRY.register(
+    Counter("holded_mcp_tool_calls_total", "MCP tool calls by outcome.", ("tool", "outcome"))
+)
+TOOL_DURATION = REGISTRY.register(
+    Histogram("holded_mcp_tool_duration_seconds", "MCP tool call latency.", ("tool",))
+)
+TOOL_IN_FLIGHT = REGISTRY.register(
+    Gauge("holded_mcp_tool_in_flight", "MCP tool calls currently running.", ("tool",))
+)
+UPSTREAM_REQUESTS = REGISTRY.register(
+    Counter(
+        "holded_upstream_requests_total",
+        "HTTP requests sent to Holded, by route template and status (\"error\" for network failures).",
+        ("method", "route", "status"),
+    )
+)
+UPSTREAM_DURATION = REGISTRY.register(
+    Histogram(
+        "holded_upstream_request_duration_seconds",
+        "Latency of HTTP requests sent to Holded (one observation per attempt).",
+        ("method", "route"),
+    )
+)
+UPSTREAM_IN_FLIGHT = REGISTRY.register(
+    Gauge("holded_upstream_in_flight", "HTTP requests to Holded currently in flight.")
+)
+UPSTREAM_SENT_BYTES = REGISTRY.register(
+    Counter("holded_upstream_request_bytes_total", "Request body bytes sent to Holded.", ("method", "route"))
+)
+UPSTREAM_RECEIVED_BYTES = REGISTRY.register(
+    Counter(
+        "holded_upstream_response_bytes_total",
+        "Response body bytes received from Holded.",
+        ("method", "route"),
+    )
+)
+POOL_SATURATION = REGISTRY.register(
+    Gauge(
+        "holded_upstream_pool_saturation",
+        "In-flight Holded requests divided by HOLDED_MAX_CONNECTIONS (1.0 means requests queue for a connection).",
+    )
+)
+TENANT_REQUESTS = REGISTRY.register(
+    Counter(
+        "holded_tenant_upstream_requests_total",
+        "HTTP requests sent to Holded for per-request API keys, by tenant (hashed key) and status.",
+        ("tenant", "status"),
+    )
+)
+TENANT_CLIENTS = REGISTRY.register(
+    Gauge("holded_tenant_clients", "Per-tenant Holded clients currently pooled.")
+)
+TENANT_EVICTIONS = REGISTRY.register(
+    Counter("holded_tenant_evictions_total", "Per-tenant Holded clients closed, by reason.", ("reason",))
+)
+UPSTREAM_HEDGES = REGISTRY.register(
+    Counter(
+        "holded_upstream_hedges_total",
+        "Duplicate GETs sent to Holded after the hedge delay, by which copy answered first (original, hedge).",
+        ("winner",),
+    )
+)
+BREAKER_OPEN = REGISTRY.register(
+    Gauge("holded_upstream_circuits_open", "Holded clients whose circuit breaker is open or half-open.")
+)
+BREAKER_REJECTED = REGISTRY.register(
+    Counter("holded_upstream_circuit_rejected_total", "Requests failed fast because the circuit was open.")
+)
+ADMISSION_QUEUED = REGISTRY.register(
+    Gauge("holded_mcp_admission_queued", "MCP HTTP requests waiting for an admission slot.")
+)
+ADMISSION_SHED = REGISTRY.register(
+    Counter(
+        "holded_mcp_admission_shed_total",
+        "MCP HTTP requests rejected with 503, by reason (queue_full, timeout).",
+        ("reason",),
+    )
+)
+JOBS = REGISTRY.register(
+    Counter(
+        "holded_mcp_jobs_total",
+        "Background jobs by kind and outcome (succeeded, failed, retried, interrupted).",
+        ("kind", "status"),
+    )
+)
+
+_ID_SEGMENT = re.compile(r"^(/(?:documents|doc)/[^/]+)/[^/]+")
+
+
+def route_template(path: str) -> str:
+    """`/documents/invoice/abc123/pay` -> `/documents/invoice/{id}/pay` (bounded label cardinality)."""
+    return _ID_SEGMENT.sub(r"\1/{id}", path)
+
+
+def instrument_tool(fn: F) -> F:
+    """Record call count, outcome, latency and concurrency for an MCP tool coroutine."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        TOOL_IN_FLIGHT.inc(tool=name)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await fn(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            TOOL_DURATION.observe(time.perf_counter() - started, tool=name)
+            TOOL_CALLS.inc(tool=name, outcome=outcome)
+            TOOL_IN_FLIGHT.dec(tool=name)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+from . import jsonio
+from .invoices import date_bounds
+from .replica import LocalReplica
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS invoices (
+    id TEXT PRIMARY KEY,
+    date INTEGER,
+    status INTEGER,
+    contact TEXT,
+    generation INTEGER NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS invoices_date ON invoices (date, id);
+CREATE INDEX IF NOT EXISTS invoices_status_date ON invoices (status, date, id);
+CREATE INDEX IF NOT EXISTS invoices_contact ON invoices (contact);
+CREATE INDEX IF NOT EXISTS invoices_generation ON invoices (generation);
+"""
+
+_UPSERT = """
+INSERT INTO invoices (id, date, status, contact, generation, doc)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    date = excluded.date,
+    status = excluded.status,
+    contact = excluded.contact,
+    generation = excluded.generation,
+    doc = excluded.doc
+"""
+
+
+def _row(doc: dict[str, Any], generation: int) -> tuple[Any, ...] | None:
+    doc_id = doc.get("id")
+    if not isinstance(doc_id, str):
+        return None
+    date = doc.get("date")
+    status = doc.get("status")
+    return (
+        doc_id,
+        int(date) if isinstance(date, (int, float)) else None,
+        status if isinstance(status, int) else None,
+        doc.get("contact") if isinstance(doc.get("contact"), str) else None,
+        generation,
+        jsonio.dumps(doc),
+    )
+
+
+class InvoiceMirror(LocalReplica):
+    """
+    Local SQLite replica of the invoice list.
+
+    The first sync loads every invoice; later syncs only request documents updated since
+    the previous sync (`updatedFrom`). Reads are answered locally while the last sync is
+    younger than `max_age_seconds`, otherwise a delta sync runs first.
+    """
+
+    _SCHEMA = _SCHEMA
+    _TABLE = "invoices"
+    _STORED = "upserted"
+
+    def _store(self, docs: list[dict[str, Any]], generation: int) -> int:
+        rows = [row for row in (_row(doc, generation) for doc in docs) if row is not None]
+        if rows:
+            with self._conn:
+                self._conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def _remove_stale(self, generation: int) -> int:
+        return self._conn.execute("DELETE FROM invoices WHERE generation != ?", (generation,)).rowcount
+
+    def changes(self, since: int | None = None) -> Iterator[dict[str, Any]]:
+        """Invoices stored after generation `since` (every invoice when None)."""
+        for (doc,) in self._conn.execute(
+            "SELECT doc FROM invoices WHERE generation > ? ORDER BY date, id", (since or 0,)
+        ):
+            yield jsonio.loads(doc)
+
+    def get(self, document_id: str) -> dict[str, Any] | None:
+        row = self._conn.execute("SELECT doc FROM invoices WHERE id = ?", (document_id,)).fetchone()
+        return jsonio.loads(row[0]) if row else None
+
+    async def put(self, doc: dict[str, Any]) -> None:
+        # Outside of syncs: a full load would otherwise drop the row (it is not of the
+        # load's generation) and then reset the generation below the one written here.
+        async with self._sync_lock:
+            # A generation of its own, so `changes()` reports it to the search index.
+            generation = self.generation + 1
+            row = _row(doc, generation)
+            if row is not None:
+                with self._conn:
+                    self._conn.execute(_UPSERT, row)
+                    self._set_state(generation=generation)
+
+    def discard(self, document_id: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM invoices WHERE id = ?", (document_id,))
+
+    @staticmethod
+    def supports(
+        *,
+        current: bool | None = None,
+        updated_from: str | None = None,
+        updated_to: str | None = None,
+        sort: str | None = None,
+        order: str | None = None,
+    ) -> bool:
+        """Whether a list query can be answered locally (filters the mirror does not index go upstream)."""
+        return all(v is None for v in (current, updated_from, updated_to, sort, order))
+
+    def query(
+        self,
+        *,
+        status: int | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        clauses: list[str] = []
+        args: list[Any] = []
+        if status is not None:
+            clauses.append("status = ?")
+            args.append(status)
+        start, end = date_bounds(date_from, date_to)
+        if start is not None:
+            clauses.append("date >= ?")
+            args.append(start)
+        if end is not None:
+            clauses.append("date < ?")
+            args.append(end)
+        sql = "SELECT doc FROM invoices"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date, id LIMIT ? OFFSET ?"
+        args.extend([limit if limit is not None else -1, offset or 0])
+        for (doc,) in self._conn.execute(sql, args):
+            yield jsonio.loads(doc)
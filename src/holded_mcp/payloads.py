@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, ValidationError, model_validator
+
+VALIDATION_MODES = ("strict", "lenient", "off")
+
+
+class PayloadError(ValueError):
+    """A create/update payload rejected locally; `errors` lists `{"field", "message"}` entries."""
+
+    def __init__(self, errors: list[dict[str, str]]) -> None:
+        details = "; ".join(f"{e['field']}: {e['message']}" for e in errors)
+        super().__init__(f"Invalid invoice payload: {details}")
+        self.errors = errors
+
+
+class CustomField(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    field: str
+    value: Any = None
+
+
+class InvoiceItem(BaseModel):
+    """One line of `items`; `subtotal` is the unit price, as in Holded's API."""
+
+    model_config = ConfigDict(extra="allow")
+
+    name: str | None = None
+    desc: str | None = None
+    units: float
+    subtotal: float
+    discount: float | None = None
+    tax: float | None = None
+    taxes: list[str] | None = None
+    tags: list[str] | None = None
+    sku: str | None = None
+    productId: str | None = None
+    serviceId: str | None = None
+    accountingAccountId: str | None = None
+
+
+class InvoiceUpdate(BaseModel):
+    """PUT /documents/invoice/{id} body: every field is optional."""
+
+    model_config = ConfigDict(extra="allow")
+
+    contactId: str | None = None
+    contactCode: str | None = None
+    contactName: str | None = None
+    contactEmail: str | None = None
+    contactAddress: str | None = None
+    contactCity: str | None = None
+    contactCp: str | None = None
+    contactProvince: str | None = None
+    contactCountryCode: str | None = None
+    applyContactDefaults: bool | None = None
+    desc: str | None = None
+    notes: str | None = None
+    date: int | None = None
+    dueDate: int | None = None
+    invoiceNum: str | None = None
+    numSerieId: str | None = None
+    currency: str | None = None
+    currencyChange: float | None = None
+    language: str | None = None
+    salesChannelId: str | None = None
+    paymentMethodId: str | None = None
+    designId: str | None = None
+    warehouseId: str | None = None
+    approveDoc: bool | None = None
+    tags: list[str] | None = None
+    customFields: list[CustomField] | None = None
+    items: list[InvoiceItem] | None = None
+
+
+class InvoiceCreate(InvoiceUpdate):
+    """POST /documents/invoice body: needs a date and a contact."""
+
+    date: int
+
+    @model_validator(mode="after")
+    def _has_contact(self) -> InvoiceCreate:
+        if not (self.contactId or self.contactCode or self.contactName):
+            raise ValueError("one of contactId, contactCode or contactName is required")
+        return self
+
+
+# Strict: no type coercion ("5" is not a number) and unknown fields are errors.
+_STRICT = ConfigDict(extra="forbid", strict=True)
+
+
+class _StrictCustomField(CustomField):
+    model_config = _STRICT
+
+
+class _StrictInvoiceItem(InvoiceItem):
+    model_config = _STRICT
+
+
+class _StrictInvoiceUpdate(InvoiceUpdate):
+    model_config = _STRICT
+
+    customFields: list[_StrictCustomField] | None = None
+    items: list[_StrictInvoiceItem] | None = None
+
+
+class _StrictInvoiceCreate(InvoiceCreate):
+    model_config = _STRICT
+
+    customFields: list[_StrictCustomField] | None = None
+    items: list[_StrictInvoiceItem] | None = None
+
+
+_MODELS: dict[tuple[str, bool], type[BaseModel]] = {
+    ("lenient", True): InvoiceCreate,
+    ("lenient", False): InvoiceUpdate,
+    ("strict", True): _StrictInvoiceCreate,
+    ("strict", False): _StrictInvoiceUpdate,
+}
+
+
+def validate_invoice_payload(payload: Any, *, mode: str, create: bool) -> None:
+    """
+    Check a create (or update) payload before it is sent; raises `PayloadError`.
+
+    `lenient` checks the known fields and lets unknown ones through, `strict` also
+    rejects unknown fields and coercible values, `off` skips the check. The payload
+    itself is sent unchanged either way.
+    """
+    if mode == "off":
+        return
+    model = _MODELS.get((mode, create))
+    if model is None:
+        raise ValueError(f"Unknown payload validation mode: {mode} (use {', '.join(VALIDATION_MODES)})")
+    try:
+        model.model_validate(payload)
+    except ValidationError as exc:
+        raise PayloadError(
+            [
+                {"field": ".".join(str(part) for part in error["loc"]) or "payload", "message": error["msg"]}
+                for error in exc.errors(include_url=False)
+            ]
+        ) from None
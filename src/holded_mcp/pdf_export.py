@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import binascii
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, BinaryIO, Iterable
+
+from .bulk import error_payload
+from .errors import HoldedAPIError
+from .invoices import invoice_pdf_stream, iter_async, iter_invoices
+
+if TYPE_CHECKING:
+    from .holded_client import HoldedClient
+
+_COPY_CHUNK = 256 * 1024
+_VALUE_OPEN = re.compile(rb'\s*:\s*"')
+# Holded document ids are hex; anything else could escape the output directory.
+_DOCUMENT_ID = re.compile(r"[A-Za-z0-9]+")
+
+
+class Base64FieldDecoder:
+    """
+    Incrementally pull one base64 string field (e.g. `"data"`) out of a streamed JSON body
+    and decode it, without ever holding the whole body or the whole string in memory.
+    """
+
+    def __init__(self, field: str = "data") -> None:
+        self._marker = f'"{field}"'.encode()
+        self._head = b""
+        self._carry = b""
+        self._in_value = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self.done:
+            return b""
+        if not self._in_value:
+            self._head += chunk
+            start = self._value_start()
+            if start is None:
+                # Keep enough tail to match a marker split across chunks.
+                self._head = self._head[-(len(self._marker) + 64) :]
+                return b""
+            chunk, self._head = self._head[start:], b""
+            self._in_value = True
+
+        end = chunk.find(b'"')
+        if end != -1:
+            chunk = chunk[:end]
+            self.done = True
+        data = self._carry + chunk
+        if not self.done and data.endswith(b"\\"):
+            # An escape sequence ("\/") split across chunks.
+            data, self._carry = data[:-1], b"\\"
+        else:
+            self._carry = b""
+        data = data.replace(b"\\/", b"/")
+        if self.done:
+            self._carry = b""
+            return binascii.a2b_base64(data) if data else b""
+        usable = len(data) - len(data) % 4
+        self._carry = data[usable:] + self._carry
+        return binascii.a2b_base64(data[:usable]) if usable else b""
+
+    def _value_start(self) -> int | None:
+        idx = self._head.find(self._marker)
+        if idx == -1:
+            return None
+        m = _VALUE_OPEN.match(self._head, idx + len(self._marker))
+        if m is None:
+            return None  # ':' or the opening quote not received yet
+        return m.end()
+
+
+async def download_pdf(client: HoldedClient, document_id: str, handle: BinaryIO) -> int:
+    """
+    Stream one invoice PDF into `handle`, returning the number of bytes written.
+
+    Decoded data is buffered up to `_COPY_CHUNK` bytes and written from a worker thread,
+    so a slow disk does not stall the event loop.
+    """
+    decoder = Base64FieldDecoder()
+    written = 0
+    buffer = bytearray()
+    async with invoice_pdf_stream(client, document_id) as resp:
+        async for chunk in resp.aiter_bytes():
+            buffer += decoder.feed(chunk)
+            if len(buffer) >= _COPY_CHUNK or (decoder.done and buffer):
+                await asyncio.to_thread(handle.write, bytes(buffer))
+                written += len(buffer)
+                buffer.clear()
+            if decoder.done:
+                break
+    if not decoder.done:
+        raise HoldedAPIError(
+            message=f"Holded returned no PDF data for invoice {document_id}",
+            method="GET",
+            url=f"/documents/invoice/{document_id}/pdf",
+        )
+    return written
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._") or "invoice"
+
+
+async def invoices_in_range(
+    client: HoldedClient,
+    *,
+    date_from: str | None,
+    date_to: str | None,
+) -> AsyncIterator[tuple[str, str]]:
+    """(document id, file stem) for every invoice in the date range."""
+    async for doc in iter_invoices(client, date_from=date_from, date_to=date_to):
+        doc_id = doc.get("id")
+        if isinstance(doc_id, str):
+            number = doc.get("docNumber")
+            stem = f"{number}_{doc_id}" if isinstance(number, str) and number else doc_id
+            yield doc_id, _safe_name(stem)
+
+
+async def export_pdfs(
+    client: HoldedClient,
+    documents: Iterable[tuple[str, str]] | AsyncIterable[tuple[str, str]],
+    *,
+    output_dir: str | None = None,
+    zip_path: str | None = None,
+    concurrency: int = 4,
+) -> dict[str, Any]:
+    """
+    Download `(document id, file stem)` PDFs concurrently into `output_dir` or a zip file.
+
+    Each PDF is decoded chunk by chunk straight to disk (zip entries go through a temp
+    file and are appended one at a time), so peak memory depends on `concurrency`, not
+    on the number or size of documents. Ids that are not alphanumeric are reported as
+    failed, stems are sanitised and repeated ids are exported once.
+    """
+    if (output_dir is None) == (zip_path is None):
+        raise ValueError("Exactly one of output_dir or zip_path is required")
+    if not isinstance(documents, AsyncIterable):
+        documents = iter_async(documents)
+
+    staging = output_dir
+    archive: zipfile.ZipFile | None = None
+    if zip_path is not None:
+        parent = os.path.dirname(os.path.abspath(zip_path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".holded-pdf-", dir=parent)
+        archive = zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED)
+    assert staging is not None
+    os.makedirs(staging, exist_ok=True)
+
+    archive_lock = asyncio.Lock()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    pending: set[asyncio.Task[None]] = set()
+    summary: dict[str, Any] = {"exported": 0, "bytes": 0, "failed": []}
+
+    def add_to_archive(path: str, arcname: str) -> None:
+        assert archive is not None
+        with open(path, "rb") as src, archive.open(arcname, "w") as dst:
+            shutil.copyfileobj(src, dst, _COPY_CHUNK)
+
+    async def export_one(document_id: str, stem: str) -> None:
+        path = os.path.join(staging, f"{stem}.pdf")
+        part = f"{path}.part"
+        try:
+            with open(part, "wb") as handle:
+                size = await download_pdf(client, document_id, handle)
+            if archive is None:
+                os.replace(part, path)
+            else:
+                async with archive_lock:
+                    await asyncio.to_thread(add_to_archive, part, f"{stem}.pdf")
+                os.remove(part)
+            summary["exported"] += 1
+            summary["bytes"] += size
+        except (HoldedAPIError, OSError, binascii.Error) as exc:
+            summary["failed"].append({"documentId": document_id, "error": error_payload(exc)})
+        finally:
+            # Only left behind by a failed or cancelled download.
+            if os.path.exists(part):
+                os.remove(part)
+            semaphore.release()
+
+    seen: set[str] = set()
+    stems: set[str] = set()
+    try:
+        async for document_id, stem in documents:
+            if document_id in seen:
+                continue
+            seen.add(document_id)
+            if not _DOCUMENT_ID.fullmatch(document_id):
+                summary["failed"].append({"documentId": document_id, "error": {"message": "Invalid document id"}})
+                continue
+            stem = _safe_name(stem)
+            if stem in stems:
+                stem = f"{stem}_{document_id}"
+            stems.add(stem)
+            await semaphore.acquire()
+            task = asyncio.create_task(export_one(document_id, stem))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+    finally:
+        running = list(pending)
+        for task in running:
+            task.cancel()
+        # Let cancelled downloads remove their .part files before the archive is closed.
+        await asyncio.gather(*running, return_exceptions=True)
+        if archive is not None:
+            archive.close()
+            shutil.rmtree(staging, ignore_errors=True)
+
+    summary["output"] = os.path.abspath(zip_path if zip_path is not None else staging)
+    return summary
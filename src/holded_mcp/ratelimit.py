@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import email.utils
+import random
+import time
+from typing import Any
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by every request of a client.
+
+    `rate` tokens per second are added up to `burst`; a rate of 0 disables throttling but
+    still honours `pause()` (used when Holded answers 429 with Retry-After). Waiters are
+    served in FIFO order.
+    """
+
+    def __init__(self, *, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.pauses = 0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            started = time.monotonic()
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                if self.rate <= 0:
+                    break
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+            waited = time.monotonic() - started
+            self.acquired += 1
+            if waited > 0.001:
+                self.waited += 1
+                self.wait_seconds += waited
+
+    async def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = max(now, self._blocked_until)
+        self.pauses += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ratePerSecond": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "waitSeconds": round(self.wait_seconds, 3),
+            "pauses": self.pauses,
+        }
+
+
+def backoff_delay(attempt: int, *, base: float, cap: float) -> float:
+    # "Full jitter" exponential backoff.
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dt.timezone.utc)
+    return max(0.0, (when - dt.datetime.now(dt.timezone.utc)).total_seconds())
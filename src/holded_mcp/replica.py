@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import os
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterable
+
+from .invoices import iter_invoices
+
+if TYPE_CHECKING:
+    from .holded_client import HoldedClient
+
+_SYNC_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Documents per write transaction (and per `IN (...)` lookup).
+BATCH_SIZE = 500
+
+
+class LocalReplica:
+    """
+    Base for the SQLite copies of the invoice list (`InvoiceMirror`, `SearchIndex`).
+
+    The first sync loads every invoice; later syncs only request documents updated since
+    the previous sync (`updatedFrom`). Every sync stores what it reads as a new
+    generation, and a full one drops documents from older generations (deleted
+    upstream). `refresh()` syncs once the last sync is older than `max_age_seconds`.
+    Subclasses provide `_SCHEMA`, `_TABLE`, `_store()` and `_remove_stale()`.
+    """
+
+    _SCHEMA = ""
+    _TABLE = ""
+    # Name of the stored-document count in sync results.
+    _STORED = "stored"
+
+    def __init__(self, path: str, *, max_age_seconds: float) -> None:
+        if path != ":memory:":
+            path = os.path.expanduser(path)
+            parent = os.path.dirname(path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA + _SYNC_STATE_SCHEMA)
+        self._sync_lock = asyncio.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _state(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, **values: Any) -> None:
+        self._conn.executemany(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            [(k, str(v)) for k, v in values.items()],
+        )
+
+    @property
+    def synced_at(self) -> float | None:
+        value = self._state("synced_at")
+        return float(value) if value is not None else None
+
+    @property
+    def generation(self) -> int:
+        return int(self._state("generation") or 0)
+
+    @property
+    def full_generation(self) -> int:
+        """Generation of the last full load."""
+        return int(self._state("full_generation") or 0)
+
+    def is_fresh(self) -> bool:
+        synced_at = self.synced_at
+        return synced_at is not None and time.time() - synced_at < self.max_age_seconds
+
+    def mark_stale(self) -> None:
+        with self._conn:
+            self._set_state(synced_at=0)
+
+    def count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self._TABLE}").fetchone()[0]
+
+    async def sync(self, client: HoldedClient, *, full: bool = False) -> dict[str, Any]:
+        async with self._sync_lock:
+            return await self._sync(client, full=full)
+
+    async def refresh(self, client: HoldedClient) -> None:
+        if self.is_fresh():
+            return
+        async with self._sync_lock:
+            # Concurrent cold callers wait here; only the first one syncs.
+            if not self.is_fresh():
+                await self._sync(client, full=False)
+
+    async def _sync(self, client: HoldedClient, *, full: bool) -> dict[str, Any]:
+        started = time.time()
+        # updatedFrom has day granularity, so the next delta re-reads today's changes.
+        high_water = dt.datetime.fromtimestamp(started, dt.timezone.utc).date().isoformat()
+        updated_from = None if full else self._state("high_water")
+        result = await self._load(
+            iter_invoices(client, updated_from=updated_from),
+            full=updated_from is None,
+            high_water=high_water,
+            synced_at=started,
+        )
+        return {
+            "mode": "full" if updated_from is None else "delta",
+            "updatedFrom": updated_from,
+            **result,
+            "total": self.count(),
+        }
+
+    async def _load(self, docs: AsyncIterable[dict[str, Any]], *, full: bool, **state: Any) -> dict[str, int]:
+        """Store `docs` as a new generation, then record `state` along with it."""
+        generation = self.generation + 1
+        stored = 0
+        batch: list[dict[str, Any]] = []
+        async for doc in docs:
+            batch.append(doc)
+            if len(batch) >= BATCH_SIZE:
+                stored += self._store(batch, generation)
+                batch.clear()
+        stored += self._store(batch, generation)
+
+        with self._conn:
+            removed = 0
+            if full:
+                # A full load sees every live invoice; anything older was deleted upstream.
+                removed = self._remove_stale(generation)
+                state["full_generation"] = generation
+            self._set_state(generation=generation, **state)
+        return {self._STORED: stored, "removed": removed}
+
+    def _store(self, docs: list[dict[str, Any]], generation: int) -> int:
+        """Upsert `docs` (in one transaction), returning how many were stored."""
+        raise NotImplementedError
+
+    def _remove_stale(self, generation: int) -> int:
+        """Delete documents older than `generation` (inside the caller's transaction)."""
+        raise NotImplementedError
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+
+class LatencyWindow:
+    """Latencies of the last `size` requests, for percentile-based hedge delays."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=max(1, size))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Fails fast once Holded looks down.
+
+    After `threshold` consecutive failures (network errors or 5xx) the circuit opens and
+    `allow()` returns False for `reset_seconds`. Then one probe request is let through
+    (half-open): success closes the circuit, failure opens it again. If the probe never
+    reports back, another one is allowed after `reset_seconds`. A threshold of 0 disables
+    the breaker.
+    """
+
+    def __init__(self, *, threshold: int, reset_seconds: float) -> None:
+        self.threshold = max(0, threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self._retry_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def retry_in(self) -> float:
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def allow(self) -> bool:
+        if not self.enabled or self.state == "closed":
+            return True
+        now = time.monotonic()
+        if now >= self._retry_at:
+            self.state = "half_open"
+            self._retry_at = now + self.reset_seconds
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        if not self.enabled:
+            return
+        self.failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+            self.state = "open"
+            self._retry_at = time.monotonic() + self.reset_seconds
+            self.opened += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "consecutiveFailures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retryInSeconds": round(self.retry_in(), 3) if self.state != "closed" else 0.0,
+        }
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Iterator
+
+from . import jsonio
+from .invoices import VIEWS, compile_fields, date_bounds, iter_async, project
+from .replica import BATCH_SIZE, LocalReplica
+
+if TYPE_CHECKING:
+    from .holded_client import HoldedClient
+    from .mirror import InvoiceMirror
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id TEXT PRIMARY KEY,
+    date INTEGER,
+    status INTEGER,
+    generation INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, id, field)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_id ON postings (id);
+"""
+
+# Indexed fields and their weight in the score; `products.*` reads every line item.
+FIELD_WEIGHTS = {
+    "docNumber": 4.0,
+    "contactName": 3.0,
+    "desc": 2.0,
+    "products.name": 2.0,
+    "products.desc": 1.0,
+    "notes": 1.0,
+}
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+_SUMMARY = compile_fields(VIEWS["summary"])
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, accent-free alphanumeric tokens ("Factura Nº 12" -> factura, no, 12)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return _TOKEN.findall("".join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+def _field_texts(doc: dict[str, Any], field: str) -> Iterator[str]:
+    if field.startswith("products."):
+        key = field[len("products.") :]
+        products = doc.get("products")
+        for item in products if isinstance(products, list) else ():
+            if isinstance(item, dict) and isinstance(item.get(key), str):
+                yield item[key]
+    elif isinstance(doc.get(field), str):
+        yield doc[field]
+
+
+def _postings(doc_id: str, doc: dict[str, Any]) -> list[tuple[str, str, str, int]]:
+    rows = []
+    for field in FIELD_WEIGHTS:
+        counts = Counter(t for text in _field_texts(doc, field) for t in tokenize(text))
+        rows.extend((term, doc_id, field, tf) for term, tf in counts.items())
+    return rows
+
+
+def _prefix_end(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SearchIndex(LocalReplica):
+    """
+    Inverted index over invoice text, kept in SQLite (`:memory:` or a file).
+
+    Maintained like `InvoiceMirror`: the first sync indexes every invoice, later ones only
+    those updated since the previous sync (`updatedFrom`), and a search refreshes the
+    index first once it is older than `max_age_seconds`. Queries never go upstream.
+    Given a `mirror`, the index is fed from it instead: refreshing syncs the mirror,
+    then re-indexes only the invoices the mirror stored since the last refresh.
+    """
+
+    _SCHEMA = _SCHEMA
+    _TABLE = "docs"
+    _STORED = "indexed"
+
+    def __init__(self, path: str, *, max_age_seconds: float, mirror: InvoiceMirror | None = None) -> None:
+        super().__init__(path, max_age_seconds=max_age_seconds)
+        self.mirror = mirror
+
+    def _store(self, docs: list[dict[str, Any]], generation: int) -> int:
+        indexed = 0
+        with self._conn:
+            for doc in docs:
+                doc_id = doc.get("id")
+                if not isinstance(doc_id, str):
+                    continue
+                date = doc.get("date")
+                status = doc.get("status")
+                self._conn.execute("DELETE FROM postings WHERE id = ?", (doc_id,))
+                self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", _postings(doc_id, doc))
+                self._conn.execute(
+                    "INSERT INTO docs (id, date, status, generation, summary) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET date = excluded.date, status = excluded.status, "
+                    "generation = excluded.generation, summary = excluded.summary",
+                    (
+                        doc_id,
+                        int(date) if isinstance(date, (int, float)) else None,
+                        status if isinstance(status, int) else None,
+                        generation,
+                        jsonio.dumps(project(doc, _SUMMARY)),
+                    ),
+                )
+                indexed += 1
+        return indexed
+
+    def _remove_stale(self, generation: int) -> int:
+        stale = "SELECT id FROM docs WHERE generation != ?"
+        self._conn.execute(f"DELETE FROM postings WHERE id IN ({stale})", (generation,))
+        return self._conn.execute("DELETE FROM docs WHERE generation != ?", (generation,)).rowcount
+
+    async def _sync(self, client: HoldedClient, *, full: bool) -> dict[str, Any]:
+        if self.mirror is None:
+            return await super()._sync(client, full=full)
+        started = time.time()
+        await self.mirror.refresh(client)
+        seen = self._state("mirror_generation")
+        # After a full mirror load (which drops deleted invoices) the index is rebuilt too.
+        since = None if full or seen is None or self.mirror.full_generation > int(seen) else int(seen)
+        result = await self._load(
+            iter_async(self.mirror.changes(since)),
+            full=since is None,
+            synced_at=started,
+            mirror_generation=self.mirror.generation,
+        )
+        return {"mode": "full" if since is None else "delta", "source": "mirror", **result, "total": self.count()}
+
+    def discard(self, document_id: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM postings WHERE id = ?", (document_id,))
+            self._conn.execute("DELETE FROM docs WHERE id = ?", (document_id,))
+
+    def _term_scores(self, token: str, total: int) -> dict[str, float]:
+        """Best score per document for one query token (prefix matches count half)."""
+        if len(token) >= 2:
+            rows = self._conn.execute(
+                "SELECT term, id, field, tf FROM postings WHERE term >= ? AND term < ?",
+                (token, _prefix_end(token)),
+            ).fetchall()
+        else:
+            rows = self._conn.execute(
+                "SELECT term, id, field, tf FROM postings WHERE term = ?", (token,)
+            ).fetchall()
+        docs_per_term: dict[str, set[str]] = {}
+        for term, doc_id, _, _ in rows:
+            docs_per_term.setdefault(term, set()).add(doc_id)
+        per_term: dict[tuple[str, str], float] = {}
+        for term, doc_id, field, tf in rows:
+            idf = math.log(1 + total / len(docs_per_term[term]))
+            weight = FIELD_WEIGHTS.get(field, 1.0) * (1.0 if term == token else 0.5)
+            per_term[(doc_id, term)] = per_term.get((doc_id, term), 0.0) + idf * weight * (1 + math.log(tf))
+        best: dict[str, float] = {}
+        for (doc_id, _), score in per_term.items():
+            best[doc_id] = max(best.get(doc_id, 0.0), score)
+        return best
+
+    def _matching(
+        self,
+        ids: list[str],
+        *,
+        status: int | None,
+        date_from: str | None,
+        date_to: str | None,
+    ) -> set[str]:
+        clauses: list[str] = []
+        args: list[Any] = []
+        if status is not None:
+            clauses.append("status = ?")
+            args.append(status)
+        start, end = date_bounds(date_from, date_to)
+        if start is not None:
+            clauses.append("date >= ?")
+            args.append(start)
+        if end is not None:
+            clauses.append("date < ?")
+            args.append(end)
+        keep: set[str] = set()
+        for i in range(0, len(ids), BATCH_SIZE):
+            chunk = ids[i : i + BATCH_SIZE]
+            sql = f"SELECT id FROM docs WHERE id IN ({','.join('?' * len(chunk))}) AND " + " AND ".join(clauses)
+            keep.update(row[0] for row in self._conn.execute(sql, [*chunk, *args]))
+        return keep
+
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int = 20,
+        status: int | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Rank invoices by how many query words they match, then by a TF-IDF score weighted
+        per field. Every word also matches as a prefix ("host" finds "hosting").
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        total = self.count()
+        scores: dict[str, float] = {}
+        matched: dict[str, int] = {}
+        for token in tokens:
+            for doc_id, score in self._term_scores(token, total).items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+        ids = list(scores)
+        if ids and (status is not None or date_from is not None or date_to is not None):
+            keep = self._matching(ids, status=status, date_from=date_from, date_to=date_to)
+            ids = [doc_id for doc_id in ids if doc_id in keep]
+        ids.sort(key=lambda doc_id: (-matched[doc_id], -scores[doc_id], doc_id))
+
+        items = []
+        for doc_id in ids[: max(0, limit)]:
+            row = self._conn.execute("SELECT summary FROM docs WHERE id = ?", (doc_id,)).fetchone()
+            summary = jsonio.loads(row[0]) if row else {"id": doc_id}
+            items.append(
+                {**summary, "score": round(scores[doc_id], 3), "matched": f"{matched[doc_id]}/{len(tokens)}"}
+            )
+        return {"query": query, "total": len(ids), "items": items}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "documents": self.count(),
+            "terms": self._conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0],
+            "syncedAt": self.synced_at,
+        }
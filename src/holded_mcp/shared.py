@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from . import jsonio
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    expires REAL NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+"""
+
+
+class SharedStore(abc.ABC):
+    """
+    State shared by every worker process: token buckets and a byte cache.
+
+    Times are wall-clock (`time.time()`), the only clock processes agree on. Subclass it
+    and `register_backend()` a factory to plug in a networked store (Redis, ...). Methods
+    block; the async wrappers below call them through `asyncio.to_thread`.
+    """
+
+    @abc.abstractmethod
+    def take_token(self, bucket: str, *, rate: float, burst: int) -> float:
+        """Take one token; returns 0 on success, else the seconds to wait before retrying."""
+
+    @abc.abstractmethod
+    def pause(self, bucket: str, seconds: float) -> None:
+        """Block `bucket` for every process (Holded answered 429 with Retry-After)."""
+
+    @abc.abstractmethod
+    def cache_get(self, key: str) -> bytes | None: ...
+
+    @abc.abstractmethod
+    def cache_set(self, key: str, value: bytes, *, ttl_seconds: float, max_entries: int) -> None: ...
+
+    @abc.abstractmethod
+    def cache_delete(self, key: str) -> None: ...
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSharedStore(SharedStore):
+    """`SharedStore` in a SQLite file, for several workers on one host (WAL, immediate transactions)."""
+
+    def __init__(self, path: str) -> None:
+        path = os.path.expanduser(path)
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._sets = 0
+
+    def _write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic
+        # across processes.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def take_token(self, bucket: str, *, rate: float, burst: int) -> float:
+        if rate <= 0:
+            # Unlimited: only a shared 429 pause can hold the request back; no write needed.
+            with self._lock:
+                row = self._conn.execute("SELECT blocked_until FROM buckets WHERE name = ?", (bucket,)).fetchone()
+            return max(0.0, row[0] - time.time()) if row else 0.0
+
+        def take(conn: sqlite3.Connection) -> float:
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated, blocked_until FROM buckets WHERE name = ?", (bucket,)
+            ).fetchone()
+            tokens, updated, blocked_until = row if row else (float(burst), now, 0.0)
+            if now < blocked_until:
+                return blocked_until - now
+            tokens = min(float(burst), tokens + max(0.0, now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)", (bucket, tokens, now, blocked_until))
+            return wait
+
+        return self._write(take)
+
+    def pause(self, bucket: str, seconds: float) -> None:
+        def block(conn: sqlite3.Connection) -> None:
+            now = time.time()
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated, blocked_until) VALUES (?, 0, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET tokens = 0, updated = MAX(updated, excluded.blocked_until), "
+                "blocked_until = MAX(blocked_until, excluded.blocked_until)",
+                (bucket, now + seconds, now + seconds),
+            )
+
+        self._write(block)
+
+    def cache_get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def cache_set(self, key: str, value: bytes, *, ttl_seconds: float, max_entries: int) -> None:
+        def put(conn: sqlite3.Connection) -> None:
+            now = time.time()
+            conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, now + ttl_seconds, value))
+            self._sets += 1
+            if self._sets % 64 == 0:
+                # Amortised cleanup: expired entries first, then the ones closest to expiring.
+                conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,),
+                )
+
+        self._write(put)
+
+    def cache_delete(self, key: str) -> None:
+        self._write(lambda conn: conn.execute("DELETE FROM cache WHERE key = ?", (key,)))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+BACKENDS: dict[str, Callable[[str], SharedStore]] = {"sqlite": SQLiteSharedStore}
+
+_stores: dict[str, SharedStore] = {}
+
+
+def register_backend(scheme: str, factory: Callable[[str], SharedStore]) -> None:
+    """Make `scheme://...` URLs in HOLDED_SHARED_STATE open stores built by `factory(rest)`."""
+    BACKENDS[scheme] = factory
+
+
+def open_store(url: str) -> SharedStore:
+    """The process-wide store for `url` (`sqlite:///path`, or a bare file path)."""
+    store = _stores.get(url)
+    if store is None:
+        scheme, sep, rest = url.partition("://")
+        if not sep:
+            scheme, rest = "sqlite", url
+        factory = BACKENDS.get(scheme)
+        if factory is None:
+            raise ValueError(f"Unknown HOLDED_SHARED_STATE backend: {scheme} (use {', '.join(BACKENDS)})")
+        store = _stores[url] = factory(rest)
+    return store
+
+
+def close_stores() -> None:
+    for store in _stores.values():
+        store.close()
+    _stores.clear()
+
+
+class SharedTokenBucket:
+    """`TokenBucket` whose tokens (and 429 pauses) are shared by every process using `store`."""
+
+    def __init__(self, store: SharedStore, name: str, *, rate: float, burst: int) -> None:
+        self._store = store
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.pauses = 0
+
+    async def acquire(self) -> None:
+        started = time.monotonic()
+        while True:
+            delay = await asyncio.to_thread(self._store.take_token, self.name, rate=self.rate, burst=self.burst)
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        waited = time.monotonic() - started
+        self.acquired += 1
+        if waited > 0.001:
+            self.waited += 1
+            self.wait_seconds += waited
+
+    async def pause(self, seconds: float) -> None:
+        await asyncio.to_thread(self._store.pause, self.name, seconds)
+        self.pauses += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "shared": True,
+            "ratePerSecond": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "waitSeconds": round(self.wait_seconds, 3),
+            "pauses": self.pauses,
+        }
+
+
+class SharedCache:
+    """
+    `TTLCache` counterpart backed by a `SharedStore`, so workers reuse each other's reads.
+
+    Values must be JSON-serialisable; keys are namespaced (per Holded account) and
+    flattened to strings. Hit/miss counters are per process.
+    """
+
+    def __init__(self, store: SharedStore, *, namespace: str, max_entries: int, ttl_seconds: float) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._store = store
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # As in `TTLCache`: pop() calls per key while a fetch for it is in flight.
+        self._generations: dict[str, int] = {}
+        self._fetching: dict[str, int] = {}
+
+    def _key(self, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join((self.namespace, *(str(p) for p in parts)))
+
+    async def pop(self, key: Hashable) -> None:
+        shared_key = self._key(key)
+        if shared_key in self._fetching:
+            self._generations[shared_key] += 1
+        await asyncio.to_thread(self._store.cache_delete, shared_key)
+        self.invalidations += 1
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        shared_key = self._key(key)
+        raw = await asyncio.to_thread(self._store.cache_get, shared_key)
+        if raw is not None:
+            self.hits += 1
+            return jsonio.loads(raw)
+        self.misses += 1
+        self._fetching[shared_key] = self._fetching.get(shared_key, 0) + 1
+        generation = self._generations.setdefault(shared_key, 0)
+        try:
+            value = await fetch()
+            # Skip the store if this process invalidated the key mid-fetch.
+            if self._generations[shared_key] == generation:
+                await asyncio.to_thread(
+                    self._store.cache_set,
+                    shared_key,
+                    jsonio.dumpb(value),
+                    ttl_seconds=self.ttl_seconds,
+                    max_entries=self.max_entries,
+                )
+        finally:
+            self._fetching[shared_key] -= 1
+            if not self._fetching[shared_key]:
+                del self._fetching[shared_key], self._generations[shared_key]
+        return value
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "shared": True,
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
@@ -1,8 +1,30 @@
 from __future__ import annotations
 
+import atexit
+import os
+import signal
+import sys
+
 from holded_mcp.mcp_server import mcp
+from holded_mcp.metrics import REGISTRY
+
+
+def _dump_metrics(target: str | None) -> None:
+    text = REGISTRY.render()
+    if target and target != "stderr":
+        with open(target, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    else:
+        sys.stderr.write(text)
+        sys.stderr.flush()
 
 
 def main() -> None:
+    # stdout carries the MCP protocol, so stats go to stderr or to a file:
+    # HOLDED_METRICS_DUMP=stderr|<path> dumps on exit; SIGUSR1 dumps at any time.
+    target = os.getenv("HOLDED_METRICS_DUMP")
+    if target:
+        atexit.register(_dump_metrics, target)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: _dump_metrics(target))
     mcp.run(transport="stdio")
-
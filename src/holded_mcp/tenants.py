@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Iterator
+
+from . import metrics
+from .cache import TTLCache
+from .holded_client import HoldedClient
+
+if TYPE_CHECKING:
+    from .config import Settings
+    from .shared import SharedCache
+
+
+def tenant_id(api_key: str) -> str:
+    """Stable, non-reversible label for an API key (used in metrics and stats)."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def make_cache(settings: Settings) -> TTLCache | SharedCache | None:
+    if settings.holded_cache_max_entries < 1:
+        return None
+    if settings.holded_shared_state:
+        from .shared import SharedCache, open_store
+
+        return SharedCache(
+            open_store(settings.holded_shared_state),
+            namespace="cache:" + tenant_id(settings.holded_api_key or ""),
+            max_entries=settings.holded_cache_max_entries,
+            ttl_seconds=settings.holded_cache_ttl_seconds,
+        )
+    return TTLCache(
+        max_entries=settings.holded_cache_max_entries,
+        ttl_seconds=settings.holded_cache_ttl_seconds,
+    )
+
+
+@dataclass
+class Tenant:
+    id: str
+    settings: Settings
+    holded: HoldedClient
+    cache: TTLCache | SharedCache | None
+    last_used: float = field(default_factory=time.monotonic)
+    leases: int = 0
+
+    @property
+    def busy(self) -> bool:
+        return self.leases > 0 or self.holded.in_flight > 0
+
+
+# Tenants leased by the current tool call (see `lease_scope`).
+_leases: ContextVar[list[Tenant] | None] = ContextVar("holded_tenant_leases", default=None)
+
+
+@contextmanager
+def lease_scope() -> Iterator[None]:
+    """
+    Keep every tenant returned by `TenantPool.get()` inside the block leased until it
+    exits, so its client is not closed between two requests of the same tool call.
+    """
+    held: list[Tenant] = []
+    token = _leases.set(held)
+    try:
+        yield
+    finally:
+        _leases.reset(token)
+        now = time.monotonic()
+        for tenant in held:
+            tenant.leases -= 1
+            tenant.last_used = now
+
+
+class TenantPool:
+    """
+    One `HoldedClient` (and invoice cache) per Holded API key, for servers shared by
+    several accounts.
+
+    At most `max_tenants` clients are kept; the least recently used idle one is closed to
+    make room, and clients unused for `idle_seconds` are closed by `evict_idle()`. A
+    client that is leased by a running tool call (`lease_scope`) or has requests in
+    flight is never closed, so the pool may briefly exceed its bound under load. Each
+    client has its own rate limiter, retries and connection pool.
+    """
+
+    def __init__(self, settings: Settings, *, max_tenants: int, idle_seconds: float) -> None:
+        if max_tenants < 1:
+            raise ValueError("max_tenants must be >= 1")
+        self._settings = settings
+        self.max_tenants = max_tenants
+        self.idle_seconds = idle_seconds
+        self._tenants: OrderedDict[str, Tenant] = OrderedDict()
+        self._closing: set[asyncio.Task[None]] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"idle": 0, "capacity": 0}
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def get(self, api_key: str) -> Tenant:
+        """The tenant for `api_key`, leased until the enclosing `lease_scope` exits."""
+        key_id = tenant_id(api_key)
+        tenant = self._tenants.get(key_id)
+        if tenant is not None:
+            self._tenants.move_to_end(key_id)
+            tenant.last_used = time.monotonic()
+            self.hits += 1
+            self._lease(tenant)
+            return tenant
+        self.misses += 1
+        settings = self._settings.model_copy(update={"holded_api_key": api_key})
+        tenant = Tenant(
+            id=key_id,
+            settings=settings,
+            holded=HoldedClient(settings, tenant=key_id),
+            cache=make_cache(settings),
+        )
+        self._tenants[key_id] = tenant
+        self._lease(tenant)
+        self._shrink()
+        metrics.TENANT_CLIENTS.set(len(self._tenants))
+        return tenant
+
+    @staticmethod
+    def _lease(tenant: Tenant) -> None:
+        held = _leases.get()
+        if held is not None:
+            tenant.leases += 1
+            held.append(tenant)
+
+    def _shrink(self) -> None:
+        excess = len(self._tenants) - self.max_tenants
+        if excess <= 0:
+            return
+        # Oldest first; the tenant just added is last and never a candidate.
+        for key_id, tenant in list(self._tenants.items())[:-1]:
+            if excess <= 0:
+                break
+            if not tenant.busy:
+                self._evict(key_id, "capacity")
+                excess -= 1
+
+    def _evict(self, key_id: str, reason: str) -> None:
+        tenant = self._tenants.pop(key_id)
+        self.evictions[reason] += 1
+        metrics.TENANT_EVICTIONS.inc(reason=reason)
+        task = asyncio.create_task(tenant.holded.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def evict_idle(self) -> int:
+        deadline = time.monotonic() - self.idle_seconds
+        stale = [
+            key_id
+            for key_id, tenant in self._tenants.items()
+            if tenant.last_used < deadline and not tenant.busy
+        ]
+        for key_id in stale:
+            self._evict(key_id, "idle")
+        metrics.TENANT_CLIENTS.set(len(self._tenants))
+        return len(stale)
+
+    async def run_evictions(self) -> None:
+        """Background loop closing idle clients; cancel it to stop."""
+        interval = max(1.0, min(60.0, self.idle_seconds / 2))
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    async def aclose(self) -> None:
+        tenants = list(self._tenants.values())
+        self._tenants.clear()
+        metrics.TENANT_CLIENTS.set(0)
+        await asyncio.gather(
+            *(t.holded.aclose() for t in tenants),
+            *self._closing,
+            return_exceptions=True,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._tenants),
+            "maxTenants": self.max_tenants,
+            "idleSeconds": self.idle_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": dict(self.evictions),
+        }
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+_collector: ContextVar[list[RequestTiming] | None] = ContextVar("holded_timings", default=None)
+
+# (phase, first mark, last mark); marks are httpcore trace events without their prefix.
+_SPANS = (
+    ("connect", "connect_tcp.started", "connect_tcp.complete"),
+    ("tls", "start_tls.started", "start_tls.complete"),
+    ("send", "send_request_headers.started", "send_request_body.complete"),
+    ("ttfb", "receive_response_headers.started", "receive_response_headers.complete"),
+    ("download", "receive_response_body.started", "receive_response_body.complete"),
+)
+
+_PHASE_ORDER = ("rateLimit", "pool", "connect", "tls", "send", "ttfb", "download", "decode")
+
+
+class RequestTiming:
+    """
+    Phase breakdown of one HTTP attempt to Holded, fed by httpcore's `trace` extension.
+
+    DNS resolution happens inside `connect`; `pool` is the wait for a pooled connection,
+    `rateLimit` the wait for a token bucket slot and `decode` JSON parsing. Phases that
+    did not happen (e.g. `connect` on a reused connection) are left out.
+    """
+
+    __slots__ = ("method", "route", "attempt", "hedge", "status", "started", "marks", "phases", "total")
+
+    def __init__(self, method: str, route: str, *, attempt: int = 0, rate_limit_wait: float = 0.0) -> None:
+        self.method = method
+        self.route = route
+        self.attempt = attempt
+        self.hedge = False
+        self.status = "error"
+        self.started = time.perf_counter()
+        self.marks: dict[str, float] = {}
+        self.phases: dict[str, float] = {"rateLimit": rate_limit_wait} if rate_limit_wait > 0.0005 else {}
+        self.total: float | None = None
+
+    async def trace(self, name: str, info: dict[str, Any]) -> None:
+        # "http11.send_request_headers.started" -> "send_request_headers.started"
+        self.marks[name.split(".", 1)[-1]] = time.perf_counter()
+
+    def finish(self) -> None:
+        if self.total is not None:
+            return
+        self.total = time.perf_counter() - self.started
+        marks = self.marks
+        first = marks.get("connect_tcp.started", marks.get("send_request_headers.started"))
+        if first is not None:
+            self.phases["pool"] = first - self.started
+        for phase, start, end in _SPANS:
+            if phase == "send" and end not in marks:
+                end = "send_request_headers.complete"
+            if start in marks and end in marks:
+                self.phases[phase] = marks[end] - marks[start]
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "method": self.method,
+            "route": self.route,
+            "status": self.status,
+            "attempt": self.attempt,
+            "totalMs": round((self.total or 0.0) * 1000, 2),
+            "phasesMs": {
+                name: round(self.phases[name] * 1000, 2) for name in _PHASE_ORDER if name in self.phases
+            },
+        }
+        if self.marks:
+            data["connectionReused"] = "connect_tcp.started" not in self.marks
+        if self.hedge:
+            data["hedge"] = True
+        return data
+
+
+@contextmanager
+def collect_timings() -> Iterator[list[RequestTiming]]:
+    """Collect the timing of every Holded request made in this context (and tasks it spawns)."""
+    timings: list[RequestTiming] = []
+    token = _collector.set(timings)
+    try:
+        yield timings
+    finally:
+        _collector.reset(token)
+
+
+def current_collector() -> list[RequestTiming] | None:
+    return _collector.get()
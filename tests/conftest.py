@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from fake_holded import BASE_PATH, FakeHolded
+
+from holded_mcp.config import Settings
+from holded_mcp.holded_client import HoldedClient
+
+
+def make_settings(**overrides: Any) -> Settings:
+    return Settings(
+        **{
+            "HOLDED_API_KEY": "test",
+            "HOLDED_BASE_URL": "http://fake" + BASE_PATH,
+            "HOLDED_MAX_RETRIES": 0,
+            **overrides,
+        }
+    )
+
+
+@pytest.fixture
+def fake() -> FakeHolded:
+    return FakeHolded(invoices=120, latency_ms=0.0, jitter_ms=0.0, payload_kb=0.0, pdf_kb=1)
+
+
+@pytest.fixture
+def client_factory(fake: FakeHolded):
+    """`client_factory(**settings)` builds a HoldedClient served by `fake`; all are closed afterwards."""
+    clients: list[HoldedClient] = []
+
+    def factory(**overrides: Any) -> HoldedClient:
+        client = HoldedClient(make_settings(**overrides), transport=fake.transport())
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        asyncio.run(client.aclose())
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from holded_mcp.admission import AdmissionController, AdmissionMiddleware
+
+
+def _stack(controller: AdmissionController, release: asyncio.Event, started: asyncio.Event):
+    async def app(scope, receive, send):
+        started.set()
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    middleware = AdmissionMiddleware(app, controller=controller, client_header="X-Holded-Api-Key")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://test")
+
+
+async def _with_one_in_flight(controller: AdmissionController, *, headers=None, free_after: float | None = None):
+    """Hold one request in the app, send a second; returns the second response."""
+    release, started = asyncio.Event(), asyncio.Event()
+    async with _stack(controller, release, started) as http:
+        first = asyncio.create_task(http.post("/mcp", json={}, headers=headers))
+        await started.wait()
+        if free_after is not None:
+            asyncio.get_running_loop().call_later(free_after, release.set)
+        second = await http.post("/mcp", json={}, headers=headers)
+        release.set()
+        assert (await first).status_code == 200
+        return second
+
+
+def _assert_shed(response: httpx.Response) -> None:
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    body = response.json()
+    assert body["jsonrpc"] == "2.0" and body["id"] is None
+    assert body["error"]["code"] == -32000
+
+
+def test_full_queue_is_shed_with_a_json_rpc_error():
+    controller = AdmissionController(max_concurrent=1, max_per_client=0, queue_size=0, queue_timeout=5)
+    _assert_shed(asyncio.run(_with_one_in_flight(controller)))
+    assert controller.shed == {"queue_full": 1, "timeout": 0}
+
+
+def test_queue_timeout_is_shed_with_a_json_rpc_error():
+    controller = AdmissionController(max_concurrent=1, max_per_client=0, queue_size=1, queue_timeout=0.05)
+    _assert_shed(asyncio.run(_with_one_in_flight(controller)))
+    assert controller.shed == {"queue_full": 0, "timeout": 1}
+    assert controller.queued == 0 and controller.peak_queued == 1
+
+
+def test_queued_request_runs_once_a_slot_frees():
+    controller = AdmissionController(max_concurrent=1, max_per_client=0, queue_size=1, queue_timeout=5)
+    response = asyncio.run(_with_one_in_flight(controller, free_after=0.02))
+    assert response.status_code == 200
+    assert controller.admitted == 2 and controller.active == 0
+
+
+def test_per_client_cap_counts_each_api_key():
+    controller = AdmissionController(max_concurrent=0, max_per_client=1, queue_size=0, queue_timeout=5)
+    _assert_shed(asyncio.run(_with_one_in_flight(controller, headers={"X-Holded-Api-Key": "key-a"})))
+
+    async def other_key():
+        release, started = asyncio.Event(), asyncio.Event()
+        async with _stack(controller, release, started) as http:
+            first = asyncio.create_task(http.post("/mcp", json={}, headers={"X-Holded-Api-Key": "key-a"}))
+            await started.wait()
+            second = asyncio.create_task(http.post("/mcp", json={}, headers={"X-Holded-Api-Key": "key-b"}))
+            # key-b is admitted while key-a still holds its slot (a shed would finish at once).
+            while controller.active < 2 and not second.done():
+                await asyncio.sleep(0.001)
+            active = controller.active
+            release.set()
+            await first
+            return active, await second
+
+    active, response = asyncio.run(other_key())
+    assert active == 2 and response.status_code == 200
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from holded_mcp.bulk import run_bounded, run_operation
+from holded_mcp.errors import HoldedAPIError
+
+
+def test_results_keep_input_order_with_per_item_errors():
+    in_flight = peak = 0
+
+    async def fn(n: int) -> int:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            # Later items finish first.
+            await asyncio.sleep((10 - n) / 1000)
+            if n == 3:
+                raise HoldedAPIError(message="Not found", status_code=404)
+            if n == 6:
+                raise ValueError("bad item")
+            return n * 10
+        finally:
+            in_flight -= 1
+
+    outcomes = asyncio.run(run_bounded(list(range(10)), fn, concurrency=3))
+    assert [o["result"] for o in outcomes if o["ok"]] == [0, 10, 20, 40, 50, 70, 80, 90]
+    assert outcomes[3] == {"ok": False, "error": HoldedAPIError(message="Not found", status_code=404).to_dict()}
+    assert outcomes[6]["error"]["message"] == "bad item"
+    assert peak == 3
+
+
+def test_unexpected_errors_propagate():
+    async def fn(item: dict) -> str:
+        return item["missing"]
+
+    with pytest.raises(KeyError):
+        asyncio.run(run_bounded([{}], fn, concurrency=1))
+
+
+def test_run_operation_through_the_client(fake, client_factory):
+    client = client_factory()
+    ops = [
+        {"op": "get", "document_id": fake.ids()[0], "fields": ["id"]},
+        {"op": "get", "document_id": "0" * 24 + "missing"},
+        {"op": "pay", "document_id": fake.ids()[1]},
+    ]
+    outcomes = asyncio.run(run_bounded(ops, lambda op: run_operation(client, op), concurrency=2))
+    assert outcomes[0] == {"ok": True, "result": {"id": fake.ids()[0]}}
+    assert outcomes[1]["error"]["statusCode"] == 404
+    assert "amount are required" in outcomes[2]["error"]["message"]
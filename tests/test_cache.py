@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from holded_mcp.cache import TTLCache
+from holded_mcp.shared import SharedCache, SQLiteSharedStore
+
+
+@pytest.fixture(params=["local", "shared"])
+def cache(request, tmp_path):
+    if request.param == "local":
+        yield TTLCache(max_entries=10, ttl_seconds=60)
+        return
+    store = SQLiteSharedStore(str(tmp_path / "shared.db"))
+    yield SharedCache(store, namespace="test", max_entries=10, ttl_seconds=60)
+    store.close()
+
+
+async def _invalidated_mid_fetch(cache) -> tuple[str, str]:
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def stale_fetch():
+        started.set()
+        await release.wait()
+        return "before-update"
+
+    async def fresh_fetch():
+        return "after-update"
+
+    reader = asyncio.create_task(cache.get_or_fetch(("invoice", "1"), stale_fetch))
+    await started.wait()
+    # A write tool updates the document while the GET is still in flight.
+    await cache.pop(("invoice", "1"))
+    release.set()
+    first = await reader
+    return first, await cache.get_or_fetch(("invoice", "1"), fresh_fetch)
+
+
+def test_pop_during_fetch_keeps_the_stale_value_out(cache):
+    first, second = asyncio.run(_invalidated_mid_fetch(cache))
+    assert first == "before-update"
+    assert second == "after-update"
+
+
+def test_fetched_values_are_cached(cache):
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return {"id": "1"}
+
+    async def scenario():
+        return [await cache.get_or_fetch(("invoice", "1"), fetch) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [{"id": "1"}] * 3
+    assert calls == 1
+    assert cache.stats()["hits"] == 2
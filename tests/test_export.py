@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+
+import pytest
+
+from holded_mcp.errors import HoldedAPIError
+from holded_mcp.export import export_invoices, state_path
+
+
+def _fail_after(fake, requests):
+    handle = fake.handle
+
+    async def failing(method, path, query):
+        if fake.requests >= requests:
+            return 500, {}, b'{"status":0,"info":"boom"}'
+        return await handle(method, path, query)
+
+    fake.handle = failing
+    return lambda: setattr(fake, "handle", handle)
+
+
+def _csv_ids(path):
+    with open(path, newline="", encoding="utf-8") as handle:
+        return [row["id"] for row in csv.DictReader(handle)]
+
+
+def test_export_resumes_after_an_interruption(fake, client_factory, tmp_path):
+    client = client_factory()
+    output = str(tmp_path / "invoices.csv")
+    restore = _fail_after(fake, 2)
+    with pytest.raises(HoldedAPIError):
+        asyncio.run(export_invoices(client, output, fmt="csv", page_size=25, prefetch=1, chunk_rows=25))
+    restore()
+    assert _csv_ids(output) == fake.ids()[:50]
+
+    summary = asyncio.run(export_invoices(client, output, fmt="csv", resume=True, page_size=25, chunk_rows=25))
+    assert summary["mode"] == "resume"
+    assert summary["invoices"] == len(fake.ids()) - 50
+    assert _csv_ids(output) == fake.ids()
+
+    # A finished export resumed again fetches a delta with updatedFrom.
+    summary = asyncio.run(export_invoices(client, output, fmt="csv", resume=True, page_size=25))
+    assert summary["mode"] == "delta" and summary["updatedFrom"] is not None
+
+
+def test_export_starts_over_when_the_output_is_gone(fake, client_factory, tmp_path):
+    client = client_factory()
+    output = tmp_path / "invoices.ndjson"
+    restore = _fail_after(fake, 2)
+    with pytest.raises(HoldedAPIError):
+        asyncio.run(export_invoices(client, str(output), fmt="ndjson", page_size=25, prefetch=1, chunk_rows=25))
+    restore()
+    assert json.loads(open(state_path(str(output))).read())["position"] > 0
+    output.unlink()
+
+    summary = asyncio.run(export_invoices(client, str(output), fmt="ndjson", resume=True, page_size=25))
+    assert summary["mode"] == "full"
+    data = output.read_bytes()
+    assert b"\0" not in data
+    assert [json.loads(line)["id"] for line in data.splitlines()] == fake.ids()
+
+
+def test_export_rejects_resuming_with_other_options(client_factory, tmp_path):
+    client = client_factory()
+    output = str(tmp_path / "invoices.csv")
+    asyncio.run(export_invoices(client, output, fmt="csv", page_size=50))
+    with pytest.raises(ValueError, match="different options"):
+        asyncio.run(export_invoices(client, output, fmt="csv", lines=True, resume=True))
+
+
+def test_csv_flattens_paths_through_lists(fake, client_factory, tmp_path):
+    client = client_factory()
+    output = str(tmp_path / "invoices.csv")
+    asyncio.run(export_invoices(client, output, fmt="csv", fields=["id", "products.name"], page_size=50))
+    with open(output, newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert len(rows) == len(fake.ids())
+    assert json.loads(rows[0]["products.name"]) == ["hosting", "support"]
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+from conftest import make_settings
+
+from holded_mcp import metrics
+from holded_mcp.errors import HoldedAPIError
+from holded_mcp.holded_client import HoldedClient
+
+
+def _client(handler, **overrides) -> HoldedClient:
+    return HoldedClient(make_settings(**overrides), transport=httpx.MockTransport(handler))
+
+
+def test_warmup_is_anonymous_and_counted():
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(401)
+
+    async def scenario():
+        client = _client(handler, HOLDED_RATE_LIMIT_PER_SECOND=1, HOLDED_RATE_LIMIT_BURST=1)
+        await client.warmup(2)
+        stats = client.stats()
+        await client.aclose()
+        return stats
+
+    before = metrics.UPSTREAM_REQUESTS.value(method="HEAD", route="/", status="401")
+    stats = asyncio.run(scenario())
+    assert [request.method for request in seen] == ["HEAD", "HEAD"]
+    assert all("key" not in request.headers for request in seen)
+    assert metrics.UPSTREAM_REQUESTS.value(method="HEAD", route="/", status="401") == before + 2
+    # No rate-limit budget spent on it.
+    assert stats["rateLimiter"]["acquired"] == 0
+
+
+def test_warmup_skipped_while_the_breaker_is_open():
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200)
+
+    async def scenario():
+        client = _client(handler, HOLDED_BREAKER_FAILURES=1)
+        client._record_outcome(False)
+        await client.warmup(1)
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert seen == []
+
+
+def test_breaker_opens_then_probes_then_closes():
+    calls: list[str] = []
+    healthy = False
+    client: HoldedClient
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(client._breaker.state)
+        return httpx.Response(200, json={"ok": True}) if healthy else httpx.Response(503, json={})
+
+    async def attempt() -> int | None:
+        try:
+            await client.request("GET", "/documents/invoice/abc")
+        except HoldedAPIError as exc:
+            return exc.status_code
+        return 200
+
+    async def scenario():
+        nonlocal client, healthy
+        client = _client(handler, HOLDED_BREAKER_FAILURES=2, HOLDED_BREAKER_RESET_SECONDS=0.05, HOLDED_COALESCE_GETS=False)
+        outcomes = [await attempt(), await attempt()]
+        assert client._breaker.state == "open"
+        # Open: failed fast, Holded is not called.
+        outcomes.append(await attempt())
+        await asyncio.sleep(0.06)
+        # The first call after the reset delay is the half-open probe; it fails and reopens.
+        outcomes.append(await attempt())
+        assert client._breaker.state == "open"
+        await asyncio.sleep(0.06)
+        healthy = True
+        outcomes.append(await attempt())
+        state = client._breaker.state
+        await client.aclose()
+        return outcomes, state
+
+    outcomes, state = asyncio.run(scenario())
+    assert outcomes == [503, 503, None, 503, 200]
+    assert calls == ["closed", "closed", "half_open", "half_open"]
+    assert state == "closed"
+
+
+def test_hedged_get_cancels_the_slower_request():
+    cancelled: list[str] = []
+    sent = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal sent
+        sent += 1
+        if sent == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append("original")
+                raise
+        return httpx.Response(200, json={"id": "abc", "from": sent})
+
+    async def scenario():
+        client = _client(
+            handler,
+            HOLDED_HEDGE_GETS=True,
+            HOLDED_HEDGE_MIN_DELAY_SECONDS=0.01,
+            HOLDED_HEDGE_MAX_DELAY_SECONDS=0.02,
+        )
+        result = await client.request("GET", "/documents/invoice/abc")
+        await asyncio.sleep(0.01)  # let the loser's cancellation run
+        stats = client.stats()["hedging"]
+        await client.aclose()
+        return result, stats
+
+    result, stats = asyncio.run(scenario())
+    assert result == {"id": "abc", "from": 2}
+    assert stats["sent"] == 1 and stats["won"] == 1
+    assert cancelled == ["original"]
+
+
+def test_429_is_retried_after_pausing_every_caller():
+    seen: list[float] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(time.monotonic())
+        if len(seen) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.05"})
+        return httpx.Response(200, json={"status": 1})
+
+    async def scenario():
+        # POST is not idempotent, but a 429 was never processed, so it is still retried.
+        client = _client(handler, HOLDED_MAX_RETRIES=1)
+        result = await client.request("POST", "/contacts", json_body={"name": "Acme"})
+        stats = client.stats()
+        await client.aclose()
+        return result, stats
+
+    result, stats = asyncio.run(scenario())
+    assert result == {"status": 1}
+    assert len(seen) == 2 and seen[1] - seen[0] >= 0.05
+    assert stats["throttled"] == 1 and stats["retries"] == 1
+    assert stats["rateLimiter"]["pauses"] == 1
+
+
+def test_429_with_a_long_retry_after_is_not_retried():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(429, headers={"Retry-After": "3600"}, json={"info": "slow down"})
+
+    async def scenario():
+        client = _client(handler, HOLDED_MAX_RETRIES=3)
+        try:
+            await client.request("GET", "/contacts")
+        except HoldedAPIError as exc:
+            return exc.status_code
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(scenario()) == 429
+    assert calls == 1
+
+
+def test_identical_concurrent_gets_share_one_request():
+    seen: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url.params))
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json=[{"id": "abc"}])
+
+    async def scenario():
+        client = _client(handler)
+        same = [client.request("GET", "/documents/invoice", params={"page": 1}) for _ in range(3)]
+        other = client.request("GET", "/documents/invoice", params={"page": 2})
+        # A caller giving up must not cancel the request the others wait on.
+        quitter = asyncio.ensure_future(client.request("GET", "/documents/invoice", params={"page": 1}))
+        await asyncio.sleep(0)
+        quitter.cancel()
+        results = await asyncio.gather(*same, other)
+        stats = client.stats()
+        await client.aclose()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results == [[{"id": "abc"}]] * 4
+    assert sorted(seen) == ["page=1", "page=2"]
+    assert stats["coalesced"] == 3 and stats["inflight"] == 0
+
+
+def test_coalesced_callers_share_the_error():
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(404, json={"info": "not found"})
+
+    async def scenario():
+        client = _client(handler)
+        results = await asyncio.gather(
+            *(client.request("GET", "/documents/invoice/missing") for _ in range(2)), return_exceptions=True
+        )
+        await client.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert [type(result) for result in results] == [HoldedAPIError, HoldedAPIError]
+    assert all(result.status_code == 404 for result in results)
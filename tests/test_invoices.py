@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+
+from holded_mcp.invoices import iter_invoice_pages, iter_invoices
+
+
+def test_iter_invoices_walks_every_page(fake, client_factory):
+    client = client_factory()
+
+    async def scenario():
+        return [doc["id"] async for doc in iter_invoices(client, page_size=25, prefetch=3)]
+
+    assert asyncio.run(scenario()) == fake.ids()
+
+
+def test_iter_invoices_follows_a_capped_page_size(fake, client_factory):
+    # Holded returns at most 50 invoices whatever `limit` asks for.
+    fake.max_page_size = 50
+    client = client_factory()
+
+    async def scenario():
+        return [doc["id"] async for doc in iter_invoices(client, page_size=100, prefetch=3)]
+
+    assert asyncio.run(scenario()) == fake.ids()
+
+
+def test_iter_invoice_pages_reports_resume_offsets(fake, client_factory):
+    fake.max_page_size = 30
+    client = client_factory()
+
+    async def scenario():
+        return [(offset, len(page)) async for offset, page in iter_invoice_pages(client, page_size=40)]
+
+    pages = asyncio.run(scenario())
+    assert [offset for offset, _ in pages] == [30, 60, 90, 120, 120]
+    assert sum(size for _, size in pages) == len(fake.ids())
+
+
+def test_iter_invoices_resumes_from_offset(fake, client_factory):
+    client = client_factory()
+
+    async def scenario():
+        return [doc["id"] async for doc in iter_invoices(client, page_size=50, offset=70)]
+
+    assert asyncio.run(scenario()) == fake.ids()[70:]
+
+
+def test_iter_invoices_stops_when_offset_is_ignored(fake, client_factory):
+    handle = fake.handle
+
+    async def without_offset(method, path, query):
+        return await handle(method, path, {k: v for k, v in query.items() if k != "offset"})
+
+    fake.handle = without_offset
+    fake.max_page_size = 50
+    client = client_factory()
+
+    async def scenario(page_size):
+        ids = []
+        async for doc in iter_invoices(client, page_size=page_size, prefetch=3):
+            ids.append(doc["id"])
+            if len(ids) > len(fake.ids()):
+                break
+        return ids
+
+    # Short (capped) pages and full pages alike: the repeated page ends the walk.
+    assert asyncio.run(scenario(100)) == fake.ids()[:50]
+    assert asyncio.run(scenario(50)) == fake.ids()[:50]
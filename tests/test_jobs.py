@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from functools import partial
+
+import pytest
+
+from holded_mcp.bulk import run_operation
+from holded_mcp.jobs import JobQueue
+
+PAY = {"op": "pay", "document_id": "", "date": 1700000000, "amount": 12.5}
+
+
+def _queue(path) -> JobQueue:
+    return JobQueue(str(path), concurrency=2, max_attempts=3, backoff_seconds=0.0, max_backoff_seconds=0.0)
+
+
+def _record_posts(fake) -> list[str]:
+    posts: list[str] = []
+    handle = fake.handle
+
+    async def recording(method, path, query):
+        if method == "POST":
+            posts.append(path)
+        return await handle(method, path, query)
+
+    fake.handle = recording
+    return posts
+
+
+async def _drain(queue: JobQueue, client, job_ids: list[str]) -> list[dict]:
+    runner = asyncio.create_task(queue.run(partial(run_operation, client)))
+    try:
+        while any(job["status"] in ("queued", "running") for job in queue.get(job_ids)):
+            await asyncio.sleep(0.01)
+    finally:
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+    return queue.get(job_ids)
+
+
+def test_repeated_operations_run_again_by_default(fake, client_factory, tmp_path):
+    client = client_factory()
+    posts = _record_posts(fake)
+    queue = _queue(tmp_path / "jobs.db")
+    op = {**PAY, "document_id": fake.ids()[0]}
+    first, second = asyncio.run(queue.enqueue(op)), asyncio.run(queue.enqueue(op))
+    assert first["id"] != second["id"]
+    assert not first["deduplicated"] and not second["deduplicated"]
+
+    jobs = asyncio.run(_drain(queue, client, [first["id"], second["id"]]))
+    assert [job["status"] for job in jobs] == ["succeeded", "succeeded"]
+    assert len(posts) == 2
+    queue.close()
+
+
+def test_dedupe_and_idempotency_keys_return_the_existing_job(fake, client_factory, tmp_path):
+    client = client_factory()
+    posts = _record_posts(fake)
+    queue = _queue(tmp_path / "jobs.db")
+    op = {**PAY, "document_id": fake.ids()[0]}
+    first = asyncio.run(queue.enqueue(op, dedupe=True))
+    again = asyncio.run(queue.enqueue(op, dedupe=True))
+    assert again["id"] == first["id"] and again["deduplicated"]
+
+    keyed = asyncio.run(queue.enqueue(op, idempotency_key="pay-1"))
+    assert asyncio.run(queue.enqueue(op, idempotency_key="pay-1"))["id"] == keyed["id"]
+    with pytest.raises(ValueError, match="different operation"):
+        asyncio.run(queue.enqueue({**op, "amount": 99}, idempotency_key="pay-1"))
+
+    asyncio.run(_drain(queue, client, [first["id"], keyed["id"]]))
+    # A finished job is still returned for its key, and not run again.
+    replay = asyncio.run(queue.enqueue(op, dedupe=True))
+    assert replay["deduplicated"] and replay["status"] == "succeeded"
+    assert len(posts) == 2
+    queue.close()
+
+
+def test_queued_jobs_survive_a_restart(fake, client_factory, tmp_path):
+    client = client_factory()
+    path = tmp_path / "jobs.db"
+    queue = _queue(path)
+    job = asyncio.run(queue.enqueue({"op": "approve", "document_id": fake.ids()[1]}))
+    queue.close()
+
+    restarted = _queue(path)
+    [done] = asyncio.run(_drain(restarted, client, [job["id"]]))
+    assert done["status"] == "succeeded" and done["attempts"] == 1
+    restarted.close()
+
+
+def test_throttled_jobs_are_retried(fake, client_factory, tmp_path):
+    client = client_factory()
+    handle = fake.handle
+    throttled = []
+
+    async def throttle_first(method, path, query):
+        if method == "POST" and not throttled:
+            throttled.append(path)
+            return 429, {"retry-after": "0"}, b'{"status":0,"info":"Too many requests"}'
+        return await handle(method, path, query)
+
+    fake.handle = throttle_first
+    queue = _queue(tmp_path / "jobs.db")
+    job = asyncio.run(queue.enqueue({**PAY, "document_id": fake.ids()[2]}))
+    [done] = asyncio.run(_drain(queue, client, [job["id"]]))
+    assert done["status"] == "succeeded" and done["attempts"] == 2
+    queue.close()
+
+
+def test_failed_jobs_are_not_retried(client_factory, tmp_path):
+    client = client_factory()
+    queue = _queue(tmp_path / "jobs.db")
+    job = asyncio.run(queue.enqueue({**PAY, "document_id": "0" * 24 + "missing"}))
+    [done] = asyncio.run(_drain(queue, client, [job["id"]]))
+    assert done["status"] == "failed" and done["attempts"] == 1
+    assert done["error"]["statusCode"] == 404
+    queue.close()
+
+
+def test_concurrent_enqueues_while_running(fake, client_factory, tmp_path):
+    client = client_factory()
+    queue = _queue(tmp_path / "jobs.db")
+
+    async def scenario():
+        runner = asyncio.create_task(queue.run(partial(run_operation, client)))
+        # Journal writes run in threads; they must not trip over each other or the worker's.
+        jobs = await asyncio.gather(
+            *(queue.enqueue({"op": "approve", "document_id": doc_id}) for doc_id in fake.ids()[:20])
+        )
+        job_ids = [job["id"] for job in jobs]
+        while any(job["status"] in ("queued", "running") for job in queue.get(job_ids)):
+            await asyncio.sleep(0.01)
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+        return queue.get(job_ids)
+
+    jobs = asyncio.run(scenario())
+    assert [job["status"] for job in jobs] == ["succeeded"] * 20
+    queue.close()
+
+
+def test_stopping_during_a_claim_requeues_the_job(fake, client_factory, tmp_path):
+    queue = _queue(tmp_path / "jobs.db")
+    claiming, release = threading.Event(), threading.Event()
+    claim = queue._claim
+
+    def slow_claim():
+        claiming.set()
+        release.wait()
+        return claim()
+
+    queue._claim = slow_claim
+
+    async def scenario():
+        job = await queue.enqueue({"op": "approve", "document_id": fake.ids()[0]})
+        runner = asyncio.create_task(queue.run(partial(run_operation, client_factory())))
+        await asyncio.to_thread(claiming.wait)
+        runner.cancel()
+        release.set()
+        await asyncio.gather(runner, return_exceptions=True)
+        return job
+
+    job = asyncio.run(scenario())
+    [after] = queue.get([job["id"]])
+    assert after["status"] == "queued" and after["attempts"] == 0
+    queue.close()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fake_holded import BASE_PATH
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from holded_mcp import mcp_server
+from holded_mcp.holded_client import HoldedClient
+
+
+@pytest.fixture
+def serve(fake, monkeypatch):
+    """`serve(**env)` runs the MCP server in memory against `fake`, yielding a client session."""
+    monkeypatch.setattr(mcp_server, "HoldedClient", lambda settings: HoldedClient(settings, transport=fake.transport()))
+
+    def serve(**env: str):
+        for name, value in {
+            "HOLDED_API_KEY": "test",
+            "HOLDED_BASE_URL": "http://fake" + BASE_PATH,
+            "HOLDED_MAX_RETRIES": "0",
+            **env,
+        }.items():
+            monkeypatch.setenv(name, value)
+        return create_connected_server_and_client_session(mcp_server.mcp._mcp_server)
+
+    return serve
+
+
+def test_timings_are_reported_in_result_meta(fake, serve):
+    async def scenario(**env):
+        async with serve(**env) as session:
+            return await session.call_tool("holded_invoices_get", {"documentId": fake.ids()[0]})
+
+    plain = asyncio.run(scenario())
+    assert not plain.isError and plain.meta is None
+
+    timed = asyncio.run(scenario(HOLDED_TIMINGS="true"))
+    assert not timed.isError
+    assert timed.structuredContent == plain.structuredContent
+    [timing] = timed.meta["holdedTimings"]
+    assert timing["method"] == "GET" and timing["route"] == "/documents/invoice/{id}"
+    assert timing["status"] == "200"
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+
+from holded_mcp.invoices import iter_invoices
+from holded_mcp.mirror import InvoiceMirror
+
+
+def test_sync_loads_then_reads_locally(fake, client_factory, tmp_path):
+    client = client_factory()
+    mirror = InvoiceMirror(str(tmp_path / "mirror.db"), max_age_seconds=300)
+
+    async def scenario():
+        first = await mirror.sync(client)
+        second = await mirror.sync(client)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    mirror.close()
+    assert first["mode"] == "full" and first["upserted"] == len(fake.ids())
+    assert second["mode"] == "delta" and second["updatedFrom"] is not None
+
+
+def test_concurrent_cold_refreshes_sync_once(fake, client_factory, tmp_path):
+    client = client_factory()
+    single = InvoiceMirror(str(tmp_path / "single.db"), max_age_seconds=300)
+    asyncio.run(single.refresh(client))
+    single.close()
+    one_sync = fake.requests
+
+    mirror = InvoiceMirror(str(tmp_path / "mirror.db"), max_age_seconds=300)
+
+    async def scenario():
+        await asyncio.gather(*(mirror.refresh(client) for _ in range(5)))
+
+    fake.requests = 0
+    asyncio.run(scenario())
+    assert fake.requests == one_sync
+    assert mirror.count() == len(fake.ids())
+    mirror.close()
+
+
+def test_mark_stale_forces_a_delta_sync(fake, client_factory, tmp_path):
+    client = client_factory()
+    mirror = InvoiceMirror(str(tmp_path / "mirror.db"), max_age_seconds=300)
+    asyncio.run(mirror.refresh(client))
+    assert mirror.is_fresh()
+    mirror.mark_stale()
+    assert not mirror.is_fresh()
+    before = fake.requests
+    asyncio.run(mirror.refresh(client))
+    assert fake.requests > before and mirror.is_fresh()
+    mirror.close()
+
+
+def test_query_date_range_matches_upstream_filter(client_factory, tmp_path):
+    # FakeHolded dates are hourly from 2023-11-14T22:13:20Z.
+    client = client_factory()
+    mirror = InvoiceMirror(str(tmp_path / "mirror.db"), max_age_seconds=300)
+
+    async def upstream():
+        return [doc["id"] async for doc in iter_invoices(client, date_from="2023-11-16", date_to="2023-11-17")]
+
+    asyncio.run(mirror.sync(client))
+    local = [doc["id"] for doc in mirror.query(date_from="2023-11-16", date_to="2023-11-17")]
+    mirror.close()
+    assert local == asyncio.run(upstream())
+    assert len(local) == 48
+
+
+def test_put_during_a_full_load_is_kept(fake, client_factory, tmp_path):
+    client = client_factory()
+    mirror = InvoiceMirror(str(tmp_path / "mirror.db"), max_age_seconds=300)
+    asyncio.run(mirror.sync(client))
+    handle = fake.handle
+
+    async def scenario():
+        reached, release = asyncio.Event(), asyncio.Event()
+
+        async def held(method, path, query):
+            reached.set()
+            await release.wait()
+            return await handle(method, path, query)
+
+        fake.handle = held
+        load = asyncio.create_task(mirror.sync(client, full=True))
+        await reached.wait()
+        puts = asyncio.gather(*(mirror.put({"id": f"local{i}", "date": 0}) for i in range(2)))
+        await asyncio.sleep(0.01)
+        release.set()
+        await load
+        await puts
+
+    asyncio.run(scenario())
+    assert mirror.get("local0") is not None and mirror.get("local1") is not None
+    # Full load then one generation per put, never going back.
+    assert mirror.generation == 4
+    assert [doc["id"] for doc in mirror.changes(2)] == ["local0", "local1"]
+    mirror.close()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from holded_mcp.invoices import update_invoice
+from holded_mcp.payloads import PayloadError, validate_invoice_payload
+
+ITEM = {"name": "Hosting", "units": 1, "subtotal": 10.0}
+CREATE = {"contactName": "Acme", "date": 1714521600, "items": [ITEM]}
+UPDATE = {"desc": "Renovación", "items": [ITEM]}
+
+
+def _errors(payload, *, mode, create):
+    try:
+        validate_invoice_payload(payload, mode=mode, create=create)
+    except PayloadError as exc:
+        return [error["field"] for error in exc.errors]
+    return []
+
+
+@pytest.mark.parametrize("mode", ["strict", "lenient", "off"])
+@pytest.mark.parametrize("create, payload", [(True, CREATE), (False, UPDATE)])
+def test_valid_payloads_pass_every_mode(mode, create, payload):
+    assert _errors(payload, mode=mode, create=create) == []
+
+
+@pytest.mark.parametrize("create", [True, False])
+def test_lenient_checks_known_fields_only(create):
+    base = CREATE if create else UPDATE
+    assert _errors({**base, "date": "2024-05-01", "items": [{"name": "x"}]}, mode="lenient", create=create) == [
+        "date",
+        "items.0.units",
+        "items.0.subtotal",
+    ]
+    # Unknown fields and coercible values go through.
+    assert _errors({**base, "extra": 1, "items": [{**ITEM, "units": "2"}]}, mode="lenient", create=create) == []
+
+
+@pytest.mark.parametrize("create", [True, False])
+def test_strict_rejects_unknown_fields_and_coercion(create):
+    base = CREATE if create else UPDATE
+    assert _errors({**base, "extra": 1, "items": [{**ITEM, "units": "2"}]}, mode="strict", create=create) == [
+        "items.0.units",
+        "extra",
+    ]
+
+
+def test_create_needs_a_date_and_a_contact():
+    assert _errors({"items": [ITEM]}, mode="lenient", create=True) == ["date"]
+    assert _errors({"date": 1714521600, "items": [ITEM]}, mode="lenient", create=True) == ["payload"]
+    # An update only sends what changes.
+    assert _errors({"items": [ITEM]}, mode="lenient", create=False) == []
+
+
+@pytest.mark.parametrize("create", [True, False])
+def test_off_skips_the_check(create):
+    assert _errors({"date": "tomorrow", "items": "none"}, mode="off", create=create) == []
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unknown payload validation mode"):
+        validate_invoice_payload(CREATE, mode="loose", create=True)
+
+
+def test_validation_is_opt_in(fake, client_factory):
+    doc_id = fake.ids()[0]
+    bad = {"date": "tomorrow"}
+
+    # Off by default: the payload is sent and Holded decides.
+    result = asyncio.run(update_invoice(client_factory(), doc_id, bad))
+    assert result["status"] == 1
+
+    client = client_factory(HOLDED_PAYLOAD_VALIDATION="lenient")
+    sent = fake.requests
+    with pytest.raises(PayloadError):
+        asyncio.run(update_invoice(client, doc_id, bad))
+    assert fake.requests == sent
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import zipfile
+
+import httpx
+import pytest
+from conftest import make_settings
+
+from holded_mcp.holded_client import HoldedClient
+from holded_mcp.pdf_export import export_pdfs
+
+
+def test_export_pdfs_writes_one_file_per_invoice(fake, client_factory, tmp_path):
+    client = client_factory()
+    ids = fake.ids()[:5]
+    summary = asyncio.run(export_pdfs(client, [(i, i) for i in ids], output_dir=str(tmp_path), concurrency=2))
+    assert summary["exported"] == 5 and summary["failed"] == []
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{i}.pdf" for i in ids)
+    assert (tmp_path / f"{ids[0]}.pdf").read_bytes().startswith(b"%PDF-1.4")
+
+
+def test_export_pdfs_rejects_ids_that_escape_the_output_dir(client_factory, tmp_path):
+    client = client_factory()
+    output = tmp_path / "out"
+    documents = [("../../escaped", "../../escaped"), ("a/b", "a/b")]
+    summary = asyncio.run(export_pdfs(client, documents, output_dir=str(output)))
+    assert summary["exported"] == 0
+    assert [f["documentId"] for f in summary["failed"]] == ["../../escaped", "a/b"]
+    assert os.listdir(output) == []
+    assert sorted(os.listdir(tmp_path)) == ["out"]
+
+
+def test_export_pdfs_sanitises_stems(fake, client_factory, tmp_path):
+    client = client_factory()
+    doc_id = fake.ids()[0]
+    summary = asyncio.run(export_pdfs(client, [(doc_id, "../F 1")], output_dir=str(tmp_path)))
+    assert summary["exported"] == 1
+    assert os.listdir(tmp_path) == ["F_1.pdf"]
+
+
+def test_export_pdfs_exports_repeated_ids_once(fake, client_factory, tmp_path):
+    client = client_factory()
+    doc_id = fake.ids()[0]
+    zip_path = tmp_path / "invoices.zip"
+    summary = asyncio.run(export_pdfs(client, [(doc_id, doc_id)] * 3, zip_path=str(zip_path)))
+    assert summary["exported"] == 1 and summary["failed"] == []
+    with zipfile.ZipFile(zip_path) as archive:
+        assert archive.namelist() == [f"{doc_id}.pdf"]
+
+
+class _BrokenStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield b'{"status":1,"data":"JVBERi0xLjQK'
+        raise httpx.ReadError("connection reset")
+
+
+def _breaking(fake, broken_id):
+    """FakeHolded's transport, except that `broken_id`'s PDF body breaks mid-stream."""
+    inner = fake.transport()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith(f"/{broken_id}/pdf"):
+            return httpx.Response(200, headers={"content-type": "application/json"}, stream=_BrokenStream())
+        return await inner.handle_async_request(request)
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.parametrize("as_zip", [False, True])
+def test_export_pdfs_records_a_download_that_breaks_mid_stream(fake, tmp_path, as_zip):
+    ids = fake.ids()[:3]
+    client = HoldedClient(make_settings(), transport=_breaking(fake, ids[1]))
+    output = tmp_path / "out"
+    target = {"zip_path": str(tmp_path / "pdfs.zip")} if as_zip else {"output_dir": str(output)}
+
+    async def scenario():
+        try:
+            return await export_pdfs(client, [(i, i) for i in ids], concurrency=3, **target)
+        finally:
+            await client.aclose()
+
+    summary = asyncio.run(scenario())
+    assert summary["exported"] == 2
+    assert [f["documentId"] for f in summary["failed"]] == [ids[1]]
+    assert "connection reset" in summary["failed"][0]["error"]["message"]
+    if as_zip:
+        with zipfile.ZipFile(tmp_path / "pdfs.zip") as archive:
+            assert sorted(archive.namelist()) == sorted(f"{i}.pdf" for i in (ids[0], ids[2]))
+        assert sorted(os.listdir(tmp_path)) == ["pdfs.zip"]
+    else:
+        assert sorted(os.listdir(output)) == sorted(f"{i}.pdf" for i in (ids[0], ids[2]))
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+
+from holded_mcp.mirror import InvoiceMirror
+from holded_mcp.search import SearchIndex, tokenize
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Factura Nº 12 — Peñón") == ["factura", "no", "12", "penon"]
+
+
+def test_search_ranks_and_filters(fake, client_factory):
+    client = client_factory()
+    index = SearchIndex(":memory:", max_age_seconds=300)
+    asyncio.run(index.refresh(client))
+    assert index.count() == len(fake.ids())
+
+    result = index.search("F000007")
+    assert result["items"][0]["id"] == fake.ids()[7]
+    assert index.search("hosting")["total"] == len(fake.ids())
+    assert index.search("host", status=1)["total"] < len(fake.ids())
+    index.close()
+
+
+def test_concurrent_cold_refreshes_index_once(fake, client_factory):
+    client = client_factory()
+    single = SearchIndex(":memory:", max_age_seconds=300)
+    asyncio.run(single.refresh(client))
+    single.close()
+    one_sync = fake.requests
+
+    index = SearchIndex(":memory:", max_age_seconds=300)
+
+    async def scenario():
+        await asyncio.gather(*(index.refresh(client) for _ in range(5)))
+
+    fake.requests = 0
+    asyncio.run(scenario())
+    assert fake.requests == one_sync
+    index.close()
+
+
+def test_stale_index_runs_a_delta_sync(client_factory):
+    client = client_factory()
+    index = SearchIndex(":memory:", max_age_seconds=300)
+    first = asyncio.run(index.sync(client))
+    index.mark_stale()
+    asyncio.run(index.refresh(client))
+    assert first["mode"] == "full"
+    assert index.is_fresh()
+    assert asyncio.run(index.sync(client))["mode"] == "delta"
+    index.close()
+
+
+def test_index_fed_from_the_mirror(fake, client_factory, tmp_path):
+    client = client_factory()
+    mirror = InvoiceMirror(str(tmp_path / "mirror.db"), max_age_seconds=300)
+    index = SearchIndex(":memory:", max_age_seconds=300, mirror=mirror)
+
+    first = asyncio.run(index.sync(client))
+    assert first["mode"] == "full" and first["source"] == "mirror"
+    assert first["indexed"] == len(fake.ids())
+    upstream = fake.requests
+
+    # Only what the mirror stored since is re-indexed, without going upstream.
+    doc = {**mirror.get(fake.ids()[3]), "desc": "Renovación dominio"}
+    asyncio.run(mirror.put(doc))
+    index.mark_stale()
+    second = asyncio.run(index.sync(client))
+    assert second["mode"] == "delta" and second["indexed"] == 1
+    assert fake.requests == upstream
+    assert [item["id"] for item in index.search("renovacion")["items"]] == [doc["id"]]
+
+    # A full mirror load drops deleted invoices, so the index is rebuilt from it.
+    deleted = fake._docs.pop(0)
+    asyncio.run(mirror.sync(client, full=True))
+    third = asyncio.run(index.sync(client))
+    assert third["mode"] == "full" and third["removed"] == 1
+    assert index.search(deleted["docNumber"])["total"] == 0
+    index.close()
+    mirror.close()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+
+from conftest import make_settings
+
+from holded_mcp.tenants import TenantPool, lease_scope
+
+
+def test_capacity_evicts_the_least_recently_used_idle_client():
+    async def scenario():
+        pool = TenantPool(make_settings(), max_tenants=2, idle_seconds=600)
+        for key in ("key-a", "key-b", "key-c"):
+            pool.get(key)
+        size, evictions = len(pool), dict(pool.evictions)
+        await pool.aclose()
+        return size, evictions
+
+    size, evictions = asyncio.run(scenario())
+    assert size == 2
+    assert evictions == {"idle": 0, "capacity": 1}
+
+
+def test_leased_clients_are_not_evicted():
+    async def scenario():
+        pool = TenantPool(make_settings(), max_tenants=1, idle_seconds=0)
+        with lease_scope():
+            leased = pool.get("key-a")
+            with lease_scope():
+                pool.get("key-b")
+                # Over capacity, but both are held by a running call.
+                assert len(pool) == 2
+            await asyncio.sleep(0.01)
+            assert pool.evict_idle() == 1
+            assert pool.get("key-a") is leased
+            assert not leased.holded._client.is_closed
+        assert leased.leases == 0
+        await asyncio.sleep(0.01)
+        assert pool.evict_idle() == 1
+        await pool.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_get_outside_a_scope_takes_no_lease():
+    async def scenario():
+        pool = TenantPool(make_settings(), max_tenants=4, idle_seconds=0)
+        tenant = pool.get("key-a")
+        await asyncio.sleep(0.01)
+        evicted = pool.evict_idle()
+        await pool.aclose()
+        return tenant.leases, evicted
+
+    assert asyncio.run(scenario()) == (0, 1)